@@ -1,110 +1,1078 @@
-
-
-def secant(f, x0, x1, NMAX, c, s, tol=1.e-6, **kwargs):
-    """
-    solves for a functions root by secant method
-    loops until NMAX iterations reached or tolerance is achieved or divide by zero error occurs
-    iterative formula for secant: x_{k+1} = x_k - {f(x_k) * (x_k - x_{k-1})}/{f(x_k) - f(x_{k-1})}
-    :param f: the function
-    :param x0: initial x val
-    :param x1: second initial x val
-    :param NMAX: the max num of iterations
-    :param c: the constants of the function that will be passed into it
-    :param s: the subtype of the function
-    :param tol: tolerance for the absolute error of two subsequent approximations
-    :param **kwargs: if a kwarg with a name of "sum_of_functions" or "compound_function" is passed in, its value will be used as the functions "c" instead
-    :return: the x value of the root found
-    """
-
-    for i, name in enumerate(kwargs):
-        if name == "compound_function" or name == "sum_of_functions":
-            c = [*kwargs.values()][i]
-
-    # update params xk and xk1, then update x0 and x1
-    # iterative formula for secant: x_{k+1} = x_k - {f(x_k) * (x_k - x_{k-1})}/{f(x_k) - f(x_{k-1})}
-    err = 1.0
-    iteration = 0
-    while (err > tol) and (iteration < NMAX):
-        if f(s, x0, c) == f(s, x1, c):
-            return "NaN"
-        xk = x0
-        xk1 = x1
-        err = xk
-        xk1 = xk - (f(s, xk, c) * (xk - xk1)) / (f(s, xk, c) - f(s, xk1, c))
-        err = abs(xk1 - err)
-        x0 = x1
-        x1 = xk1
-        iteration += 1
-
-        if iteration > NMAX:
-            break
-
-    return x1
-
-
-def bisection(f, x0, x1, NMAX, c, s, tol=1.e-6):
-    """
-    solves for root of equation using bisection algorithm
-    :param f: the function
-    :param x0: initial x val
-    :param x1: second initial x val
-    :param NMAX: max number of iterations
-    :param c: the constants
-    :param s: the subtype
-    :param tol: tolerance before algorithm concludes it has reached a root
-    :return: the x value of the root found
-    """
-
-    iteration = 1
-    condition = True
-    while condition and (iteration < NMAX):
-        x2 = (x0 + x1) / 2
-
-        if f(s, x0, c) * f(s, x2, c) < 0:
-            x1 = x2
-        else:
-            x0 = x2
-
-        iteration += 1
-        condition = abs(f(s, x2, c)) > tol
-
-    return x2
-
-
-def newton(f, df, x0, tol=1.e-6):
-    """
-    :param: f = the function f(x)
-    :param: df = the derivative of f(x)
-    :param: x0 = the initial guess of the solution
-    :param: tol = tolerance for the absolute error of two subsequent approximations
-    :return: x value of root reached
-    """
-    err = 1.0
-    iteration = 0
-
-    xk = x0
-    while err > tol:
-        iteration = iteration + 1
-        err = xk
-        xk = xk - f(xk) / df(xk)
-        err = abs(err - xk)
-        print(iteration, xk)
-    return xk
-
-
-def main():
-    def f(t, x, c):
-        y = x**20 - 1
-        return y
-
-    tol = 1.e-4
-    x1 = -5
-    x2 = 4
-    MAX_ITER = 100
-    rx = secant(f, x1, x2, MAX_ITER, 0, 0, tol)
-    print('The aproximate solution is: ', rx)
-    print('And the error is: ', f(0, rx, 0))
-
-
-if __name__ == "__main__":
-    main()
+import enum
+import math
+from collections import namedtuple
+import numpy as np
+import functions
+
+
+# constants
+BRACKET_EPS = 4  # relative size of the smallest bracket brent can make in multiples of the machine epsilon of the x values, it stops there
+DEFAULT_SCAN_SAMPLES = 10000  # x values checked for a sign change by find_all_roots, roots closer together than the gap between them can be missed
+REAL_ROOT_IMAG = 1e-5  # relative imaginary part of an eigenvalue that is still a real root, repeated roots are split into complex ones about this big
+DISTINCT_ROOT = 1e-6  # relative distance between two roots before they are counted as different roots
+
+
+class Status(enum.IntEnum):
+    """
+    Why a solver stopped, stored as an int8 for every pair of inputs in a sweep
+    """
+    NOT_SOLVED = -1  # not calculated yet, e.g. the rest of a sweep that was cancelled
+    CONVERGED = 0  # reached the tolerance, the root is a root
+    MAX_ITER = 1  # ran out of iterations
+    ZERO_DIVISION = 2  # the step divided by zero, e.g. two x vals with the same y value in secant or a zero derivative in newton
+    DOMAIN_ERROR = 3  # the function was NaN, e.g. outside the domain of log or asin
+    NO_BRACKET = 4  # a bracketing method was given two x vals without a sign change
+    STALLED = 5  # the bracket can't get any smaller and the y value is still above tolerance, usually a pole (brent only)
+    OUT_OF_RANGE = 6  # the root is further away than abs_max_root, set by sweep.clean_roots
+
+
+# what the solvers return, the root is nan unless it is the last x val of an iteration that ran out or converged.
+# the grid solvers return the same fields as arrays with the shape of the initial x values
+Result = namedtuple("Result", ("root", "iterations", "evaluations", "status"))
+GridResult = namedtuple("GridResult", ("roots", "iterations", "evaluations", "status"))
+
+
+def _bind(f, s, c):
+    """
+    Turns the function into one that only takes x, so the solvers don't need to pass the subtype and constants on every call
+    :param f: either a function called as f(s, x, c) or a functions.Expression, which is used directly
+    :param s: the subtype of the function
+    :param c: the constants of the function
+    :return: function of x
+    """
+    if isinstance(f, functions.Expression):
+        return f
+
+    return lambda x: f(s, x, c)
+
+
+def _checked(f):
+    """
+    Makes a math domain error (e.g. math.log of a negative number) a NaN y value for the scalar solvers, the same as the numpy version
+    :param f: function of x
+    :return: function of x
+    """
+    def checked(x):
+        try:
+            return f(x)
+        except ValueError:
+            return math.nan
+
+    return checked
+
+
+def _initial_values(f, x, fx, shape):
+    """
+    The y values of the initial x values for the grid solvers, either evaluated or from values that are already known
+    :param f: function of x
+    :param x: flat array of initial x values
+    :param fx: known y values that can be broadcast to shape, or None to evaluate them
+    :param shape: shape of the grid
+    :return: flat array of y values
+    """
+    if fx is None:
+        return f(x)
+
+    return np.broadcast_to(np.asarray(fx, dtype=x.dtype), shape).ravel().copy()
+
+
+def _take(f, index):
+    """
+    The function of the pairs at index, used by the grid solvers as pairs drop out of the active set. only a functions.Family changes,
+    since it has different constants for every pair, anything else is the same function for all of them
+    :param f: function of x
+    :param index: index array or boolean mask of the pairs that are kept
+    :return: function of x
+    """
+    if isinstance(f, functions.Family):
+        return f.take(index)
+
+    return f
+
+
+def _float_arrays(x0, x1):
+    """
+    The initial x values of a grid solver as float arrays of the same shape. float32 x values are solved in float32 (e.g. from a sweep
+    with dtype=np.float32), which is about twice as fast but only accurate to about 1e-7 relative to the x values. anything else is float64
+    :param x0: initial x vals, array or float
+    :param x1: second initial x vals
+    :return: tuple of (x0, x1) arrays
+    """
+    x0, x1 = np.asarray(x0), np.asarray(x1)
+    dtype = np.float32 if x0.dtype == x1.dtype == np.float32 else np.float64
+
+    return np.broadcast_arrays(x0.astype(dtype, copy=False), x1.astype(dtype, copy=False))
+
+
+def _bracket(x0, x1, fx0, fx1, tol, roots, status):
+    """
+    Sets the results of the pairs that don't need to be iterated by a bracketing method: the same x val twice gives
+    that x val if it is within tolerance of a root, an x val with a y value of exactly 0 is the root (the smaller one if both are),
+    and anything else without a sign change is left as NaN
+    :param x0: flat array of initial x vals
+    :param x1: flat array of second initial x vals
+    :param fx0: y values of x0
+    :param fx1: y values of x1
+    :param tol: tolerance
+    :param roots: flat array of roots, written to
+    :param status: flat array of Status, written to
+    :return: indexes of the pairs with y values of opposite signs, the only ones that are iterated
+    """
+    # anything without a sign change isn't iterated, a NaN y value is a domain error
+    sign_change = fx0 * fx1 < 0
+    status[~sign_change] = Status.NO_BRACKET
+    status[np.isnan(fx0) | np.isnan(fx1)] = Status.DOMAIN_ERROR
+
+    # the same x val twice can only be a root itself
+    diagonal = x0 == x1
+    at_root = diagonal & (np.abs(fx0) <= tol)
+    roots[at_root] = x0[at_root]
+    status[at_root] = Status.CONVERGED
+
+    # an x val that is already a root. if both are, use the smaller one so the order doesn't matter
+    use_x0 = (fx0 == 0) & ((fx1 != 0) | (x0 < x1)) & ~diagonal
+    use_x1 = (fx1 == 0) & ~use_x0 & ~diagonal
+    roots[use_x0] = x0[use_x0]
+    roots[use_x1] = x1[use_x1]
+    status[use_x0 | use_x1] = Status.CONVERGED
+
+    return np.flatnonzero(sign_change)
+
+
+def _endpoint_root(x0, x1, fx0, fx1, tol):
+    """
+    The result of a bracketing method for a single pair that isn't iterated, the same as _bracket
+    :param x0: initial x val
+    :param x1: second initial x val
+    :param fx0: y value of x0
+    :param fx1: y value of x1
+    :param tol: tolerance
+    :return: the Result, or None if the pair brackets a root and has to be iterated
+    """
+    if x0 == x1 and abs(fx0) <= tol:
+        return Result(x0, 0, 2, Status.CONVERGED)
+    if x0 != x1 and fx0 == 0 and (fx1 != 0 or x0 < x1):
+        return Result(x0, 0, 2, Status.CONVERGED)
+    if x0 != x1 and fx1 == 0:
+        return Result(x1, 0, 2, Status.CONVERGED)
+    if fx0 * fx1 < 0:
+        return None
+
+    return Result(np.nan, 0, 2, Status.DOMAIN_ERROR if math.isnan(fx0) or math.isnan(fx1) else Status.NO_BRACKET)
+
+
+def secant(f, x0, x1, NMAX, c, s, tol=1.e-6, **kwargs):
+    """
+    solves for a functions root by secant method
+    loops until NMAX iterations reached or tolerance is achieved or divide by zero error occurs
+    iterative formula for secant: x_{k+1} = x_k - {f(x_k) * (x_k - x_{k-1})}/{f(x_k) - f(x_{k-1})}
+    :param f: the function, called as f(s, x, c), or a functions.Expression
+    :param x0: initial x val
+    :param x1: second initial x val
+    :param NMAX: the max num of iterations
+    :param c: the constants of the function that will be passed into it
+    :param s: the subtype of the function
+    :param tol: tolerance for the absolute error of two subsequent approximations
+    :param **kwargs: a function spec (e.g. sum_of_functions={...} or compound_function={...}), if passed in it is compiled with functions.compile_function and used instead of f
+    :return: the Result, its root is the x value of the root found
+    """
+
+    if kwargs:
+        f = functions.compile_function(**kwargs)
+    f = _checked(_bind(f, s, c))
+
+    # iterative formula for secant: x_{k+1} = x_k - {f(x_k) * (x_k - x_{k-1})}/{f(x_k) - f(x_{k-1})}
+    # the y value of x0 is carried over from the previous iteration, so only the newest x value is evaluated each iteration
+    iteration = 0
+    evaluations = 2
+    fx0, fx1 = f(x0), f(x1)
+    while iteration < NMAX:
+        if fx1 is None:
+            fx1 = f(x1)
+            evaluations += 1
+        if math.isnan(fx0) or math.isnan(fx1):
+            return Result(np.nan, iteration, evaluations, Status.DOMAIN_ERROR)
+        if fx0 == fx1:
+            return Result(np.nan, iteration, evaluations, Status.ZERO_DIVISION)
+
+        xk1 = x0 - (fx0 * (x0 - x1)) / (fx0 - fx1)
+        err = abs(xk1 - x0)
+        x0, fx0 = x1, fx1
+        x1, fx1 = xk1, None
+        iteration += 1
+
+        # the step is NaN if the y values were infinite
+        if math.isnan(err):
+            return Result(np.nan, iteration, evaluations, Status.DOMAIN_ERROR)
+        if err <= tol:
+            return Result(x1, iteration, evaluations, Status.CONVERGED)
+
+    return Result(x1, iteration, evaluations, Status.MAX_ITER)
+
+
+def secant_grid(f, x0, x1, NMAX, c, s, tol=1.e-6, fx0=None, fx1=None):
+    """
+    solves for a functions root by secant method for every pair of initial x values at once
+    same iteration as secant, but all the pairs are stored in numpy arrays and updated together. pairs that have
+    converged or hit a divide by zero are removed from the active set, so later iterations only calculate the pairs that are still running
+    :param f: the function, called as f(s, x, c) or a functions.Expression. must accept a numpy array as its x value
+    :param x0: array of initial x vals (any shape, e.g. 2d from np.meshgrid)
+    :param x1: array of second initial x vals, same shape as x0
+    :param NMAX: the max num of iterations
+    :param c: the constants of the function that will be passed into it
+    :param s: the subtype of the function
+    :param tol: tolerance for the absolute error of two subsequent approximations
+    :param fx0: y values of x0 if they are already known (e.g. from functions.CachedFunction.precompute), broadcast to the shape of x0
+    :param fx1: y values of x1 if they are already known
+    :return: GridResult of arrays with the same shape as x0, the same as secant for each pair (in float32 a step that doesn't move x
+    is converged instead of a zero division)
+    """
+    x0, x1 = _float_arrays(x0, x1)
+    shape = x0.shape
+
+    # flat working copies of the pairs, and the results that are written to as pairs drop out
+    x0 = x0.ravel().copy()
+    x1 = x1.ravel().copy()
+    roots = x1.copy()
+    iterations = np.zeros(x0.size, dtype=int)
+    evaluations = np.full(x0.size, 2)
+    status = np.full(x0.size, Status.MAX_ITER, dtype=np.int8)
+
+    f = _bind(f, s, c)
+    fx0 = _initial_values(f, x0, fx0, shape)
+    fx1 = _initial_values(f, x1, fx1, shape)
+
+    # indexes of the pairs that are still running
+    active = np.arange(x0.size)
+    iteration = 0
+    while active.size and iteration < NMAX:
+        # the y value of x0 is carried over from the previous iteration, so only the newest x value is evaluated
+        if fx1 is None:
+            fx1 = f(x1)
+            evaluations[active] += 1
+
+        # pairs with a NaN y value or a zero denominator are finished, their root is NaN. in float32, pairs where the last step didn't
+        # move x have converged as far as the precision allows (the iterates often land on the same float32 value before the step
+        # is within tol), their root is already in roots
+        domain_error = np.isnan(fx0) | np.isnan(fx1)
+        stalled = ~domain_error & (x0 == x1) if iteration and x0.dtype == np.float32 else np.zeros(x0.size, dtype=bool)
+        zero_division = ~domain_error & ~stalled & (fx0 == fx1)
+        stop = domain_error | zero_division | stalled
+        roots[active[domain_error | zero_division]] = np.nan
+        iterations[active[stop]] = iteration
+        status[active[domain_error]] = Status.DOMAIN_ERROR
+        status[active[zero_division]] = Status.ZERO_DIVISION
+        status[active[stalled]] = Status.CONVERGED
+
+        keep = ~stop
+        active, x0, x1, fx0, fx1 = active[keep], x0[keep], x1[keep], fx0[keep], fx1[keep]
+        f = _take(f, keep)
+
+        # iterative formula for secant: x_{k+1} = x_k - {f(x_k) * (x_k - x_{k-1})}/{f(x_k) - f(x_{k-1})}
+        with np.errstate(invalid="ignore"):
+            xk1 = x0 - (fx0 * (x0 - x1)) / (fx0 - fx1)
+        err = np.abs(xk1 - x0)
+        x0, fx0 = x1, fx1
+        x1, fx1 = xk1, None
+        iteration += 1
+
+        roots[active] = x1
+        iterations[active] = iteration
+
+        # keep going only where the error is still above tolerance, a NaN step (from infinite y values) is a domain error
+        running = err > tol
+        status[active[err <= tol]] = Status.CONVERGED
+        status[active[np.isnan(err)]] = Status.DOMAIN_ERROR
+        roots[active[np.isnan(err)]] = np.nan
+        active, x0, x1, fx0 = active[running], x0[running], x1[running], fx0[running]
+        f = _take(f, running)
+
+    return GridResult(roots.reshape(shape), iterations.reshape(shape), evaluations.reshape(shape), status.reshape(shape))
+
+
+def bisection(f, x0, x1, NMAX, c, s, tol=1.e-6):
+    """
+    solves for root of equation using bisection algorithm
+    :param f: the function, called as f(s, x, c), or a functions.Expression
+    :param x0: initial x val
+    :param x1: second initial x val
+    :param NMAX: max number of iterations
+    :param c: the constants
+    :param s: the subtype
+    :param tol: tolerance before algorithm concludes it has reached a root
+    :return: the Result, its root is the x value of the root found
+    """
+
+    f = _checked(_bind(f, s, c))
+
+    # the y value of x0 is kept, so only the midpoint is evaluated each iteration
+    iteration = 1
+    evaluations = 1
+    x2 = np.nan
+    fx0 = f(x0)
+    while iteration < NMAX:
+        x2 = (x0 + x1) / 2
+        fx2 = f(x2)
+        evaluations += 1
+
+        if math.isnan(fx2):
+            return Result(np.nan, iteration, evaluations, Status.DOMAIN_ERROR)
+        if not abs(fx2) > tol:
+            return Result(x2, iteration, evaluations, Status.CONVERGED)
+
+        if fx0 * fx2 < 0:
+            x1 = x2
+        else:
+            x0, fx0 = x2, fx2
+
+        iteration += 1
+
+    return Result(x2, iteration - 1, evaluations, Status.MAX_ITER)
+
+
+def bisection_grid(f, x0, x1, NMAX, c, s, tol=1.e-6, bracketed=False, fx0=None, fx1=None):
+    """
+    solves for root of equation using bisection algorithm for every pair of initial x values at once
+    same iteration as bisection, pairs that have reached tolerance are removed from the active set like in secant_grid
+    :param f: the function, called as f(s, x, c) or a functions.Expression. must accept a numpy array as its x value
+    :param x0: array of initial x vals (any shape)
+    :param x1: array of second initial x vals, same shape as x0
+    :param NMAX: max number of iterations
+    :param c: the constants
+    :param s: the subtype
+    :param tol: tolerance before algorithm concludes it has reached a root
+    :param bracketed: if True, only pairs that bracket a root (y values with opposite signs) are iterated. the same x val twice gives
+    that x val if it is within tolerance of a root, an x val with a y value of exactly 0 is the root, and anything else is NaN.
+    this makes the result the same for either order of x0 and x1
+    :param fx0: y values of x0 if they are already known (e.g. from functions.CachedFunction.precompute), broadcast to the shape of x0
+    :param fx1: y values of x1 if they are already known, only used when bracketed
+    :return: GridResult of arrays with the same shape as x0
+    """
+    x0, x1 = _float_arrays(x0, x1)
+    shape = x0.shape
+
+    x0 = x0.ravel().copy()
+    x1 = x1.ravel().copy()
+    roots = np.full(x0.size, np.nan, dtype=x0.dtype)
+    iterations = np.zeros(x0.size, dtype=int)
+    evaluations = np.full(x0.size, 2 if bracketed else 1)
+    status = np.full(x0.size, Status.MAX_ITER, dtype=np.int8)
+
+    f = _bind(f, s, c)
+    fx0 = _initial_values(f, x0, fx0, shape)
+
+    active = np.arange(x0.size)
+    if bracketed:
+        active = _bracket(x0, x1, fx0, _initial_values(f, x1, fx1, shape), tol, roots, status)
+        x0, x1, fx0 = x0[active], x1[active], fx0[active]
+        f = _take(f, active)
+
+    iteration = 1
+    while active.size and iteration < NMAX:
+        x2 = (x0 + x1) / 2
+        fx2 = f(x2)
+        evaluations[active] += 1
+
+        # keep the half of the interval with the sign change
+        left = fx0 * fx2 < 0
+        x1 = np.where(left, x2, x1)
+        x0 = np.where(left, x0, x2)
+        fx0 = np.where(left, fx0, fx2)
+
+        roots[active] = x2
+        iterations[active] = iteration
+        iteration += 1
+
+        # NaN y values stop, the same as bisection
+        running = np.abs(fx2) > tol
+        status[active[np.abs(fx2) <= tol]] = Status.CONVERGED
+        status[active[np.isnan(fx2)]] = Status.DOMAIN_ERROR
+        roots[active[np.isnan(fx2)]] = np.nan
+        active, x0, x1, fx0 = active[running], x0[running], x1[running], fx0[running]
+        f = _take(f, running)
+
+    return GridResult(roots.reshape(shape), iterations.reshape(shape), evaluations.reshape(shape), status.reshape(shape))
+
+
+def illinois(f, x0, x1, NMAX, c, s, tol=1.e-6):
+    """
+    solves for root of equation using the illinois algorithm (regula falsi where the y value of an end of the bracket
+    that is kept twice in a row is halved, so it doesn't get stuck moving only one end)
+    :param f: the function, called as f(s, x, c), or a functions.Expression
+    :param x0: initial x val
+    :param x1: second initial x val, f(x0) and f(x1) must have opposite signs
+    :param NMAX: max number of iterations
+    :param c: the constants
+    :param s: the subtype
+    :param tol: tolerance before algorithm concludes it has reached a root
+    :return: the Result, see _endpoint_root for pairs that don't bracket a root
+    """
+
+    f = _checked(_bind(f, s, c))
+    fx0, fx1 = f(x0), f(x1)
+    result = _endpoint_root(x0, x1, fx0, fx1, tol)
+    if result is not None:
+        return result
+
+    # x1 is always the newest x val
+    iteration = 0
+    evaluations = 2
+    while iteration < NMAX:
+        x2 = x1 - fx1 * (x1 - x0) / (fx1 - fx0)
+        fx2 = f(x2)
+        evaluations += 1
+        iteration += 1
+
+        if fx2 * fx1 < 0:
+            x0, fx0 = x1, fx1
+        else:
+            fx0 = fx0 / 2
+        x1, fx1 = x2, fx2
+
+        if math.isnan(fx2):
+            return Result(np.nan, iteration, evaluations, Status.DOMAIN_ERROR)
+        if not abs(fx2) > tol:
+            return Result(x1, iteration, evaluations, Status.CONVERGED)
+
+    return Result(x1, iteration, evaluations, Status.MAX_ITER)
+
+
+def illinois_grid(f, x0, x1, NMAX, c, s, tol=1.e-6, fx0=None, fx1=None):
+    """
+    solves for root of equation using the illinois algorithm for every pair of initial x values at once.
+    only pairs that bracket a root are iterated, the rest are the same as bisection_grid with bracketed=True
+    :param f: the function, called as f(s, x, c) or a functions.Expression. must accept a numpy array as its x value
+    :param x0: array of initial x vals (any shape)
+    :param x1: array of second initial x vals, same shape as x0
+    :param NMAX: max number of iterations
+    :param c: the constants
+    :param s: the subtype
+    :param tol: tolerance before algorithm concludes it has reached a root
+    :param fx0: y values of x0 if they are already known, broadcast to the shape of x0
+    :param fx1: y values of x1 if they are already known
+    :return: GridResult of arrays with the same shape as x0
+    """
+    x0, x1 = _float_arrays(x0, x1)
+    shape = x0.shape
+
+    x0 = x0.ravel().copy()
+    x1 = x1.ravel().copy()
+    roots = np.full(x0.size, np.nan, dtype=x0.dtype)
+    iterations = np.zeros(x0.size, dtype=int)
+    evaluations = np.full(x0.size, 2)
+    status = np.full(x0.size, Status.MAX_ITER, dtype=np.int8)
+
+    f = _bind(f, s, c)
+    fx0 = _initial_values(f, x0, fx0, shape)
+    fx1 = _initial_values(f, x1, fx1, shape)
+
+    active = _bracket(x0, x1, fx0, fx1, tol, roots, status)
+    x0, x1, fx0, fx1 = x0[active], x1[active], fx0[active], fx1[active]
+    f = _take(f, active)
+
+    iteration = 0
+    while active.size and iteration < NMAX:
+        x2 = x1 - fx1 * (x1 - x0) / (fx1 - fx0)
+        fx2 = f(x2)
+        evaluations[active] += 1
+        iteration += 1
+
+        # keep the bracket around the sign change, halving the y value of the end that is kept twice
+        change = fx2 * fx1 < 0
+        x0 = np.where(change, x1, x0)
+        fx0 = np.where(change, fx1, fx0 / 2)
+        x1, fx1 = x2, fx2
+
+        roots[active] = x1
+        iterations[active] = iteration
+
+        running = np.abs(fx2) > tol
+        status[active[np.abs(fx2) <= tol]] = Status.CONVERGED
+        status[active[np.isnan(fx2)]] = Status.DOMAIN_ERROR
+        roots[active[np.isnan(fx2)]] = np.nan
+        active, x0, x1, fx0, fx1 = active[running], x0[running], x1[running], fx0[running], fx1[running]
+        f = _take(f, running)
+
+    return GridResult(roots.reshape(shape), iterations.reshape(shape), evaluations.reshape(shape), status.reshape(shape))
+
+
+def ridders(f, x0, x1, NMAX, c, s, tol=1.e-6):
+    """
+    solves for root of equation using ridders' method: the midpoint of the bracket is evaluated, and an exponential
+    fitted through the ends and the midpoint gives the next x val, which is always inside of the bracket. 2 evaluations per iteration
+    :param f: the function, called as f(s, x, c), or a functions.Expression
+    :param x0: initial x val
+    :param x1: second initial x val, f(x0) and f(x1) must have opposite signs
+    :param NMAX: max number of iterations
+    :param c: the constants
+    :param s: the subtype
+    :param tol: tolerance before algorithm concludes it has reached a root
+    :return: the Result, see _endpoint_root for pairs that don't bracket a root
+    """
+
+    f = _checked(_bind(f, s, c))
+    fx0, fx1 = f(x0), f(x1)
+    result = _endpoint_root(x0, x1, fx0, fx1, tol)
+    if result is not None:
+        return result
+
+    iteration = 0
+    evaluations = 2
+    x3 = x1
+    while iteration < NMAX:
+        x2 = (x0 + x1) / 2
+        fx2 = f(x2)
+        x3 = x2 + (x2 - x0) * np.sign(fx0 - fx1) * fx2 / np.sqrt(fx2 * fx2 - fx0 * fx1)
+        fx3 = f(x3)
+        evaluations += 2
+        iteration += 1
+
+        if math.isnan(fx3):
+            return Result(np.nan, iteration, evaluations, Status.DOMAIN_ERROR)
+        if not abs(fx3) > tol:
+            return Result(x3, iteration, evaluations, Status.CONVERGED)
+
+        # the new bracket is whichever pair of the 4 x vals still has a sign change
+        if fx2 * fx3 < 0:
+            x0, fx0, x1, fx1 = x2, fx2, x3, fx3
+        elif fx0 * fx3 < 0:
+            x1, fx1 = x3, fx3
+        else:
+            x0, fx0 = x3, fx3
+
+    return Result(x3, iteration, evaluations, Status.MAX_ITER)
+
+
+def ridders_grid(f, x0, x1, NMAX, c, s, tol=1.e-6, fx0=None, fx1=None):
+    """
+    solves for root of equation using ridders' method for every pair of initial x values at once.
+    only pairs that bracket a root are iterated, the rest are the same as bisection_grid with bracketed=True
+    :param f: the function, called as f(s, x, c) or a functions.Expression. must accept a numpy array as its x value
+    :param x0: array of initial x vals (any shape)
+    :param x1: array of second initial x vals, same shape as x0
+    :param NMAX: max number of iterations
+    :param c: the constants
+    :param s: the subtype
+    :param tol: tolerance before algorithm concludes it has reached a root
+    :param fx0: y values of x0 if they are already known, broadcast to the shape of x0
+    :param fx1: y values of x1 if they are already known
+    :return: GridResult of arrays with the same shape as x0
+    """
+    x0, x1 = _float_arrays(x0, x1)
+    shape = x0.shape
+
+    x0 = x0.ravel().copy()
+    x1 = x1.ravel().copy()
+    roots = np.full(x0.size, np.nan, dtype=x0.dtype)
+    iterations = np.zeros(x0.size, dtype=int)
+    evaluations = np.full(x0.size, 2)
+    status = np.full(x0.size, Status.MAX_ITER, dtype=np.int8)
+
+    f = _bind(f, s, c)
+    fx0 = _initial_values(f, x0, fx0, shape)
+    fx1 = _initial_values(f, x1, fx1, shape)
+
+    active = _bracket(x0, x1, fx0, fx1, tol, roots, status)
+    x0, x1, fx0, fx1 = x0[active], x1[active], fx0[active], fx1[active]
+    f = _take(f, active)
+
+    iteration = 0
+    while active.size and iteration < NMAX:
+        x2 = (x0 + x1) / 2
+        fx2 = f(x2)
+        with np.errstate(invalid="ignore"):
+            x3 = x2 + (x2 - x0) * np.sign(fx0 - fx1) * fx2 / np.sqrt(fx2 * fx2 - fx0 * fx1)
+        fx3 = f(x3)
+        evaluations[active] += 2
+        iteration += 1
+
+        roots[active] = x3
+        iterations[active] = iteration
+
+        # the new bracket is whichever pair of the 4 x vals still has a sign change
+        middle = fx2 * fx3 < 0
+        left = ~middle & (fx0 * fx3 < 0)
+        x0, fx0 = np.where(middle, x2, np.where(left, x0, x3)), np.where(middle, fx2, np.where(left, fx0, fx3))
+        x1, fx1 = np.where(middle | left, x3, x1), np.where(middle | left, fx3, fx1)
+
+        running = np.abs(fx3) > tol
+        status[active[np.abs(fx3) <= tol]] = Status.CONVERGED
+        status[active[np.isnan(fx3)]] = Status.DOMAIN_ERROR
+        roots[active[np.isnan(fx3)]] = np.nan
+        active, x0, x1, fx0, fx1 = active[running], x0[running], x1[running], fx0[running], fx1[running]
+        f = _take(f, running)
+
+    return GridResult(roots.reshape(shape), iterations.reshape(shape), evaluations.reshape(shape), status.reshape(shape))
+
+
+def brent(f, x0, x1, NMAX, c, s, tol=1.e-6):
+    """
+    solves for root of equation using brent's method: inverse quadratic interpolation or secant steps while they stay
+    inside of the bracket and keep making it smaller, and a bisection step when they don't (the same steps as scipy's brentq)
+    :param f: the function, called as f(s, x, c), or a functions.Expression
+    :param x0: initial x val
+    :param x1: second initial x val, f(x0) and f(x1) must have opposite signs
+    :param NMAX: max number of iterations
+    :param c: the constants
+    :param s: the subtype
+    :param tol: tolerance before algorithm concludes it has reached a root
+    :return: the Result, see _endpoint_root for pairs that don't bracket a root
+    """
+
+    f = _checked(_bind(f, s, c))
+    fpre, fcur = f(x0), f(x1)
+    result = _endpoint_root(x0, x1, fpre, fcur, tol)
+    if result is not None:
+        return result
+
+    # cur is the best x val so far, pre the one before it and blk the other end of the bracket
+    xpre, xcur = x0, x1
+    xblk, fblk, spre, scur = xpre, fpre, x1 - x0, x1 - x0
+    iteration = 0
+    evaluations = 2
+    while True:
+        if fpre * fcur < 0:
+            xblk, fblk = xpre, fpre
+            spre = scur = xcur - xpre
+        if abs(fblk) < abs(fcur):
+            xpre, xcur, xblk = xcur, xblk, xcur
+            fpre, fcur, fblk = fcur, fblk, fcur
+
+        # stop at a root, after NMAX iterations, or if the bracket can't get any smaller
+        delta = BRACKET_EPS * np.finfo(float).eps * (abs(xcur) + 1)
+        sbis = (xblk - xcur) / 2
+        if not abs(fcur) > tol or iteration >= NMAX or abs(sbis) < delta:
+            break
+
+        if abs(spre) > delta and abs(fcur) < abs(fpre):
+            if xpre == xblk:
+                # secant
+                stry = -fcur * (xcur - xpre) / (fcur - fpre)
+            else:
+                # inverse quadratic interpolation
+                dpre = (fpre - fcur) / (xpre - xcur)
+                dblk = (fblk - fcur) / (xblk - xcur)
+                stry = -fcur * (fblk * dblk - fpre * dpre) / (dblk * dpre * (fblk - fpre))
+
+            if 2 * abs(stry) < min(abs(spre), 3 * abs(sbis) - delta):
+                spre, scur = scur, stry
+            else:
+                spre = scur = sbis
+        else:
+            spre = scur = sbis
+
+        xpre, fpre = xcur, fcur
+        xcur += scur if abs(scur) > delta else (delta if sbis > 0 else -delta)
+        fcur = f(xcur)
+        evaluations += 1
+        iteration += 1
+
+    if math.isnan(fcur):
+        return Result(np.nan, iteration, evaluations, Status.DOMAIN_ERROR)
+    if abs(fcur) <= tol:
+        return Result(xcur, iteration, evaluations, Status.CONVERGED)
+    if abs(sbis) < delta:
+        return Result(xcur, iteration, evaluations, Status.STALLED)
+
+    return Result(xcur, iteration, evaluations, Status.MAX_ITER)
+
+
+def brent_grid(f, x0, x1, NMAX, c, s, tol=1.e-6, fx0=None, fx1=None):
+    """
+    solves for root of equation using brent's method for every pair of initial x values at once, the same steps as brent
+    with every branch calculated for all the pairs and chosen with np.where.
+    only pairs that bracket a root are iterated, the rest are the same as bisection_grid with bracketed=True
+    :param f: the function, called as f(s, x, c) or a functions.Expression. must accept a numpy array as its x value
+    :param x0: array of initial x vals (any shape)
+    :param x1: array of second initial x vals, same shape as x0
+    :param NMAX: max number of iterations
+    :param c: the constants
+    :param s: the subtype
+    :param tol: tolerance before algorithm concludes it has reached a root
+    :param fx0: y values of x0 if they are already known, broadcast to the shape of x0
+    :param fx1: y values of x1 if they are already known
+    :return: GridResult of arrays with the same shape as x0
+    """
+    x0, x1 = _float_arrays(x0, x1)
+    shape = x0.shape
+
+    x0 = x0.ravel().copy()
+    x1 = x1.ravel().copy()
+    roots = np.full(x0.size, np.nan, dtype=x0.dtype)
+    iterations = np.zeros(x0.size, dtype=int)
+    evaluations = np.full(x0.size, 2)
+    status = np.full(x0.size, Status.MAX_ITER, dtype=np.int8)
+
+    f = _bind(f, s, c)
+    fx0 = _initial_values(f, x0, fx0, shape)
+    fx1 = _initial_values(f, x1, fx1, shape)
+
+    active = _bracket(x0, x1, fx0, fx1, tol, roots, status)
+    xpre, xcur, fpre, fcur = x0[active], x1[active], fx0[active], fx1[active]
+    f = _take(f, active)
+    xblk, fblk = xpre.copy(), fpre.copy()
+    spre = scur = xcur - xpre
+
+    iteration = 0
+    while active.size:
+        change = fpre * fcur < 0
+        xblk, fblk = np.where(change, xpre, xblk), np.where(change, fpre, fblk)
+        spre, scur = np.where(change, xcur - xpre, spre), np.where(change, xcur - xpre, scur)
+
+        swap = np.abs(fblk) < np.abs(fcur)
+        xpre, xcur, xblk = np.where(swap, xcur, xpre), np.where(swap, xblk, xcur), np.where(swap, xcur, xblk)
+        fpre, fcur, fblk = np.where(swap, fcur, fpre), np.where(swap, fblk, fcur), np.where(swap, fcur, fblk)
+
+        delta = BRACKET_EPS * np.finfo(xcur.dtype).eps * (np.abs(xcur) + 1)
+        sbis = (xblk - xcur) / 2
+
+        # stop at a root, after NMAX iterations, or if the bracket can't get any smaller (NaN y values stop too)
+        roots[active] = xcur
+        iterations[active] = iteration
+        running = (np.abs(fcur) > tol) & (np.abs(sbis) >= delta) & (iteration < NMAX)
+        status[active[~running & (np.abs(sbis) < delta)]] = Status.STALLED
+        status[active[np.abs(fcur) <= tol]] = Status.CONVERGED
+        status[active[np.isnan(fcur)]] = Status.DOMAIN_ERROR
+        roots[active[np.isnan(fcur)]] = np.nan
+        active, xpre, xcur, xblk, fpre, fcur, fblk, spre, scur, delta, sbis = (a[running] for a in (
+            active, xpre, xcur, xblk, fpre, fcur, fblk, spre, scur, delta, sbis))
+        f = _take(f, running)
+        if not active.size:
+            break
+
+        # the secant or inverse quadratic step, used where it is accepted and a bisection step everywhere else
+        with np.errstate(all="ignore"):
+            dpre = (fpre - fcur) / (xpre - xcur)
+            dblk = (fblk - fcur) / (xblk - xcur)
+            stry = np.where(xpre == xblk, -fcur * (xcur - xpre) / (fcur - fpre),
+                            -fcur * (fblk * dblk - fpre * dpre) / (dblk * dpre * (fblk - fpre)))
+
+        interpolate = (np.abs(spre) > delta) & (np.abs(fcur) < np.abs(fpre))
+        accept = interpolate & (2 * np.abs(stry) < np.minimum(np.abs(spre), 3 * np.abs(sbis) - delta))
+        spre, scur = np.where(accept, scur, sbis), np.where(accept, stry, sbis)
+
+        xpre, fpre = xcur, fcur
+        xcur = xcur + np.where(np.abs(scur) > delta, scur, np.where(sbis > 0, delta, -delta))
+        fcur = f(xcur)
+        evaluations[active] += 1
+        iteration += 1
+
+    return GridResult(roots.reshape(shape), iterations.reshape(shape), evaluations.reshape(shape), status.reshape(shape))
+
+
+def _derivatives(f, s, c, order):
+    """
+    The function and its derivatives up to order, for the methods that need derivatives. they are generated from the
+    function spec by functions.Expression.derivative, so the function has to be an Expression
+    :param f: a functions.Expression
+    :param s: the subtype of the function, unused
+    :param c: the constants of the function, unused
+    :param order: 1 for newton, 2 for halley
+    :return: list of functions of x, [f, f', ...]
+    """
+    if not isinstance(f, functions.Expression):
+        raise ValueError("The derivative can only be generated for a function compiled with functions.compile_function")
+
+    derivatives = [f]
+    for _ in range(order):
+        derivatives.append(derivatives[-1].derivative())
+
+    return derivatives
+
+
+def _derivative_step(derivatives, x0, tol, NMAX):
+    """
+    The iteration of newton and halley for a single x val, they only differ in the step
+    :param derivatives: [f, f'] for newton or [f, f', f''] for halley
+    :param x0: the initial guess of the solution
+    :param tol: tolerance for the absolute error of two subsequent approximations
+    :param NMAX: the max num of iterations
+    :return: the Result, each of the function and its derivatives counts as an evaluation
+    """
+    derivatives = [_checked(d) for d in derivatives]
+    iteration = 0
+    evaluations = 0
+
+    # x0 can be a numpy float, overflow and dividing by zero are the statuses below instead of warnings like in the grid versions
+    with np.errstate(all="ignore"):
+        xk = x0
+        while iteration < NMAX:
+            fx, dfx = derivatives[0](xk), derivatives[1](xk)
+            if len(derivatives) == 2:
+                numerator, denominator = fx, dfx
+            else:
+                numerator, denominator = 2 * fx * dfx, 2 * dfx * dfx - fx * derivatives[2](xk)
+            evaluations += len(derivatives)
+
+            if math.isnan(numerator) or math.isnan(denominator):
+                return Result(np.nan, iteration, evaluations, Status.DOMAIN_ERROR)
+            if denominator == 0:
+                return Result(np.nan, iteration, evaluations, Status.ZERO_DIVISION)
+
+            err = xk
+            xk = xk - numerator / denominator
+            err = abs(err - xk)
+            iteration += 1
+
+            if math.isnan(err):
+                return Result(np.nan, iteration, evaluations, Status.DOMAIN_ERROR)
+            if err <= tol:
+                return Result(xk, iteration, evaluations, Status.CONVERGED)
+
+        return Result(xk, iteration, evaluations, Status.MAX_ITER)
+
+
+def newton(f, df, x0, tol=1.e-6, NMAX=100):
+    """
+    solves for a functions root by newton's method
+    loops until NMAX iterations reached or tolerance is achieved or the derivative is zero
+    iterative formula for newton: x_{k+1} = x_k - f(x_k)/f'(x_k)
+    :param: f = the function f(x) or a functions.Expression
+    :param: df = the derivative of f(x), or None to generate it from f (which has to be an Expression)
+    :param: x0 = the initial guess of the solution
+    :param: tol = tolerance for the absolute error of two subsequent approximations
+    :param: NMAX = the max num of iterations
+    :return: the Result, its root is the x value of the root reached
+    """
+    if df is None:
+        f, df = _derivatives(f, 0, 0, 1)
+
+    return _derivative_step([f, df], x0, tol, NMAX)
+
+
+def newton_grid(f, x0, x1, NMAX, c, s, tol=1.e-6, fx0=None, fx1=None):
+    """
+    solves for a functions root by newton's method for every pair of initial x values at once
+    newton only needs one initial x value, so each pair starts from its midpoint (x0 + x1) / 2, which makes the
+    result the same for either order of the pair. pairs that have converged or have a zero derivative are removed from the active set
+    :param f: a functions.Expression, its derivative is generated with Expression.derivative
+    :param x0: array of initial x vals (any shape, e.g. 2d from np.meshgrid)
+    :param x1: array of second initial x vals, same shape as x0
+    :param NMAX: the max num of iterations
+    :param c: the constants of the function, unused
+    :param s: the subtype of the function, unused
+    :param tol: tolerance for the absolute error of two subsequent approximations
+    :param fx0: unused, the y values of the midpoints aren't known in advance
+    :param fx1: unused
+    :return: GridResult of arrays with the same shape as x0, the same as newton from the midpoint of each pair
+    """
+    return _derivative_grid(_derivatives(f, s, c, 1), x0, x1, NMAX, tol)
+
+
+def halley(f, df, d2f, x0, tol=1.e-6, NMAX=100):
+    """
+    solves for a functions root by halley's method, which converges cubically instead of quadratically like newton
+    loops until NMAX iterations reached or tolerance is achieved or the denominator is zero
+    iterative formula for halley: x_{k+1} = x_k - {2 * f(x_k) * f'(x_k)}/{2 * f'(x_k)^2 - f(x_k) * f''(x_k)}
+    :param: f = the function f(x) or a functions.Expression
+    :param: df = the derivative of f(x), or None to generate both derivatives from f (which has to be an Expression)
+    :param: d2f = the second derivative of f(x)
+    :param: x0 = the initial guess of the solution
+    :param: tol = tolerance for the absolute error of two subsequent approximations
+    :param: NMAX = the max num of iterations
+    :return: the Result, its root is the x value of the root reached
+    """
+    if df is None:
+        f, df, d2f = _derivatives(f, 0, 0, 2)
+
+    return _derivative_step([f, df, d2f], x0, tol, NMAX)
+
+
+def halley_grid(f, x0, x1, NMAX, c, s, tol=1.e-6, fx0=None, fx1=None):
+    """
+    solves for a functions root by halley's method for every pair of initial x values at once, starting from the
+    midpoint of each pair like newton_grid
+    :param f: a functions.Expression, its first and second derivatives are generated with Expression.derivative
+    :param x0: array of initial x vals (any shape, e.g. 2d from np.meshgrid)
+    :param x1: array of second initial x vals, same shape as x0
+    :param NMAX: the max num of iterations
+    :param c: the constants of the function, unused
+    :param s: the subtype of the function, unused
+    :param tol: tolerance for the absolute error of two subsequent approximations
+    :param fx0: unused, the y values of the midpoints aren't known in advance
+    :param fx1: unused
+    :return: GridResult of arrays with the same shape as x0, the same as halley from the midpoint of each pair
+    """
+    return _derivative_grid(_derivatives(f, s, c, 2), x0, x1, NMAX, tol)
+
+
+def _derivative_grid(derivatives, x0, x1, NMAX, tol):
+    """
+    The iteration of newton_grid and halley_grid, the same as _derivative_step for every pair
+    :param derivatives: [f, f'] for newton or [f, f', f''] for halley, from _derivatives
+    :param x0: array of initial x vals
+    :param x1: array of second initial x vals, same shape as x0
+    :param NMAX: the max num of iterations
+    :param tol: tolerance for the absolute error of two subsequent approximations
+    :return: GridResult of arrays with the same shape as x0
+    """
+    x0, x1 = _float_arrays(x0, x1)
+    shape = x0.shape
+
+    # flat working copy of the midpoints, and the results that are written to as they drop out
+    xk = ((x0 + x1) / 2).ravel()
+    roots = xk.copy()
+    iterations = np.zeros(xk.size, dtype=int)
+    evaluations = np.zeros(xk.size, dtype=int)
+    status = np.full(xk.size, Status.MAX_ITER, dtype=np.int8)
+
+    # indexes of the x values that are still running
+    active = np.arange(xk.size)
+    iteration = 0
+    while active.size and iteration < NMAX:
+        fx, dfx = derivatives[0](xk), derivatives[1](xk)
+        if len(derivatives) == 2:
+            numerator, denominator = fx, dfx
+        else:
+            numerator, denominator = 2 * fx * dfx, 2 * dfx * dfx - fx * derivatives[2](xk)
+        evaluations[active] += len(derivatives)
+
+        # x values with a NaN y value or a zero denominator are finished, their root is NaN
+        domain_error = np.isnan(numerator) | np.isnan(denominator)
+        zero_division = ~domain_error & (denominator == 0)
+        stop = domain_error | zero_division
+        roots[active[stop]] = np.nan
+        iterations[active[stop]] = iteration
+        status[active[domain_error]] = Status.DOMAIN_ERROR
+        status[active[zero_division]] = Status.ZERO_DIVISION
+
+        keep = ~stop
+        active, xk, numerator, denominator = active[keep], xk[keep], numerator[keep], denominator[keep]
+        derivatives = [_take(d, keep) for d in derivatives]
+
+        # a step that overflows or is NaN stops below, the same as secant
+        with np.errstate(all="ignore"):
+            xk1 = xk - numerator / denominator
+        err = np.abs(xk1 - xk)
+        xk = xk1
+        iteration += 1
+
+        roots[active] = xk
+        iterations[active] = iteration
+
+        # keep going only where the error is still above tolerance
+        running = err > tol
+        status[active[err <= tol]] = Status.CONVERGED
+        status[active[np.isnan(err)]] = Status.DOMAIN_ERROR
+        roots[active[np.isnan(err)]] = np.nan
+        active, xk = active[running], xk[running]
+        derivatives = [_take(d, running) for d in derivatives]
+
+    return GridResult(roots.reshape(shape), iterations.reshape(shape), evaluations.reshape(shape), status.reshape(shape))
+
+
+def find_all_roots(spec, interval, tol=1.e-12, NMAX=100, samples=DEFAULT_SCAN_SAMPLES):
+    """
+    Finds every distinct real root of a function in an interval, instead of solving a whole grid of inputs.
+    for a polynomial every root is an eigenvalue of its companion matrix (functions.Polynomial.roots), the real ones
+    are polished with newton. anything else is evaluated at evenly spaced x values and every sign change is solved with brent
+    at once (poles like tan's, where the sign changes without a root, are dropped), so roots that only touch 0 without
+    crossing it, or two roots between the same samples, aren't found
+    :param spec: function spec, the key word args for functions.compile_function
+    :param interval: (min, max) x values, inclusive
+    :param tol: tolerance of newton and brent
+    :param NMAX: max iterations of newton and brent
+    :param samples: number of x values checked for a sign change
+    :return: sorted 1d array of the roots
+    """
+    f = functions.compile_function(**spec)
+    low, high = interval
+
+    if isinstance(f, functions.Polynomial):
+        eigenvalues = f.roots()
+        real = eigenvalues[np.abs(eigenvalues.imag) <= REAL_ROOT_IMAG * np.maximum(1, np.abs(eigenvalues))].real
+
+        # the eigenvalues are only accurate to about 1e-16 relative to the biggest root (a lot less for repeated roots),
+        # a few newton iterations get each one as close as the polynomial allows. use the eigenvalue if newton goes wrong
+        df = f.derivative()
+        roots = np.array([newton(f, df, x, tol, NMAX).root for x in real])
+        wrong = ~(np.abs(f(roots)) <= np.abs(f(real)))
+        roots[wrong] = real[wrong]
+    else:
+        x = np.linspace(low, high, samples)
+        with np.errstate(all="ignore"):
+            y = f(x)
+
+        # brackets with a sign change, or a y value of exactly 0 at either end
+        brackets = np.flatnonzero(y[:-1] * y[1:] <= 0)
+        with np.errstate(all="ignore"):
+            roots = brent_grid(f, x[brackets], x[brackets + 1], NMAX, None, None, tol, fx0=y[brackets], fx1=y[brackets + 1]).roots
+
+            # a root is closer to 0 than both ends of its bracket, a pole is further away
+            roots = roots[np.abs(f(roots)) <= np.minimum(np.abs(y[brackets]), np.abs(y[brackets + 1]))]
+
+    roots = np.sort(roots[(roots >= low) & (roots <= high)])
+
+    # repeated roots (and zeros shared by two brackets) only count once
+    distinct = np.ones(roots.size, dtype=bool)
+    distinct[1:] = np.diff(roots) > DISTINCT_ROOT * np.maximum(1, np.abs(roots[1:]))
+
+    return roots[distinct]
+
+
+def main():
+    def f(t, x, c):
+        y = x**20 - 1
+        return y
+
+    tol = 1.e-4
+    x1 = -5
+    x2 = 4
+    MAX_ITER = 100
+    rx, iterations, evaluations, status = secant(f, x1, x2, MAX_ITER, 0, 0, tol)
+    print('The aproximate solution is: ', rx, '(', status.name, 'after', iterations, 'iterations and', evaluations, 'evaluations )')
+    print('And the error is: ', f(0, rx, 0))
+
+    def matches(result, expected):
+        """ checks every field of a grid result against the scalar results of each pair """
+        return (np.allclose(result.roots, [[r.root for r in row] for row in expected], equal_nan=True)
+                and all(np.array_equal(result[i], [[r[i] for r in row] for row in expected]) for i in (1, 2, 3)))
+
+    # solve a grid of seeds at once and check it agrees with secant
+    seeds = np.linspace(x1, x2, 50)
+    grid_x0, grid_x1 = np.meshgrid(seeds, seeds, indexing="ij")
+    result = secant_grid(f, grid_x0, grid_x1, MAX_ITER, 0, 0, tol)
+    print('Grid matches secant: ', matches(result, [[secant(f, a, b, MAX_ITER, 0, 0, tol) for b in seeds] for a in seeds]))
+    print('Pairs by status: ', {Status(k).name: int(v) for k, v in zip(*np.unique(result.status, return_counts=True))})
+
+    result = bisection_grid(f, grid_x0, grid_x1, MAX_ITER, 0, 0, tol)
+    print('Bisection grid matches bisection: ', matches(result, [[bisection(f, a, b, MAX_ITER, 0, 0, tol) for b in seeds] for a in seeds]))
+
+    # only brackets with a sign change are iterated, which makes the result the same for either order of the x vals
+    bisection_result = bisection_grid(f, grid_x0, grid_x1, MAX_ITER, 0, 0, tol, bracketed=True)
+    print('Bracketed bisection grid is symmetric: ', np.array_equal(bisection_result.roots, bisection_result.roots.T, equal_nan=True))
+
+    # the bracketing methods that use interpolation find the same roots as bisection, usually in a lot fewer evaluations
+    # (x**20 is very flat near its root, so illinois keeps halving one end and is slower than bisection here)
+    bracketing = bisection_result.status != Status.NO_BRACKET
+    for scalar, grid in ((illinois, illinois_grid), (ridders, ridders_grid), (brent, brent_grid)):
+        result = grid(f, grid_x0, grid_x1, MAX_ITER, 0, 0, tol)
+        print(f'{scalar.__name__.capitalize()} grid matches {scalar.__name__}: ',
+              matches(result, [[scalar(f, a, b, MAX_ITER, 0, 0, tol) for b in seeds] for a in seeds]),
+              ' mean evaluations: ', result.evaluations[bracketing].mean(), ' (bisection: ', bisection_result.evaluations[bracketing].mean(), ')')
+
+    # the same function compiled from a spec can be passed straight to the solvers
+    g = functions.compile_function(polynomial=[20, 1, *[0] * 19, -1])
+    print('Compiled function matches: ', secant(g, x1, x2, MAX_ITER, 0, 0, tol).root == rx)
+
+    # newton and halley generate the derivatives from the spec, and start from the midpoint of each pair
+    for scalar, grid in ((newton, newton_grid), (halley, halley_grid)):
+        result = grid(g, grid_x0, grid_x1, MAX_ITER, 0, 0, tol)
+        expected = [[scalar(g, None, *([None] if scalar is halley else []), (a + b) / 2, tol, MAX_ITER) for b in seeds] for a in seeds]
+        converged = result.status == Status.CONVERGED
+        print(f'{scalar.__name__.capitalize()} grid matches {scalar.__name__}: ', matches(result, expected),
+              ' mean evaluations: ', result.evaluations[converged].mean(), ' converged pairs: ', np.count_nonzero(converged), 'of', converged.size)
+
+    # float32 x values are solved in float32, and reach the same roots when the tolerance is well above its precision
+    result = brent_grid(g, grid_x0.astype(np.float32), grid_x1.astype(np.float32), MAX_ITER, 0, 0, 1e-4)
+    expected = brent_grid(g, grid_x0, grid_x1, MAX_ITER, 0, 0, 1e-4)
+    print('Float32 grid matches float64: ', result.roots.dtype == np.float32,
+          np.allclose(result.roots, expected.roots, atol=1e-3, equal_nan=True))
+
+    # every root at once, without a grid
+    print('All roots of x**20 - 1: ', find_all_roots({"polynomial": [20, 1, *[0] * 19, -1]}, (x1, x2)))
+    print('All roots of tan(x) from -5 to 5: ', find_all_roots({"trigonometric": ["tan", 1, 1, 0, 0]}, (-5, 5)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import os
+import sys
+import json
+import time
+import timeit
+import platform
+import subprocess
+import argparse
+import numpy as np
+import functions
+import algorithms
+import sweep
+
+
+# constants
+DEFAULT_REPEATS = 5  # each case is timed this many times and the fastest is used, the others are mostly noise from other programs
+DEFAULT_THRESHOLD = 1.25  # a case is a regression if it is this many times slower than the baseline
+DEFAULT_SWEEP_SIZES = (100, 500, 1000)  # inputs on each side of the sweep grids
+ARRAY_SIZE = 10000  # x values passed to the array evaluators in each call
+SOLVER_SEEDS = 16  # initial x values of the solver cases, every pair of them is solved
+SOLVER_MAX_ITER = 100
+SOLVER_TOL = 1e-10
+SWEEP_MAX_ITER = 50
+SWEEP_TOL = 1e-5
+SWEEP_METHODS = ("secant", "bisection", "newton")
+IMPORT_MODULES = ("main", "functions", "algorithms", "sweep", "rootfinder")  # modules timed by bench_imports, each in a new python
+
+# the functions the solvers are timed on, each with the interval the initial x values come from. they are hard in different ways:
+# tan has poles, cosh - 2 grows fast, the degree 25 polynomial has 25 roots close together (like wilkinson's) and x^20 - 1 is very flat near its roots
+HARD_FUNCTIONS = {
+    "tan": ({"trigonometric": ["tan", 1, 1, 0, 0]}, (-5, 5)),
+    "cosh": ({"trigonometric": ["cosh", 1, 1, 0, -2]}, (-4, 4)),
+    "poly25": ({"polynomial": [25, *np.poly(np.arange(-12, 13) / 5).tolist()]}, (-2.5, 2.5)),
+    "x20": ({"polynomial": [20, 1, *[0] * 19, -1]}, (-5, 4)),
+}
+
+# the scalar evaluators (called as f(t, x, c)) and the array ones, with the arguments they are timed with
+EVALUATORS = {
+    "polynomial": (functions.polynomial, functions.polynomial_array, 5, [1, -2, 0, 3, 0, -1]),
+    "trigonometric": (functions.trigonometric, functions.trigonometric_array, "sin", [2, 1, 4, 0]),
+    "exponential": (functions.exponential, functions.exponential_array, 0, [1, 2, 0, -4]),
+    "logarithm": (functions.logarithm, functions.logarithm_array, 0, [1, 2, 10, -1]),
+}
+
+
+def best_time(function, repeats=DEFAULT_REPEATS):
+    """
+    The fastest of repeats calls of a function
+    :param function: function with no arguments
+    :param repeats: number of times it is called
+    :return: seconds
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def per_call(function, repeats=DEFAULT_REPEATS):
+    """
+    The time of one call of a function that is too quick to time on its own, it is called enough times in a loop to take about 0.2s
+    :param function: function with no arguments
+    :param repeats: number of times the loop is timed
+    :return: seconds per call
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+
+    return min(timer.repeat(repeats, number)) / number
+
+
+def bench_evaluators(repeats=DEFAULT_REPEATS):
+    """
+    The cost of one call of each evaluator in functions: the scalar ones, the array ones with ARRAY_SIZE x values,
+    and the compiled Expression of each with a float and with an array
+    :param repeats: times each one is timed
+    :return: dict of case name -> dict with "seconds" per call
+    """
+    x = np.linspace(0.5, 2, ARRAY_SIZE)
+    cases = {}
+    for name, (scalar, array, t, c) in EVALUATORS.items():
+        f = functions.compile_function(**{name: [t, *c]})
+        cases[f"evaluator/{name}"] = {"seconds": per_call(lambda: scalar(t, 1.5, list(c)), repeats)}
+        cases[f"evaluator/{name}_array"] = {"seconds": per_call(lambda: array(t, x, c), repeats), "size": ARRAY_SIZE}
+        cases[f"evaluator/{name}_compiled"] = {"seconds": per_call(lambda: f(1.5), repeats)}
+        cases[f"evaluator/{name}_compiled_array"] = {"seconds": per_call(lambda: f(x), repeats), "size": ARRAY_SIZE}
+
+    return cases
+
+
+def bench_solvers(repeats=DEFAULT_REPEATS):
+    """
+    Solves every pair of SOLVER_SEEDS initial x values of each hard function with the scalar secant, bisection and newton
+    (from the midpoint of the pair), the same as one cell of a sweep each
+    :param repeats: times each one is timed
+    :return: dict of case name -> dict with "seconds" per solve, "iterations" and "evaluations" (the mean of every pair)
+    and "converged" (number of pairs)
+    """
+    cases = {}
+    for name, (spec, (low, high)) in HARD_FUNCTIONS.items():
+        f = functions.compile_function(**spec)
+        df = f.derivative()
+        seeds = np.linspace(low, high, SOLVER_SEEDS)
+        pairs = [(a, b) for i, a in enumerate(seeds) for b in seeds[i + 1:]]
+
+        solvers = {
+            "secant": lambda a, b: algorithms.secant(f, a, b, SOLVER_MAX_ITER, None, None, SOLVER_TOL),
+            "bisection": lambda a, b: algorithms.bisection(f, a, b, SOLVER_MAX_ITER, None, None, SOLVER_TOL),
+            "newton": lambda a, b: algorithms.newton(f, df, (a + b) / 2, SOLVER_TOL, SOLVER_MAX_ITER),
+        }
+        for method, solve in solvers.items():
+            with np.errstate(all="ignore"):
+                results = [solve(a, b) for a, b in pairs]
+                seconds = best_time(lambda: [solve(a, b) for a, b in pairs], repeats)
+
+            cases[f"solver/{method}/{name}"] = {"seconds": seconds / len(pairs),
+                                                "iterations": float(np.mean([r.iterations for r in results])),
+                                                "evaluations": float(np.mean([r.evaluations for r in results])),
+                                                "converged": sum(r.status == algorithms.Status.CONVERGED for r in results)}
+
+    return cases
+
+
+def bench_sweeps(sizes=DEFAULT_SWEEP_SIZES, workers=1, repeats=DEFAULT_REPEATS):
+    """
+    End to end sweeps of tan with SWEEP_METHODS, the same as the Plot button without the cache.
+    each size is timed fewer times the bigger it is, the big ones take a few seconds
+    :param sizes: number of inputs on each side of the grid, each one is a size x size sweep
+    :param workers: worker processes of the sweeps, 1 is the most repeatable
+    :param repeats: times the smallest one is timed
+    :return: dict of case name -> dict with "seconds" per sweep, "pairs" and "evaluations" (total of every method)
+    """
+    spec, (low, high) = HARD_FUNCTIONS["tan"]
+    cases = {}
+    for size in sizes:
+        step = (high - low) / size
+
+        def run():
+            return sweep.sweep(spec, low, high - step / 2, step, SWEEP_TOL, SWEEP_MAX_ITER, methods=SWEEP_METHODS, workers=workers)
+
+        inputs, results = run()
+        summary = sweep.summarize(results)
+        seconds = best_time(run, max(1, repeats * min(sizes) // size))
+
+        cases[f"sweep/{size}"] = {"seconds": seconds, "pairs": inputs.size ** 2,
+                                  "evaluations": sum(stats["evaluations"] for stats in summary.values())}
+
+    return cases
+
+
+def import_time(module):
+    """
+    Imports a module in a new python with -X importtime, which lists the time taken by every module it imports
+    :param module: name of the module, imported from the folder of this file
+    :return: tuple of (seconds, number of modules imported, including itself)
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, check=True)
+
+    # each line is "import time: self | cumulative | name", with the name indented under the module that imported it.
+    # the modules imported by the module are the indented lines right before it
+    imported = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("| imported package"):
+            continue
+
+        _, cumulative, name = line.split("|")
+        if name.startswith("  "):
+            imported += 1
+        elif name.strip() == module:
+            return int(cumulative) / 1e6, imported + 1
+        else:
+            imported = 0
+
+    raise RuntimeError(f"{module} wasn't imported: {process.stderr}")
+
+
+def bench_imports(repeats=DEFAULT_REPEATS):
+    """
+    The time it takes to import each of IMPORT_MODULES in a new python, e.g. main should be quick since it doesn't import tkinter,
+    matplotlib or numpy until the gui is created
+    :param repeats: times each one is timed
+    :return: dict of case name -> dict with "seconds" and "modules" (number of modules imported)
+    """
+    cases = {}
+    for module in IMPORT_MODULES:
+        times = [import_time(module) for _ in range(repeats)]
+        cases[f"import/{module}"] = {"seconds": min(seconds for seconds, _ in times), "modules": times[0][1]}
+
+    return cases
+
+
+def run(suites=("evaluators", "solvers", "sweeps", "imports"), sizes=DEFAULT_SWEEP_SIZES, workers=1, repeats=DEFAULT_REPEATS):
+    """
+    Runs the benchmark suites
+    :param suites: names of the suites to run
+    :param sizes: sizes of the sweep grids
+    :param workers: worker processes of the sweeps
+    :param repeats: times each case is timed
+    :return: dict with "meta" (python, numpy and platform versions and the date) and "cases" (case name -> dict of measurements)
+    """
+    cases = {}
+    if "evaluators" in suites:
+        cases.update(bench_evaluators(repeats))
+    if "solvers" in suites:
+        cases.update(bench_solvers(repeats))
+    if "sweeps" in suites:
+        cases.update(bench_sweeps(sizes, workers, repeats))
+    if "imports" in suites:
+        cases.update(bench_imports(repeats))
+
+    meta = {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"), "workers": workers}
+
+    return {"meta": meta, "cases": cases}
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results with a baseline from an earlier run. a case is a regression if it is more than threshold times slower,
+    or if a solver needs more iterations on average or an import imports more modules (these are the same every run, so any change is
+    from the code)
+    :param baseline: results of run, e.g. loaded from a json file
+    :param results: results of run
+    :param threshold: max ratio of seconds to the baseline
+    :return: tuple of (list of lines describing each case, list of the names of the cases that regressed)
+    """
+    lines, regressions = [], []
+    for name, case in results["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            lines.append(f"{name}: {case['seconds']:.3g}s (new)")
+            continue
+
+        ratio = case["seconds"] / old["seconds"]
+        slower = ratio > threshold
+        more_iterations = "iterations" in old and case["iterations"] > old["iterations"] * (1 + 1e-9)
+        more_modules = "modules" in old and case["modules"] > old["modules"]
+
+        line = f"{name}: {case['seconds']:.3g}s vs {old['seconds']:.3g}s ({ratio:.2f}x)"
+        if "iterations" in old and case["iterations"] != old["iterations"]:
+            line += f", {case['iterations']:.2f} iterations vs {old['iterations']:.2f}"
+        if "modules" in old and case["modules"] != old["modules"]:
+            line += f", {case['modules']} modules vs {old['modules']}"
+        if slower or more_iterations or more_modules:
+            line += "  REGRESSION"
+            regressions.append(name)
+        lines.append(line)
+
+    for name in baseline["cases"]:
+        if name not in results["cases"]:
+            lines.append(f"{name}: missing")
+
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark", description="Times the evaluators, the solvers, full sweeps and imports")
+    parser.add_argument("--out", help="save the results to this .json file")
+    parser.add_argument("--baseline", help=".json file from an earlier run to compare with, exits with 1 if anything regressed")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="max ratio of the time of a case to its baseline")
+    parser.add_argument("--suites", nargs="+", default=["evaluators", "solvers", "sweeps", "imports"],
+                        choices=["evaluators", "solvers", "sweeps", "imports"],
+                        help="suites to run")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SWEEP_SIZES), help="inputs on each side of the sweep grids")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes of the sweeps")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="times each case is timed, the fastest is used")
+    args = parser.parse_args(argv)
+
+    results = run(tuple(args.suites), tuple(args.sizes), args.workers, args.repeats)
+
+    if args.out is not None:
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved results to {args.out}")
+
+    if args.baseline is None:
+        for name, case in results["cases"].items():
+            print(f"{name}: {case['seconds']:.3g}s" + (f", {case['iterations']:.2f} iterations" if "iterations" in case else "")
+                  + (f", {case['modules']} modules" if "modules" in case else ""))
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+
+    lines, regressions = compare(baseline, results, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} of {len(results['cases'])} cases regressed: {', '.join(regressions)}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+import os
+import math
+import contextlib
+import numpy as np
+import functions
+import storage
+import sweep
+from storage import FIELDS
+
+
+# constants
+DEFAULT_CHUNK_ROWS = 1024  # sets of constants solved at a time, each chunk has this many rows of pairs of initial x values
+CSV_FLOAT_FORMAT = "%.17g"  # enough digits to read back the same float
+
+
+def broadcast_seeds(constants, x0, x1):
+    """
+    The initial x values of every set of constants. a 1d x0 and x1 are the same pairs for every set of constants,
+    a 2d one has a row of pairs for each set (a single row or column is broadcast like numpy)
+    :param constants: 2d array, a set of constants in each row
+    :param x0: array of initial x values
+    :param x1: array of second initial x values
+    :return: tuple of (x0, x1) arrays with shape (number of sets of constants, pairs per set)
+    """
+    x0, x1 = np.broadcast_arrays(np.atleast_2d(np.asarray(x0, dtype=float)), np.atleast_2d(np.asarray(x1, dtype=float)))
+    shape = (len(constants), x0.shape[1])
+
+    return np.broadcast_to(x0, shape), np.broadcast_to(x1, shape)
+
+
+def solve_chunk(name, t, constants, x0, x1, NMAX, tol, methods):
+    """
+    Solves every pair of initial x values of a chunk of sets of constants at once, with a functions.Family that has the constants
+    of its set for every pair. runs inside a worker process like sweep.solve_tile
+    :param name: function type, one of functions.FAMILY_TYPES
+    :param t: the subtype, the degree of a polynomial or the trig function
+    :param constants: 2d array, a set of constants in each row
+    :param x0: 2d array of initial x values, a row for each set of constants
+    :param x1: second initial x values, same shape as x0
+    :param NMAX: max number of iterations
+    :param tol: tolerance
+    :param methods: names of the algorithms in sweep.GRID_ALGORITHMS to use
+    :return: dict of method name -> algorithms.GridResult of arrays with the same shape as x0
+    """
+    f = functions.Family(name, t, np.repeat(constants, x0.shape[1], axis=0))
+
+    with np.errstate(all="ignore"):
+        return {method: sweep.GRID_ALGORITHMS[method](f, x0, x1, NMAX, None, None, tol) for method in methods}
+
+
+def iter_chunks(name, t, constants, x0, x1, NMAX, tol, methods=("brent",), workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, cancel=None):
+    """
+    Generator that solves a family chunk by chunk, in parallel by a process pool with sweep.iter_pool like sweep.iter_tiles.
+    chunks are yielded in the order they finish, stops early if cancelled
+    :param name: function type, one of functions.FAMILY_TYPES
+    :param t: the subtype
+    :param constants: 2d array, a set of constants in each row
+    :param x0: 2d array of initial x values, from broadcast_seeds
+    :param x1: second initial x values, same shape as x0
+    :param NMAX: max number of iterations
+    :param tol: tolerance
+    :param methods: names of the algorithms in sweep.GRID_ALGORITHMS to use
+    :param workers: number of worker processes, defaults to the number of cpus. 1 solves every chunk in this process
+    :param chunk_rows: sets of constants in each chunk
+    :param cancel: function that returns True when the calculations should be cancelled, checked between chunks
+    :return: yields (start row, chunk) where chunk is the dict from solve_chunk
+    """
+    chunk_rows = max(1, int(chunk_rows))
+    starts = range(0, len(constants), chunk_rows)
+
+    def arguments(start):
+        # the arguments to solve_chunk for a chunk
+        stop = start + chunk_rows
+        return name, t, constants[start:stop], x0[start:stop], x1[start:stop], NMAX, tol, methods
+
+    return sweep.iter_pool(solve_chunk, ((start, arguments(start)) for start in starts), workers, cancel)
+
+
+def csv_header(width, methods):
+    """
+    The first line of the csv written by solve_family
+    :param width: number of constants in each set
+    :param methods: names of the algorithms
+    :return: str, without a new line
+    """
+    columns = ["row", "pair", *(f"c{i}" for i in range(width)), "x0", "x1"]
+    columns += [f"{method}_{field}" for method in methods for field in FIELDS]
+
+    return ",".join(columns)
+
+
+def write_csv_chunk(file, start, constants, x0, x1, chunk):
+    """
+    Writes a line for every pair of a chunk to a csv: the row of its set of constants, which pair of the row it is, the constants,
+    the initial x values and every field of each method
+    :param file: the open csv file
+    :param start: the row the chunk starts at
+    :param constants: 2d array, the sets of constants of the chunk
+    :param x0: 2d array of initial x values of the chunk
+    :param x1: second initial x values
+    :param chunk: dict of method name -> algorithms.GridResult, from solve_chunk
+    :return: None
+    """
+    rows, pairs = x0.shape
+    row, pair = np.indices((rows, pairs)).reshape(2, -1)
+
+    columns = [row + start, pair, *np.repeat(constants, pairs, axis=0).T, x0.ravel(), x1.ravel()]
+    formats = ["%d", "%d"] + [CSV_FLOAT_FORMAT] * (constants.shape[1] + 2)
+    for result in chunk.values():
+        columns += [value.ravel() for value in result]
+        formats += [CSV_FLOAT_FORMAT, "%d", "%d", "%d"]
+
+    np.savetxt(file, np.column_stack(columns), fmt=formats, delimiter=",")
+
+
+def solve_family(name, t, constants, x0, x1, NMAX, tol, methods=("brent",), workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, cancel=None,
+                 out_dir=None, csv_path=None, on_chunk=None):
+    """
+    Finds the roots of one type of function for many sets of constants, e.g. a*sin(b*x + c) + d for 50000 (a, b, c, d), instead of a
+    sweep for each of them. every set of constants is solved from each of its pairs of initial x values, chunk_rows sets at a time
+    with every pair of the chunk in one call of the grid solver. the results are written as each chunk finishes, so with out_dir
+    and csv_path they are streamed to disk and only a few chunks are in memory at once.
+    roots are the last x value of every pair like the other solvers, only the pairs with a status of CONVERGED found a root
+    :param name: function type, one of functions.FAMILY_TYPES
+    :param t: the subtype, the degree of a polynomial or the trig function (e.g. "sin"), unused for exponential and logarithm
+    :param constants: 2d array, a set of constants in each row (the same as the constants of functions.compile_function)
+    :param x0: initial x values, 1d for the same pairs for every set of constants or 2d with a row for each set, see broadcast_seeds
+    :param x1: second initial x values
+    :param NMAX: max number of iterations
+    :param tol: tolerance
+    :param methods: names of the algorithms in sweep.GRID_ALGORITHMS to use
+    :param workers: number of worker processes, defaults to the number of cpus. 1 solves every chunk in this process
+    :param chunk_rows: sets of constants solved at a time
+    :param cancel: function that returns True when the calculations should be cancelled, checked between chunks
+    :param out_dir: if given, the results are memory mapped .npy files "{method}_{field}.npy" in this folder like storage.allocate,
+    with the constants, x0 and x1 saved next to them
+    :param csv_path: if given, every pair is also written to this csv as its chunk finishes, see write_csv_chunk
+    :param on_chunk: function called as on_chunk(start row, chunk) after each chunk is written
+    :return: dict of method name -> dict of arrays for each of FIELDS with the shape of the broadcast x0, or None if cancelled
+    """
+    constants = np.asarray(constants, dtype=float)
+    x0, x1 = broadcast_seeds(constants, x0, x1)
+
+    # check the constants before starting any workers
+    functions.Family(name, t, constants[:1])
+
+    results = storage.allocate(methods, x0.shape, np.float64, out_dir)
+    if out_dir is not None:
+        for file_name, array in (("constants.npy", constants), ("x0.npy", x0), ("x1.npy", x1)):
+            np.save(os.path.join(out_dir, file_name), array)
+
+    remaining = math.ceil(len(constants) / max(1, int(chunk_rows)))
+    with open(csv_path, "w") if csv_path is not None else contextlib.nullcontext() as file:
+        if file is not None:
+            file.write(csv_header(constants.shape[1], methods) + "\n")
+
+        for start, chunk in iter_chunks(name, t, constants, x0, x1, NMAX, tol, methods, workers, chunk_rows, cancel):
+            for method, result in chunk.items():
+                for field, value in zip(FIELDS, result):
+                    results[method][field][start:start + value.shape[0]] = value
+
+            if file is not None:
+                stop = start + chunk_rows
+                write_csv_chunk(file, start, constants[start:stop], x0[start:stop], x1[start:stop], chunk)
+
+            if on_chunk is not None:
+                on_chunk(start, chunk)
+            remaining -= 1
+
+    if out_dir is not None:
+        for arrays in results.values():
+            for a in arrays.values():
+                a.flush()
+
+    # the generator stops early if it was cancelled
+    if remaining:
+        return None
+
+    return results
+
+
+def tests():
+    """
+    Checks that solving a family gives the same results as solving each set of constants on its own
+    :return: None
+    """
+    import shutil
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    constants = np.c_[rng.uniform(0.5, 2, (50, 2)), rng.uniform(-1, 1, (50, 1)), rng.uniform(-0.5, 0.5, (50, 1))]
+    seeds = np.linspace(-4, 4, 6)
+    x0, x1 = np.meshgrid(seeds, seeds + 0.5, indexing="ij")
+    x0, x1 = x0.ravel(), x1.ravel()
+    methods = ("secant", "brent", "newton")
+
+    print("(+) Testing families\n")
+
+    # every row solved with the function compiled from its constants
+    expected = {method: {field: [] for field in FIELDS} for method in methods}
+    for c in constants:
+        f = functions.compile_function(trigonometric=["sin", *c])
+        for method in methods:
+            with np.errstate(all="ignore"):
+                result = sweep.GRID_ALGORITHMS[method](f, x0, x1, 50, None, None, 1e-8)
+            for field, value in zip(FIELDS, result):
+                expected[method][field].append(value)
+
+    results = solve_family("trigonometric", "sin", constants, x0, x1, 50, 1e-8, methods, workers=1, chunk_rows=7)
+    if all(np.array_equal(results[method][field], expected[method][field], equal_nan=True) for method in methods for field in FIELDS):
+        print("(+) Passed family matches each set of constants")
+    else:
+        print("(-) Failed family matches each set of constants")
+
+    pooled = solve_family("trigonometric", "sin", constants, x0, x1, 50, 1e-8, methods, workers=2, chunk_rows=7)
+    if all(np.array_equal(pooled[method][field], results[method][field], equal_nan=True) for method in methods for field in FIELDS):
+        print("(+) Passed process pool")
+    else:
+        print("(-) Failed process pool")
+
+    # saved to a temporary folder, windows can't delete a file that is still memory mapped so it is deleted with ignore_errors
+    folder = tempfile.mkdtemp()
+    csv_path = os.path.join(folder, "family.csv")
+    saved = solve_family("trigonometric", "sin", constants, x0, x1, 50, 1e-8, methods, workers=1, chunk_rows=7, out_dir=folder,
+                         csv_path=csv_path)
+    rows = np.loadtxt(csv_path, delimiter=",", skiprows=1)
+    if (np.array_equal(np.load(os.path.join(folder, "brent_roots.npy")), results["brent"]["roots"], equal_nan=True)
+            and np.array_equal(saved["brent"]["status"], results["brent"]["status"])
+            and np.array_equal(rows[:, -4:], np.column_stack([results["newton"][field].ravel() for field in FIELDS]), equal_nan=True)):
+        print("(+) Passed saved family")
+    else:
+        print("(-) Failed saved family")
+    del saved
+    shutil.rmtree(folder, ignore_errors=True)
+
+    if solve_family("trigonometric", "sin", constants, x0, x1, 50, 1e-8, methods, workers=1, chunk_rows=7, cancel=lambda: True) is None:
+        print("(+) Passed cancelled family")
+    else:
+        print("(-) Failed cancelled family")
+
+
+if __name__ == "__main__":
+    tests()
@@ -0,0 +1,120 @@
+import numpy as np
+import functions
+import sweep
+
+
+# constants
+FRACTAL_TILE_ROWS = 64  # rows of the complex grid solved at a time, checked for cancelling between them
+BASIN_DTYPE = np.int16  # index of a root, a polynomial won't have more than 32767 of them
+
+
+def polynomial_of(spec):
+    """
+    The polynomial of a spec, the fractal is only defined for polynomials since they are the only functions with every root known
+    :param spec: function spec, e.g. {"polynomial": [3, 1, 0, 0, -1]}
+    :return: the functions.Polynomial
+    """
+    f = functions.compile_function(**spec)
+    if not isinstance(f, functions.Polynomial):
+        raise ValueError("The complex plane can only be plotted for a polynomial")
+
+    return f
+
+
+def complex_grid(real, imaginary):
+    """
+    The initial z values of the complex plane, each row has the same imaginary part
+    :param real: 1d array of real parts, the x axis
+    :param imaginary: 1d array of imaginary parts, the y axis
+    :return: 2d complex array, shape (imaginary.size, real.size)
+    """
+    return real[np.newaxis, :] + 1j * imaginary[:, np.newaxis]
+
+
+def newton_basins(f, df, z, roots, NMAX, tol):
+    """
+    Newton's method for every initial z at once with complex numbers, then which root each one converged to.
+    the same iteration as algorithms.newton_grid, z_{k+1} = z_k - f(z_k)/f'(z_k) where the polynomial and its
+    derivative are evaluated with horner's method on the whole array
+    :param f: the functions.Polynomial
+    :param df: its derivative
+    :param z: complex array of initial z values (any shape)
+    :param roots: every root of f, from Polynomial.roots
+    :param NMAX: the max num of iterations
+    :param tol: tolerance for the absolute error of two subsequent approximations
+    :return: tuple of arrays with the same shape as z: (basins, iterations). basins is the index of the nearest root
+    in roots, or -1 where it didn't converge (or the derivative was zero)
+    """
+    shape = z.shape
+
+    # flat working copy of the z values, and the results that are written to as they drop out
+    zk = np.array(z, dtype=complex).ravel()
+    final = zk.copy()
+    iterations = np.zeros(zk.size, dtype=int)
+    converged = np.zeros(zk.size, dtype=bool)
+
+    # indexes of the z values that are still running
+    active = np.arange(zk.size)
+    iteration = 0
+    while active.size and iteration < NMAX:
+        fz, dfz = f.evaluate_array(zk), df.evaluate_array(zk)
+
+        # z values with a zero derivative are finished without a root
+        keep = dfz != 0
+        iterations[active[~keep]] = iteration
+        active, zk, fz, dfz = active[keep], zk[keep], fz[keep], dfz[keep]
+
+        with np.errstate(all="ignore"):
+            zk1 = zk - fz / dfz
+        err = np.abs(zk1 - zk)
+        zk = zk1
+        iteration += 1
+
+        final[active] = zk
+        iterations[active] = iteration
+
+        # keep going only where the error is still above tolerance (NaN errors stop, the same as secant)
+        running = err > tol
+        converged[active[err <= tol]] = True
+        active, zk = active[running], zk[running]
+
+    # the nearest root of each z value that converged
+    basins = np.full(final.size, -1, dtype=BASIN_DTYPE)
+    if roots.size:
+        basins[converged] = np.argmin(np.abs(final[converged, np.newaxis] - roots[np.newaxis, :]), axis=1)
+
+    return basins.reshape(shape), iterations.reshape(shape)
+
+
+def solve_fractal(spec, l_bound, u_bound, step, tol, max_iter, tile_rows=FRACTAL_TILE_ROWS, cancel=None, on_tile=None):
+    """
+    Solves the complex plane from l_bound to u_bound on both the real and imaginary axis, with the same inputs as sweep.sweep
+    :param spec: function spec of a polynomial
+    :param l_bound: min real and imaginary part
+    :param u_bound: max real and imaginary part
+    :param step: step between each input
+    :param tol: tolerance
+    :param max_iter: max iterations
+    :param tile_rows: rows of the grid solved at a time
+    :param cancel: function that returns True when the calculations should be cancelled, checked between tiles
+    :param on_tile: function called as on_tile(start, basins, iterations) with the rows from start as each tile finishes
+    :return: tuple of (inputs, dict with "roots", "basins" and "iterations"), or None if cancelled
+    """
+    f = polynomial_of(spec)
+    df = f.derivative()
+    roots = f.roots()
+    inputs = sweep.get_inputs(l_bound, u_bound, step)
+
+    basins = np.empty((inputs.size, inputs.size), dtype=BASIN_DTYPE)
+    iterations = np.empty((inputs.size, inputs.size), dtype=int)
+    for start in range(0, inputs.size, tile_rows):
+        if cancel is not None and cancel():
+            return None
+
+        stop = min(start + tile_rows, inputs.size)
+        basins[start:stop], iterations[start:stop] = newton_basins(f, df, complex_grid(inputs, inputs[start:stop]), roots, max_iter, tol)
+
+        if on_tile is not None:
+            on_tile(start, basins[start:stop], iterations[start:stop])
+
+    return inputs, {"roots": roots, "basins": basins, "iterations": iterations}
@@ -1,5 +1,38 @@
+import copy
 import math
 import sys
+from collections import OrderedDict
+import numpy as np
+
+# max number of single x values kept by a CachedFunction
+DEFAULT_CACHE_SIZE = 4096
+
+# the steps of ComplexStep
+COMPLEX_STEP = 1e-20  # step of the complex step derivative, it has no cancellation error so it can be tiny
+SECOND_COMPLEX_STEP = 1e-4  # the second derivative does have cancellation error, this is about the best accuracy (~1e-8)
+
+# the function types of a Family, the ones with a fixed formula and constants
+FAMILY_TYPES = ("polynomial", "trigonometric", "exponential", "logarithm")
+
+# numpy equivalents of the trig functions in the math library, numpy uses 'arc' instead of 'a' for the inverse functions
+TRIG_UFUNCS = {"sin": np.sin, "cos": np.cos, "tan": np.tan, "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+               "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh, "asinh": np.arcsinh, "acosh": np.arccosh, "atanh": np.arctanh}
+
+# the first and second derivatives of each trig function g(u), as functions of (module, u) so the same formula works with math and numpy
+TRIG_DERIVATIVES = {
+    "sin": (lambda m, u: m.cos(u), lambda m, u: -m.sin(u)),
+    "cos": (lambda m, u: -m.sin(u), lambda m, u: -m.cos(u)),
+    "tan": (lambda m, u: 1 / m.cos(u) ** 2, lambda m, u: 2 * m.tan(u) / m.cos(u) ** 2),
+    "asin": (lambda m, u: 1 / m.sqrt(1 - u * u), lambda m, u: u / m.sqrt(1 - u * u) ** 3),
+    "acos": (lambda m, u: -1 / m.sqrt(1 - u * u), lambda m, u: -u / m.sqrt(1 - u * u) ** 3),
+    "atan": (lambda m, u: 1 / (1 + u * u), lambda m, u: -2 * u / (1 + u * u) ** 2),
+    "sinh": (lambda m, u: m.cosh(u), lambda m, u: m.sinh(u)),
+    "cosh": (lambda m, u: m.sinh(u), lambda m, u: m.cosh(u)),
+    "tanh": (lambda m, u: 1 - m.tanh(u) ** 2, lambda m, u: -2 * m.tanh(u) * (1 - m.tanh(u) ** 2)),
+    "asinh": (lambda m, u: 1 / m.sqrt(u * u + 1), lambda m, u: -u / m.sqrt(u * u + 1) ** 3),
+    "acosh": (lambda m, u: 1 / m.sqrt(u * u - 1), lambda m, u: -u / m.sqrt(u * u - 1) ** 3),
+    "atanh": (lambda m, u: 1 / (1 - u * u), lambda m, u: 2 * u / (1 - u * u) ** 2),
+}
 
 
 def polynomial(t, x, c):
@@ -98,6 +131,91 @@ def logarithm(t, x, c):
     return y
 
 
+def _padded(c, n):
+    """
+    Returns a copy of the constants c filled with 0's up to length n, without modifying c
+    :param c: constants
+    :param n: the length the constants need to be
+    :return: list of constants with at least n elements
+    """
+    return list(c) + [0] * (n - len(c))
+
+
+def polynomial_array(t, x, c):
+    """
+    Array version of polynomial, evaluated with Horner's method: (((c[0] * x + c[1]) * x + c[2]) * x ...
+    :param t: the degree
+    :param x: numpy array (or anything np.asarray accepts) of x values
+    :param c: constants before the x, same as polynomial
+    :return: numpy array of y values, same shape as x. overflow gives inf instead of an error
+    """
+    c = _padded(c, t + 1)
+    x = np.asarray(x, dtype=float)
+
+    with np.errstate(all="ignore"):
+        y = np.full_like(x, c[0])
+        for ci in c[1:t + 1]:
+            y = y * x + ci
+
+    return y
+
+
+def trigonometric_array(t, x, c):
+    """
+    Array version of trigonometric, y = c[0] * np.sin(c[1] * x + c[2]) + c[3]
+    :param t: the type of trig function, same names as trigonometric (e.g. "sin" or "atanh")
+    :param x: numpy array of x values
+    :param c: constants
+    :return: numpy array of y values. inputs outside of the domain give NaN and overflow gives inf
+    """
+    c = _padded(c, 4)
+    x = np.asarray(x, dtype=float)
+
+    with np.errstate(all="ignore"):
+        y = c[0] * TRIG_UFUNCS[t](c[1] * x + c[2]) + c[3]
+
+    return y
+
+
+def exponential_array(t, x, c):
+    """
+    Array version of exponential, y = c[0] * (c[1] ** (x + c[2])) + c[3]
+    :param t: reserved for any potential subtypes
+    :param x: numpy array of x values
+    :param c: constants
+    :return: numpy array of y values, all NaN if the exponential has an asymptote at y=0
+    """
+    c = _padded(c, 4)
+    x = np.asarray(x, dtype=float)
+
+    if c[3] == 0:
+        return np.full_like(x, np.nan)
+
+    with np.errstate(all="ignore"):
+        y = c[0] * np.power(float(c[1]), x + c[2]) + c[3]
+
+    return y
+
+
+def logarithm_array(t, x, c):
+    """
+    Array version of logarithm, y = c[0] * log(c[1] * x) / log(c[2]) + c[3] (base of log is c[2])
+    :param t: reserved for any potential subtypes
+    :param x: numpy array of x values
+    :param c: an array of constants
+    :return: numpy array of y values. x values outside of the domain give NaN
+    """
+    c = _padded(c, 4)
+    x = np.asarray(x, dtype=float)
+
+    with np.errstate(all="ignore"):
+        # a base of 1 (or <= 0) makes every value NaN, the same as Log
+        log_base = np.where(c[2] == 1, np.nan, np.log(float(c[2])))
+        y = c[0] * (np.log(c[1] * x) / log_base) + c[3]
+
+    return y
+
+
 def sum_of_functions(x, **kwargs):
     """
     function composed of multiple types of functions added together
@@ -117,11 +235,11 @@ def sum_of_functions(x, **kwargs):
     return f_sum
 
 
-# TODO: expand functionality to any number of nested compound functions
 def compound_function(x, **kwargs):
     """
     A compound function, takes in two functions and computes the compound of the second in the first
     e.g. sin(x) and 1/x will give sin(1/x), 1/x and sin(x) will give 1/sin(x)
+    for any number of nested functions use compile_function(compound_function={...}) instead
     :param x: the x value to evaluate at
     :param kwargs: the two functions and their information, e.g. trigonometric=["sin", 1, 1, 0, 0], polynomial=[2, 1, 0, 0] will produce sin(x^2)
     :return: the y value of the composite function
@@ -141,6 +259,591 @@ def compound_function(x, **kwargs):
     return compound
 
 
+class Expression:
+    """
+    A function built once from a spec by compile_function, so evaluating it is only the arithmetic.
+    Calling it with a float uses the math library, calling it with a numpy array evaluates every element at once.
+    Errors (outside of the domain, overflow) give NaN instead of being printed
+    """
+
+    def __call__(self, x):
+        if isinstance(x, np.ndarray):
+            with np.errstate(all="ignore"):
+                return self.evaluate_array(x)
+
+        try:
+            return self.evaluate(x)
+        except (ValueError, OverflowError, ZeroDivisionError):
+            return math.nan
+
+    def evaluate(self, x):
+        """
+        :param x: x value
+        :return: y value, may raise math errors
+        """
+        raise NotImplementedError
+
+    def evaluate_array(self, x):
+        """
+        :param x: numpy array of x values
+        :return: numpy array of y values
+        """
+        raise NotImplementedError
+
+    def format(self, x="x"):
+        """
+        The function as a string, in the same style as the plot titles, e.g. "3.0*sin(1.0x+2.0)+2.4"
+        :param x: what to write for x, used to nest functions
+        :return: string
+        """
+        raise NotImplementedError
+
+    def derivative(self):
+        """
+        The derivative of the function as another Expression, e.g. for newton's method. every node in this file has an analytic one,
+        anything else uses the complex step derivative
+        :return: the Expression
+        """
+        return ComplexStep(self)
+
+    def __str__(self):
+        return self.format()
+
+
+class Polynomial(Expression):
+    """
+    Same as polynomial, evaluated with Horner's method
+    """
+
+    def __init__(self, t, c):
+        self.t = t
+        self.c = tuple(float(ci) for ci in _padded(c, t + 1)[:t + 1])
+
+    def evaluate(self, x):
+        y = self.c[0]
+        for ci in self.c[1:]:
+            y = y * x + ci
+        return y
+
+    def evaluate_array(self, x):
+        # complex x values (e.g. fractal.newton_basins) stay complex, and float32 ones (a float32 sweep) stay float32
+        y = np.full(x.shape, self.c[0], dtype=np.result_type(x, np.float32))
+        for ci in self.c[1:]:
+            y = y * x + ci
+        return y
+
+    def format(self, x="x"):
+        # no need to write out constants that are 0
+        terms = [f"{ci}*{x}^{self.t - i}" for i, ci in enumerate(self.c[:-1]) if ci != 0]
+        return "+".join(terms + [f"{self.c[-1]}"])
+
+    def derivative(self):
+        if self.t == 0:
+            return Polynomial(0, [0])
+        return Polynomial(self.t - 1, [ci * (self.t - i) for i, ci in enumerate(self.c[:-1])])
+
+    def roots(self):
+        """
+        Every root of the polynomial including the complex ones, the eigenvalues of its companion matrix
+        :return: 1d complex array, empty if the polynomial is a constant
+        """
+        # leading constants that are 0 lower the degree
+        c = np.trim_zeros(np.array(self.c), "f")
+        if c.size < 2:
+            return np.empty(0, dtype=complex)
+
+        # companion matrix, the -c[i]/c[0] on the first row and ones below the diagonal
+        companion = np.diag(np.ones(c.size - 2), -1)
+        companion[0] = -c[1:] / c[0]
+
+        return np.linalg.eigvals(companion).astype(complex)
+
+
+class Trig(Expression):
+    """
+    Same as trigonometric, y = c[0] * sin(c[1] * x + c[2]) + c[3]
+    """
+
+    def __init__(self, t, c):
+        self.t = t
+        self.c = tuple(float(ci) for ci in _padded(c, 4)[:4])
+        self.scalar = getattr(math, t)
+        self.ufunc = TRIG_UFUNCS[t]
+
+    def evaluate(self, x):
+        c = self.c
+        return c[0] * self.scalar(c[1] * x + c[2]) + c[3]
+
+    def evaluate_array(self, x):
+        c = self.c
+        return c[0] * self.ufunc(c[1] * x + c[2]) + c[3]
+
+    def format(self, x="x"):
+        return f"{self.c[0]}*{self.t}({self.c[1]}{x}+{self.c[2]})+{self.c[3]}"
+
+    def derivative(self):
+        return TrigDerivative(self, 1)
+
+
+class Exp(Expression):
+    """
+    Same as exponential, y = c[0] * (c[1] ** (x + c[2])) + c[3]
+    """
+
+    def __init__(self, c):
+        self.c = tuple(float(ci) for ci in _padded(c, 4)[:4])
+
+        # an asymptote at y=0 would give roots that don't exist, so make every value NaN instead
+        if self.c[3] == 0:
+            self.c = self.c[:3] + (math.nan,)
+
+    def evaluate(self, x):
+        c = self.c
+        return c[0] * math.pow(c[1], x + c[2]) + c[3]
+
+    def evaluate_array(self, x):
+        c = self.c
+        return c[0] * np.power(c[1], x + c[2]) + c[3]
+
+    def format(self, x="x"):
+        return f"{self.c[0]}*{self.c[1]}^({x}+{self.c[2]})+{self.c[3]}"
+
+    def derivative(self):
+        return ExpDerivative(self, 1)
+
+
+class Log(Expression):
+    """
+    Same as logarithm, y = c[0] * log(c[1] * x, c[2]) + c[3]
+    """
+
+    def __init__(self, c):
+        self.c = tuple(float(ci) for ci in _padded(c, 4)[:4])
+
+        # the log of the base only needs to be calculated once. a base of 1 or <= 0 makes every value NaN
+        try:
+            self.log_base = math.log(self.c[2])
+        except ValueError:
+            self.log_base = math.nan
+        if self.log_base == 0:
+            self.log_base = math.nan
+
+    def evaluate(self, x):
+        c = self.c
+        return c[0] * (math.log(c[1] * x) / self.log_base) + c[3]
+
+    def evaluate_array(self, x):
+        c = self.c
+        return c[0] * (np.log(c[1] * x) / self.log_base) + c[3]
+
+    def format(self, x="x"):
+        return f"{self.c[0]}*log{self.c[2]}({self.c[1]}{x})+{self.c[3]}"
+
+    def derivative(self):
+        return LogDerivative(self, 1)
+
+
+class Sum(Expression):
+    """
+    Same as sum_of_functions, the y values of each term added together
+    """
+
+    def __init__(self, terms):
+        self.terms = tuple(terms)
+
+    def evaluate(self, x):
+        y = 0.0
+        for term in self.terms:
+            y += term.evaluate(x)
+        return y
+
+    def evaluate_array(self, x):
+        y = np.zeros(x.shape, dtype=np.result_type(x, np.float32))
+        for term in self.terms:
+            y += term.evaluate_array(x)
+        return y
+
+    def format(self, x="x"):
+        return "+".join(f"({term.format(x)})" for term in self.terms)
+
+    def derivative(self):
+        return Sum([term.derivative() for term in self.terms])
+
+
+class Compose(Expression):
+    """
+    Same as compound_function, outer(inner(x)). either can be another Compose so any depth of nesting works
+    """
+
+    def __init__(self, outer, inner):
+        self.outer = outer
+        self.inner = inner
+
+    def evaluate(self, x):
+        return self.outer.evaluate(self.inner.evaluate(x))
+
+    def evaluate_array(self, x):
+        return self.outer.evaluate_array(self.inner.evaluate_array(x))
+
+    def format(self, x="x"):
+        return self.outer.format(f"({self.inner.format(x)})")
+
+    def derivative(self):
+        # chain rule
+        return Product([Compose(self.outer.derivative(), self.inner), self.inner.derivative()])
+
+
+class Product(Expression):
+    """
+    The y values of each factor multiplied together, used for the chain rule in derivatives
+    """
+
+    def __init__(self, factors):
+        self.factors = tuple(factors)
+
+    def evaluate(self, x):
+        y = 1.0
+        for factor in self.factors:
+            y *= factor.evaluate(x)
+        return y
+
+    def evaluate_array(self, x):
+        y = np.ones(x.shape, dtype=np.result_type(x, np.float32))
+        for factor in self.factors:
+            y *= factor.evaluate_array(x)
+        return y
+
+    def format(self, x="x"):
+        return "*".join(f"({factor.format(x)})" for factor in self.factors)
+
+    def derivative(self):
+        # product rule, each factor differentiated in turn
+        return Sum([Product([factor.derivative() if i == j else other for j, other in enumerate(self.factors)])
+                    for i, factor in enumerate(self.factors)])
+
+
+class TrigDerivative(Expression):
+    """
+    The first or second derivative of a Trig, y = c[0] * c[1]^order * g^(order)(c[1] * x + c[2])
+    """
+
+    def __init__(self, f, order):
+        self.f = f
+        self.order = order
+        self.g = TRIG_DERIVATIVES[f.t][order - 1]
+        self.scale = f.c[0] * f.c[1] ** order
+
+    def evaluate(self, x):
+        c = self.f.c
+        return self.scale * self.g(math, c[1] * x + c[2])
+
+    def evaluate_array(self, x):
+        c = self.f.c
+        return self.scale * self.g(np, c[1] * x + c[2])
+
+    def format(self, x="x"):
+        return f"({self.f.format(x)})" + "'" * self.order
+
+    def derivative(self):
+        if self.order == 1:
+            return TrigDerivative(self.f, 2)
+        return ComplexStep(self)
+
+
+class ExpDerivative(Expression):
+    """
+    A derivative of an Exp, y = c[0] * ln(c[1])^order * (c[1] ** (x + c[2]))
+    """
+
+    def __init__(self, f, order):
+        self.f = f
+        self.order = order
+
+        # a base <= 0 makes every value NaN, the same as the Exp
+        try:
+            self.scale = f.c[0] * math.log(f.c[1]) ** order
+        except ValueError:
+            self.scale = math.nan
+
+        # an Exp with an asymptote at y=0 is NaN everywhere, so its derivatives are too
+        if math.isnan(f.c[3]):
+            self.scale = math.nan
+
+    def evaluate(self, x):
+        c = self.f.c
+        return self.scale * math.pow(c[1], x + c[2])
+
+    def evaluate_array(self, x):
+        c = self.f.c
+        return self.scale * np.power(c[1], x + c[2])
+
+    def format(self, x="x"):
+        return f"({self.f.format(x)})" + "'" * self.order
+
+    def derivative(self):
+        return ExpDerivative(self.f, self.order + 1)
+
+
+class LogDerivative(Expression):
+    """
+    A derivative of a Log, y = c[0] * (-1)^(order-1) * (order-1)! / (ln(c[2]) * x^order), only where c[1] * x > 0 like the Log
+    """
+
+    def __init__(self, f, order):
+        self.f = f
+        self.order = order
+        # the log_base of an invalid base (1 or <= 0) is NaN, so every value is NaN like the Log
+        self.scale = f.c[0] * (-1) ** (order - 1) * math.factorial(order - 1) / f.log_base
+
+    def evaluate(self, x):
+        if not self.f.c[1] * x > 0:
+            raise ValueError("math domain error")
+        return self.scale / x ** self.order
+
+    def evaluate_array(self, x):
+        return np.where(self.f.c[1] * x.real > 0, self.scale / x ** self.order, np.nan)
+
+    def format(self, x="x"):
+        return f"({self.f.format(x)})" + "'" * self.order
+
+    def derivative(self):
+        return LogDerivative(self.f, self.order + 1)
+
+
+class ComplexStep(Expression):
+    """
+    The numerical derivative of any Expression that can be evaluated with complex numbers (numpy arrays of them).
+    the first derivative is Im(f(x + ih)) / h, which is exact to the precision of a float since nothing is subtracted,
+    and the second is 2 * (f(x) - Re(f(x + ih))) / h^2, which is only accurate to about 1e-8
+    """
+
+    def __init__(self, f, order=1):
+        self.f = f
+        self.order = order
+
+    def evaluate(self, x):
+        return float(self.evaluate_array(np.array([x], dtype=float))[0])
+
+    def evaluate_array(self, x):
+        # the complex functions are defined outside the domain of the real ones (e.g. acosh(0.5)), so those are NaN again
+        y = self.f.evaluate_array(x)
+        if self.order == 1:
+            dy = np.imag(self.f.evaluate_array(x + 1j * COMPLEX_STEP)) / COMPLEX_STEP
+        else:
+            h = SECOND_COMPLEX_STEP * (1 + np.abs(x))
+            dy = 2 * (y - np.real(self.f.evaluate_array(x + 1j * h))) / h ** 2
+
+        return np.where(np.isnan(y), np.nan, dy)
+
+    def format(self, x="x"):
+        return f"({self.f.format(x)})" + "'" * self.order
+
+    def derivative(self):
+        if self.order == 1:
+            return ComplexStep(self.f, 2)
+        raise NotImplementedError("Only the first and second complex step derivatives can be calculated")
+
+
+class Family(Expression):
+    """
+    One type of function with its own constants for every x value, e.g. a*sin(b*x + c) + d for 50000 sets of (a, b, c, d), so the roots
+    of all of them are found with one call of a grid solver. constants is an (n, k) array where each row is the constants of polynomial,
+    trigonometric, exponential or logarithm, and it is called with arrays of n x values, one for each row. the grid solvers use take to
+    keep the rows of the pairs that are still running. rows that are exponentials with an asymptote at y=0 are NaN like an Exp
+    """
+
+    def __init__(self, name, t, constants, order=0):
+        width = int(t) + 1 if name == "polynomial" else 4
+        constants = np.asarray(constants, dtype=float)
+        if name not in FAMILY_TYPES or constants.ndim != 2 or constants.shape[1] > width:
+            raise ValueError(f"A family needs one of {', '.join(FAMILY_TYPES)} and a 2d array of constants with at most {width} columns")
+
+        self.name = name
+        self.t = t
+        self.order = order
+        self.constants = np.pad(constants, ((0, 0), (0, width - constants.shape[1])))
+
+        # the columns used to evaluate it, worked out once: the coefficients of a polynomial, anything else is (scale, c[1], c[2], offset)
+        c = self.constants.T
+        zeros = np.zeros(len(self.constants))
+        with np.errstate(all="ignore"):
+            if name == "polynomial":
+                # the derivative of c * x^p is c * p * x^(p-1), order times
+                powers = int(t) - np.arange(width)
+                factor = np.ones(width)
+                for k in range(order):
+                    factor *= powers - k
+                self.c = tuple(c[:max(1, width - order)] * factor[:max(1, width - order), np.newaxis])
+            elif name == "trigonometric":
+                self.g = TRIG_DERIVATIVES[t][order - 1] if order else lambda m, u: TRIG_UFUNCS[t](u)
+                self.c = (c[0] * c[1] ** order, c[1], c[2], c[3] if order == 0 else zeros)
+            elif name == "exponential":
+                scale = np.where(c[3] == 0, np.nan, c[0] * np.log(c[1]) ** order)
+                self.c = (scale, c[1], c[2], c[3] if order == 0 else zeros)
+            else:
+                # the log of the base is NaN for a base of 1 or <= 0, the same as a Log
+                log_base = np.where(c[2] == 1, np.nan, np.log(c[2]))
+                if order == 0:
+                    # c[2] is replaced by the log of the base
+                    self.c = (c[0], c[1], log_base, c[3])
+                else:
+                    self.c = (c[0] * (-1) ** (order - 1) * math.factorial(order - 1) / log_base, c[1], c[2], zeros)
+
+    def evaluate(self, x):
+        raise TypeError("A family is evaluated with an array of x values, one for each row of constants")
+
+    def evaluate_array(self, x):
+        if self.name == "polynomial":
+            y = self.c[0].astype(np.result_type(x, float))
+            for ci in self.c[1:]:
+                y = y * x + ci
+            return y
+
+        scale, c1, c2, offset = self.c
+        if self.name == "trigonometric":
+            return scale * self.g(np, c1 * x + c2) + offset
+        if self.name == "exponential":
+            return scale * np.power(c1, x + c2) + offset
+        if self.order == 0:
+            return scale * (np.log(c1 * x) / c2) + offset
+
+        return np.where(c1 * x.real > 0, scale / x ** self.order, np.nan)
+
+    def format(self, x="x"):
+        return f"{self.name} {self.t} family of {len(self.constants)}" + "'" * self.order
+
+    def derivative(self):
+        if self.name == "trigonometric" and self.order == len(TRIG_DERIVATIVES[self.t]):
+            raise NotImplementedError("Only the first and second derivatives of a trigonometric family can be calculated")
+        return Family(self.name, self.t, self.constants, self.order + 1)
+
+    def take(self, index):
+        """
+        The family of only some of the rows, e.g. for the pairs that are still running in a grid solver
+        :param index: index array or boolean mask of the rows
+        :return: the Family
+        """
+        family = copy.copy(self)
+        family.constants = self.constants[index]
+        family.c = tuple(ci[index] for ci in self.c)
+        return family
+
+
+class CachedFunction(Expression):
+    """
+    Wraps an Expression with a cache of its y values for one sweep. single x values are kept in a bounded LRU cache, and
+    precompute stores the y values of an array of seeds (the initial x values) so each one is only evaluated once.
+    hits counts the y values that came from the cache and misses counts the ones that had to be evaluated, including the
+    evaluations of its derivatives
+    """
+
+    def __init__(self, f, maxsize=DEFAULT_CACHE_SIZE, root=None):
+        self.f = f
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.seeds = np.empty(0)
+        self.seed_values = np.empty(0)
+        self.hits = 0
+        self.misses = 0
+
+        # the function whose hits and misses are counted, a derivative counts towards the function it came from
+        self.root = self if root is None else root
+
+    def __call__(self, x):
+        # arrays are never the same twice during a sweep, so they are only counted
+        if isinstance(x, np.ndarray):
+            self.root.misses += x.size
+            return self.f(x)
+
+        if x in self.cache:
+            self.root.hits += 1
+            self.cache.move_to_end(x)
+            return self.cache[x]
+
+        self.root.misses += 1
+        y = self.cache[x] = self.f(x)
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+
+        return y
+
+    def evaluate(self, x):
+        return self.f.evaluate(x)
+
+    def evaluate_array(self, x):
+        return self.f.evaluate_array(x)
+
+    def format(self, x="x"):
+        return self.f.format(x)
+
+    def derivative(self):
+        return CachedFunction(self.f.derivative(), self.maxsize, self.root)
+
+    def precompute(self, seeds):
+        """
+        Evaluates every seed once and stores the y values in an array
+        :param seeds: array of x values
+        :return: array of y values
+        """
+        # float32 seeds (a float32 sweep) are evaluated in float32
+        self.seeds = np.asarray(seeds)
+        self.seeds = self.seeds.astype(np.result_type(self.seeds, np.float32), copy=False)
+        self.seed_values = self(self.seeds)
+        return self.seed_values
+
+
+def _spec_items(spec):
+    """
+    The (name, value) pairs of a spec, which can be a dict (like kwargs) or a list of pairs if a name is repeated
+    :param spec: dict or list of (name, value) pairs
+    :return: list of (name, value) pairs
+    """
+    return list(spec.items()) if isinstance(spec, dict) else [tuple(item) for item in spec]
+
+
+def _compile_term(name, value):
+    """
+    Builds the Expression for a single named part of a spec
+    :param name: function name, e.g. "trigonometric", or "sum_of_functions"/"compound_function"
+    :param value: the subtype then the constants, e.g. ["sin", 1, 1, 0, 0], or for sums and compounds another spec
+    :return: the Expression
+    """
+    if name == "polynomial":
+        return Polynomial(int(value[0]), value[1:])
+    elif name == "trigonometric":
+        return Trig(value[0], value[1:])
+    elif name == "exponential":
+        return Exp(value[1:])
+    elif name == "logarithm":
+        return Log(value[1:])
+    elif name == "sum_of_functions":
+        return Sum([_compile_term(n, v) for n, v in _spec_items(value)])
+    elif name == "compound_function":
+        # the first function is the outermost, each function after it is nested inside of the previous one
+        parts = [_compile_term(n, v) for n, v in _spec_items(value)]
+        expression = parts[-1]
+        for outer in reversed(parts[:-1]):
+            expression = Compose(outer, expression)
+        return expression
+
+    raise ValueError(f"Unknown function type: {name}")
+
+
+def compile_function(**kwargs):
+    """
+    Builds a function once from the same key word args as sum_of_functions, which can then be called with a float or a numpy array
+    e.g. compile_function(trigonometric=["sin", 2, 1, 4, 0]) is 2sin(x+4), compile_function(trigonometric=[...], polynomial=[...]) is their sum,
+    and compile_function(compound_function={"trigonometric": ["sin", 1, 1, 0, 0], "compound_function": {...}}) nests any number of functions
+    :param kwargs: key word args for the type of function and its subtype then constants
+    :return: the Expression
+    """
+    terms = [_compile_term(name, value) for name, value in kwargs.items()]
+    if len(terms) == 1:
+        return terms[0]
+
+    return Sum(terms)
+
+
 def tests():
     """
     Preforms basic checks to ensure the functions are returning correct values
@@ -167,6 +870,118 @@ def tests():
             else:
                 print(f"(+) Passed input {i}")
 
+    print("\n(+) Testing array functions")
+
+    for t_type in types:
+        print(f"\n(+) {t_type}_array:")
+
+        for n, i in enumerate(inputs[t_type]):
+            o = globals()[f"{t_type}_array"](i[0], np.array([i[1]]), i[2])[0]
+            if o != expected[t_type][n]:
+                print(f"(-) Failed with input {i}, expected {expected[t_type][n]} got {o}")
+            else:
+                print(f"(+) Passed input {i}")
+
+    # compare against the scalar versions over a range of x values (logarithm only over its domain)
+    xs = np.linspace(0.1, 3, 30)
+    checks = {"polynomial": (3, [1, -2, 0.5, 4]), "trigonometric": ("sin", [2, 1.5, 0.3, -1]),
+              "exponential": (0, [1, 2, 0.5, -3]), "logarithm": (0, [2, 1, 10, 1])}
+    print()
+    for t_type, (t, c) in checks.items():
+        scalar = np.array([globals()[t_type](t, x, list(c)) for x in xs])
+        array = globals()[f"{t_type}_array"](t, xs, c)
+        if np.allclose(scalar, array, rtol=1e-14, atol=0):
+            print(f"(+) {t_type}_array matches {t_type}")
+        else:
+            print(f"(-) {t_type}_array does not match {t_type}")
+
+    print("\n(+) Testing compiled functions")
+
+    # sin(x^2 + 1) + 2^(x+1) + 1, evaluated from floats and from an array
+    f = compile_function(compound_function={"trigonometric": ["sin", 1, 1, 0, 0], "polynomial": [2, 1, 0, 1]}, exponential=[0, 1, 2, 1, 1])
+    expected = np.sin(xs ** 2 + 1) + 2 ** (xs + 1) + 1
+    scalar = np.array([f(float(x)) for x in xs])
+    if np.allclose(scalar, expected, rtol=1e-14, atol=0) and np.allclose(f(xs), expected, rtol=1e-14, atol=0):
+        print("(+) Passed sum of compound function")
+    else:
+        print("(-) Failed sum of compound function")
+
+    # log(cos(x^2)) nested three deep, with NaN where cos(x^2) <= 0
+    f = compile_function(compound_function=[("logarithm", [0, 1, 1, 10, 0]), ("trigonometric", ["cos", 1, 1, 0, 0]), ("polynomial", [2, 1, 0, 0])])
+    with np.errstate(invalid="ignore"):
+        expected = np.log10(np.cos(xs ** 2))
+    scalar = np.array([f(float(x)) for x in xs])
+    if np.allclose(scalar, expected, rtol=1e-14, atol=0, equal_nan=True) and np.allclose(f(xs), expected, rtol=1e-14, atol=0, equal_nan=True):
+        print("(+) Passed nested compound function")
+    else:
+        print("(-) Failed nested compound function")
+
+    # a log with a base of 1 is NaN from floats and from an array, and so is its derivative and logarithm_array
+    f = compile_function(logarithm=[0, 1, 1, 1, 0])
+    if (np.isnan(f(2.0)) and np.isnan(f(xs)).all() and np.isnan(f.derivative()(2.0)) and np.isnan(f.derivative()(xs)).all()
+            and np.isnan(logarithm_array(0, xs, [1, 1, 1, 0])).all()):
+        print("(+) Passed logarithm with a base of 1")
+    else:
+        print("(-) Failed logarithm with a base of 1")
+
+    # the second call with the same x comes from the cache
+    f = CachedFunction(compile_function(trigonometric=["sin", 1, 1, 0, 0]), maxsize=1)
+    f(1.0), f(1.0), f(2.0), f(1.0)
+    if (f.hits, f.misses) == (1, 3) and len(f.cache) == 1:
+        print("(+) Passed cached function")
+    else:
+        print(f"(-) Failed cached function, {f.hits} hits and {f.misses} misses")
+
+    f = compile_function(polynomial=[4, 1, -2, 0, 1, -4])
+    if np.allclose(np.sort_complex(f.roots()), np.sort_complex(np.roots([1, -2, 0, 1, -4]))) and np.allclose(f(f.roots()), 0):
+        print("(+) Passed polynomial roots")
+    else:
+        print(f"(-) Failed polynomial roots, got {f.roots()}")
+
+    print("\n(+) Testing derivatives")
+
+    # the analytic first and second derivatives against the complex step ones, for every function type and nesting
+    specs = {"polynomial": {"polynomial": [3, 1, -2, 0.5, 4]}, "exponential": {"exponential": [0, 1, 2, 0.5, -3]},
+             "logarithm": {"logarithm": [0, 2, 1, 10, 1]}, "sum": {"polynomial": [2, 1, 0, -1], "trigonometric": ["cos", 2, 3, 1, 0]},
+             "compound": {"compound_function": [("trigonometric", ["sin", 1, 1, 0, 0]), ("polynomial", [2, 1, 0, 1])]}}
+    specs.update({f"trigonometric {t}": {"trigonometric": [t, 2, 0.3, 0.1, -1]} for t in TRIG_DERIVATIVES})
+    for name, spec in specs.items():
+        # inside the domain of every function, acosh is only defined for 0.3x+0.1 > 1
+        xs = np.linspace(4, 6, 30) if name.endswith("acosh") else np.linspace(0.1, 1.5, 30)
+        f = compile_function(**spec)
+        first, second = f.derivative(), f.derivative().derivative()
+        with np.errstate(all="ignore"):
+            ok = (np.allclose(first(xs), ComplexStep(f)(xs), rtol=1e-12, equal_nan=True) and
+                  np.allclose(second(xs), ComplexStep(f, 2)(xs), rtol=1e-5, atol=1e-5, equal_nan=True) and
+                  np.allclose([first(float(x)) for x in xs], first(xs), rtol=1e-12, equal_nan=True))
+        if ok:
+            print(f"(+) Passed {name} derivative")
+        else:
+            print(f"(-) Failed {name} derivative")
+
+    print("\n(+) Testing families")
+
+    # every row of a family is the same as the function compiled from its constants, and so are the derivatives
+    rng = np.random.default_rng(0)
+    families = {"polynomial": (3, rng.uniform(-2, 2, (20, 4))), "trigonometric": ("sin", rng.uniform(0.5, 2, (20, 4))),
+                "exponential": (0, np.c_[rng.uniform(0.5, 2, (20, 1)), rng.uniform(1.5, 3, (20, 2)), -rng.uniform(1, 3, (20, 1))]),
+                "logarithm": (0, np.c_[rng.uniform(0.5, 2, (20, 2)), rng.uniform(2, 10, (20, 2))])}
+    xs = rng.uniform(0.1, 3, 20)
+    for name, (t, constants) in families.items():
+        f = Family(name, t, constants)
+        expected = [compile_function(**{name: [t, *c]}) for c in constants]
+        ok = True
+        for family, rows in ((f, expected), (f.derivative(), [g.derivative() for g in expected]),
+                             (f.derivative().derivative(), [g.derivative().derivative() for g in expected])):
+            ok = ok and np.allclose(family(xs), [g(float(x)) for g, x in zip(rows, xs)], rtol=1e-12)
+
+        # the rows of the pairs that are still running in a solver
+        ok = ok and np.array_equal(Family(name, t, constants).take(xs > 1)(xs[xs > 1]), Family(name, t, constants[xs > 1])(xs[xs > 1]))
+        if ok:
+            print(f"(+) Passed {name} family")
+        else:
+            print(f"(-) Failed {name} family")
+
 
 if __name__ == "__main__":
     tests()
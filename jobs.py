@@ -0,0 +1,201 @@
+import heapq
+import itertools
+import threading
+import traceback
+
+
+# constants
+DEFAULT_MAX_RUNNING = 2  # jobs running at the same time, e.g. a plot and a zoom
+SHUTDOWN_TIMEOUT = 5  # seconds to wait for running jobs to stop when shutting down
+
+
+class Job:
+    """
+    A calculation run by a JobManager. the target is called as target(job, *args) and should check job.cancelled()
+    regularly (e.g. as the cancel of sweep.sweep, which checks it between tiles) and return early when it is True
+    """
+
+    def __init__(self, target, args, priority, group):
+        self.target = target
+        self.args = args
+        self.priority = priority
+        self.group = group
+        self.state = "queued"  # queued, running, done, failed or cancelled
+        self.error = None
+        self.finished = threading.Event()  # set when the job has stopped for any reason, including being cancelled before it started
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """
+        Asks the job to stop, a queued job is never started
+        :return: None
+        """
+        self._cancel.set()
+
+    def cancelled(self):
+        """
+        The cancellation token, checked by the target
+        :return: True if the job has been cancelled
+        """
+        return self._cancel.is_set()
+
+
+class JobManager:
+    """
+    Runs jobs on a few worker threads, highest priority first (and in the order they were submitted for the same priority).
+    a job submitted with a group cancels the other jobs in that group, so clicking Plot twice only calculates the latest plot
+    and several requests waiting in the queue are coalesced into the last one
+    """
+
+    def __init__(self, max_running=DEFAULT_MAX_RUNNING):
+        self.queue = []  # heap of (-priority, order, job)
+        self.jobs = set()  # queued and running jobs
+        self.order = itertools.count()
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.workers = [threading.Thread(target=self._work, daemon=True) for _ in range(max_running)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, target, *args, priority=0, group=None):
+        """
+        Queues a job
+        :param target: function called as target(job, *args) on a worker thread
+        :param args: the rest of the arguments of target
+        :param priority: jobs with a higher priority are started first
+        :param group: if given, every other queued or running job with the same group is cancelled
+        :return: the Job
+        """
+        job = Job(target, args, priority, group)
+
+        with self.condition:
+            if self.stopping:
+                raise RuntimeError("JobManager has been shut down")
+
+            if group is not None:
+                for other in self.jobs:
+                    if other.group == group:
+                        other.cancel()
+
+            self.jobs.add(job)
+            heapq.heappush(self.queue, (-priority, next(self.order), job))
+            self.condition.notify()
+
+        return job
+
+    def cancel_all(self):
+        """
+        Cancels every queued and running job
+        :return: None
+        """
+        with self.condition:
+            for job in self.jobs:
+                job.cancel()
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """
+        Cancels every job and waits for the running ones to stop, e.g. before the window is closed
+        :param timeout: max seconds to wait
+        :return: True if every worker stopped in time
+        """
+        with self.condition:
+            self.stopping = True
+            for job in self.jobs:
+                job.cancel()
+            self.condition.notify_all()
+
+        for worker in self.workers:
+            worker.join(timeout)
+
+        return not any(worker.is_alive() for worker in self.workers)
+
+    def _work(self):
+        """
+        Worker thread, runs the highest priority job until the manager is shut down
+        :return: None
+        """
+        while True:
+            with self.condition:
+                while not self.queue and not self.stopping:
+                    self.condition.wait()
+
+                if self.stopping:
+                    # jobs that never started still count as finished, so nothing waits for them forever
+                    for _, _, job in self.queue:
+                        job.state = "cancelled"
+                        job.finished.set()
+                    self.queue.clear()
+                    return
+
+                _, _, job = heapq.heappop(self.queue)
+
+                # cancelled (or superseded) while it was queued
+                if job.cancelled():
+                    job.state = "cancelled"
+                    self.jobs.discard(job)
+                    job.finished.set()
+                    continue
+
+                job.state = "running"
+
+            try:
+                job.target(job, *job.args)
+                job.state = "cancelled" if job.cancelled() else "done"
+            except Exception as e:
+                # print the error like an uncaught exception in a thread would, without stopping the worker
+                job.state = "failed"
+                job.error = e
+                traceback.print_exc()
+            finally:
+                with self.condition:
+                    self.jobs.discard(job)
+                job.finished.set()
+
+
+def tests():
+    """
+    Checks that jobs are run in order of priority, and that superseded and cancelled jobs stop
+    :return: None
+    """
+    manager = JobManager(max_running=1)
+    started = []
+    running = threading.Event()
+    release = threading.Event()
+
+    def target(job, name):
+        # runs until it is cancelled or released
+        started.append(name)
+        running.set()
+        while not job.cancelled() and not release.wait(0.01):
+            pass
+
+    print("(+) Testing jobs\n")
+
+    # the first job holds the only worker, so the rest are queued
+    first = manager.submit(target, "first", group="plot")
+    running.wait(5)
+    low = manager.submit(target, "low", priority=0)
+    high = manager.submit(target, "high", priority=1)
+    cancelled = manager.submit(target, "cancelled", priority=2)
+    cancelled.cancel()
+
+    # a new plot supersedes the running one
+    second = manager.submit(target, "second", group="plot")
+    release.set()
+    for job in (first, low, high, cancelled, second):
+        job.finished.wait(5)
+
+    states = [job.state for job in (first, second, low, high, cancelled)]
+    if states == ["cancelled", "done", "done", "done", "cancelled"] and started == ["first", "high", "low", "second"]:
+        print("(+) Passed priority, superseding and cancelling")
+    else:
+        print(f"(-) Failed priority, superseding and cancelling, states {states} and started {started}")
+
+    if manager.shutdown():
+        print("(+) Passed shutdown")
+    else:
+        print("(-) Failed shutdown")
+
+
+if __name__ == "__main__":
+    tests()
@@ -1,22 +1,12 @@
 import gc
 import os
 import sys
-import math
-import threading
-# import time
-import textwrap
+import queue
+import time
 from datetime import datetime
-import tkinter as tk
-from tkinter import messagebox
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
-import numpy as np
-import functions
-import algorithms
 
-mpl.use("TkAgg")
+# tkinter, matplotlib, numpy and the rest of the program are imported by the functions that use them, so importing main
+# (e.g. for format_function) is quick and doesn't open a window. create_app builds the window and run starts it
 
 
 # constants
@@ -26,20 +16,35 @@ WINDOW_HEIGHT = 500
 FUNCTION_OPTION_TEXT = ["Polynomial", "Trigonometric", "Exponential"]
 TRIG_TYPES = ["sin", "cos", "tan", "asin", "acos", "atan", "sinh", "cosh", "tanh", "asinh", "acosh", "atanh"]
 MIN_TOL = sys.float_info.epsilon + sys.float_info.epsilon * 0.01  # min tolerance is system epsilon with 1% buffer
+DEFAULT_METHODS = ("secant", "bisection")
+LIVE_FRAME_MS = 250  # how often the plot is redrawn with the tiles finished so far
+ZOOM_DELAY_MS = 200  # wait for the zoom to stop changing before recalculating the visible region
+PLOT_PRIORITY = 0
+ZOOM_PRIORITY = 1  # zooming is started before plots that are waiting, since it is quick and the user is waiting for it
+
+# the subtype entries/buttons and the function constant entries, replaced whenever the function type or subtype changes
+subtype_options = []
+subtype_selected = ""  # this will only be modified in generate_func_constants into either a number or string, depending on the subtype passed in
+function_constants = []
 
 
-def plot(cancel):
+def plot():
     """
     Function that will calculate and plot the graph defined by the user inputs using matplotlib
-    and display it in the tkinter window
-    :param cancel: A tk.BooleanVar. when True, the calculations continue run. If it becomes false, the calculations are stopped and the function returns
+    and display it in the tkinter window. the calculations are a job run by job_manager, and the plot is updated with the roots
+    found so far every LIVE_FRAME_MS until they are done. plotting again cancels the previous plot if it isn't done
     :return: None
     """
 
-    # arrays to store the inputs
-    inputs = []
-    roots_secant = []  # stores the root found from the inputs of same index, will be a 2d array
-    roots_bisection = []
+    import tkinter as tk
+    from tkinter import messagebox, ttk
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    import sweep
+    import render
+    import storage
+    import profiling
+
+    # array to store the function constants
     constants = []
 
     # get info user has put into the entries
@@ -62,130 +67,62 @@ def plot(cancel):
         print(e)
         return
 
+    # the algorithms that are ticked, in the order they are shown (the complex plane only uses newton)
+    methods = tuple(method for method, var in method_vars.items() if var.get())
+    if not methods and not complex_var.get():
+        messagebox.showinfo(title="No algorithms", message="Tick at least one algorithm")
+        return
+
     # check validity of user inputs
     if step <= 0 or tol < MIN_TOL or max_iter <= 0 or l_bound == u_bound or fig_width < 1 or abs_max_root < 0 or u_bound < l_bound:
         messagebox.showinfo(title="Invalid input", message="Rules for algorithm options: \n- Step must be > 0\n- Tolerance must be >= 0\n- Max iterations must be > 0\n- Lower bound cannot be = to upper bound\n- Figure width must be >= 1\n- Absolute value of max root must be >= 0")
         return
 
-    # get function type
+    # get function type as a spec (the same key word args as functions.sum_of_functions)
     if radiobutton_var.get() == FUNCTION_OPTION_TEXT[0]:
-        f = functions.polynomial
+        spec = {"polynomial": [subtype_selected, *constants]}
     elif radiobutton_var.get() == FUNCTION_OPTION_TEXT[1]:
-        f = functions.trigonometric
+        spec = {"trigonometric": [subtype_selected, *constants]}
     elif radiobutton_var.get() == FUNCTION_OPTION_TEXT[2]:
-        f = functions.exponential
+        spec = {"exponential": [subtype_selected, *constants]}
 
     else:
         # not meant to be possible? just in case, make f a function that returns 0
-        def f(*args, **kwargs):
-            return 0
+        spec = {"polynomial": [0, 0]}
 
     # enforce an upper limit to the amount of inputs
     if ((abs(l_bound) + abs(u_bound)) / step)**2 > MAX_INPUT_COUNT:
         messagebox.showinfo(title="Too many inputs", message=f"Too many inputs (max={MAX_INPUT_COUNT}), increase step or decrease input range")
         return
 
-    # add x values to be used as inputs
-    for i in np.arange(l_bound, u_bound, step):
-        inputs.append(i)
-
-    # get roots found from the inputs, each input paired with each other input.
-    # e.g for [-1, 0, 1, 2], -1 and -1 as inputs, then -1 and 0, -1 and 1, -1 and 2, then -1 and -1, 0 and -1 and so on
-    # this is since using -1 and 0 as inputs might produce a different result to 0 and -1
-    for i, inp0 in enumerate(inputs):
-        roots_secant.append([])
-        roots_bisection.append([])
-
-        for j, inp1 in enumerate(inputs):
-
-            # manually free memory from big arrays and return if cancel button pressed
-            if cancel.get():
-                print("Calculations cancelled")
-                del inputs
-                del roots_bisection
-                del roots_secant
-                gc.collect()
-                return
-
-            # calculate roots
-            r_s = algorithms.secant(f, inp0, inp1, max_iter, constants, subtype_selected, tol)
-            r_b = algorithms.bisection(f, inp0, inp1, max_iter, constants, subtype_selected, tol)
-
-            # turn the NaN returned because of a divide by zero error into a np.nan so that it can be recognized later
-            if r_s == "NaN":
-                r_s = np.nan
-            
-            # if no root was found and, for example, it blows up wildly or never settles, the "root" found after max_iter
-            # will not be at a y value close to 0, and will mess up the entire plot. to fix this, set these values to np.nan
-            if abs(f(subtype_selected, r_s, constants)) > tol:
-                r_s = np.nan
-            if abs(f(subtype_selected, r_b, constants)) > tol:
-                r_b = np.nan
-
-            # since trig functions have an infinite amount of roots, limit the solutions to +- 20 or the algorithm finds roots at really high x values, and the resulting plot has no variation in color (since the difference between pi and 2pi is negligable compared to pi and 75000, the scale is completly off)
-            if f.__name__ == "trigonometric":
-                if abs(r_s) > abs_max_root:
-                    r_s = np.nan
-                # if abs(r_b) > 20:
-                #     r_b = np.nan
-
-            # round answer to tolerance
-            r_s = round(r_s, abs(int(math.log10(tol))))
-            r_b = round(r_b, abs(int(math.log10(tol))))
-            
-            # add the root the the array
-            roots_secant[i].append(r_s)
-            roots_bisection[i].append(r_b)
-
     # the name of the plot
     plot_name = format_function(radiobutton_var.get(), subtype_selected, constants)
 
-    # create a new child window to display the resulting graph. It will close automatically if the parent window closes
-    plot_window = tk.Toplevel(window)
-    plot_window.title("Calculation results")
+    if complex_var.get():
+        if radiobutton_var.get() != FUNCTION_OPTION_TEXT[0]:
+            messagebox.showinfo(title="Not a polynomial", message="The complex plane can only be plotted for polynomials")
+            return
 
-    # the figure that will contain the plot
-    fig = Figure(figsize=(fig_width, fig_width/2), layout="tight")
+        plot_fractal(spec, plot_name, l_bound, u_bound, step, tol, max_iter, fig_width)
+        return
 
-    # adding the subplot
-    plot1 = fig.add_subplot(121)
-    plot2 = fig.add_subplot(122)
+    inputs = sweep.get_inputs(l_bound, u_bound, step)
 
-    # create the colormap. viridis doesn't have white in it (and its basically the default anyway)
-    cmap = plt.colormaps["viridis"]
+    # times each phase of the plot and shows it under the plot info when it's done
+    profiler = profiling.Profiler() if profile_var.get() else None
 
-    # set any values that are np.nan (bad values) to white
-    cmap.set_bad((1, 1, 1, 1))
+    # create a new child window to display the resulting graph. It will close automatically if the parent window closes
+    plot_window = tk.Toplevel(window)
+    plot_window.title("Calculation results")
 
     # get the date as day-month-year hour:minute:second
     date = datetime.today().strftime("%Y-%m-%d (y-m-d) %Hh%Mm%Ss")
 
-    # get min/max values of algorithm outputs
-    algorithm_max = np.nanmax([np.nanmax(roots_secant), np.nanmax(roots_bisection)])
-    algorithm_min = np.nanmin([np.nanmin(roots_secant), np.nanmin(roots_bisection)])
-    
-    # plot roots on matplotlib color maps, set their titles and ensure the text wraps, then create a colorbar for each plot
-    # secant:
-    secant_img = plot1.pcolormesh(inputs, inputs, roots_secant, cmap=cmap, vmin=algorithm_min, vmax=algorithm_max)
-    plot1.set_title("\n".join(textwrap.wrap(f"Secant: {plot_name}", 20)), fontsize=10)
-    fig.colorbar(secant_img, ax=plot1, label="Roots")
-
-    # bisection:
-    bisection_img = plot2.pcolormesh(inputs, inputs, roots_bisection, cmap=cmap, vmin=algorithm_min, vmax=algorithm_max)
-    plot2.set_title("\n".join(textwrap.wrap(f"Bisection: {plot_name}", 20)), fontsize=10)
-    fig.colorbar(bisection_img, ax=plot2, label="Roots")
-
-    # add text with the plot info. move plots up to allow enough space
-    fig.text(0, 0, f"max iter {max_iter}, tol {tol}, size {fig_width}x{fig_width/2}, l bound {l_bound}, u bound {u_bound}, step {step}, max root {abs_max_root}", fontsize=10, wrap=True)
-    fig.subplots_adjust(bottom=0.15)
-
-    # create images folder if it doesn't exist
-    if not os.path.isdir("images"):
-        os.mkdir("images")
-
-    # save entire plot. this must be done before drawing it or the image saved is white.
-    formatted_plot_name = plot_name.replace("*", "")
-    fig.savefig(f"images/{date} function {formatted_plot_name}.png")
+    # the roots found so far, all NaN (white) until their tile is finished
+    live = storage.allocate(methods, (inputs.size, inputs.size))
+
+    # the figure that will contain the plot, with the plot info as text at the bottom
+    fig = render.create_figure(inputs, live, plot_name, f"max iter {max_iter}, tol {tol}, size {fig_width}x{fig_width/2}, l bound {l_bound}, u bound {u_bound}, step {step}, max root {abs_max_root}", fig_width)
 
     # creating the Tkinter canvas containing the Matplotlib figure
     canvas = FigureCanvasTkAgg(fig, plot_window)
@@ -201,6 +138,373 @@ def plot(cancel):
     # placing the toolbar on the Tkinter window
     canvas.get_tk_widget().grid(row=1, column=0)
 
+    # progress bar (the fraction of rows finished) and the estimated time left
+    progress_var = tk.DoubleVar(value=0)
+    ttk.Progressbar(plot_window, variable=progress_var, maximum=1).grid(row=2, column=0, sticky="ew")
+    eta_sv = tk.StringVar(value="Calculating...")
+    tk.Label(textvariable=eta_sv, master=plot_window).grid(row=3, column=0)
+
+    # get roots found from the inputs, each input paired with each other input.
+    # e.g for [-1, 0, 1, 2], -1 and -1 as inputs, then -1 and 0, -1 and 1, -1 and 2, then -1 and -1, 0 and -1 and so on
+    # this is since using -1 and 0 as inputs might produce a different result to 0 and -1
+    # the grid is split into tiles of rows which are solved in parallel by worker processes, and checked for cancelling between tiles.
+    # results are cached, so plotting the same function with the same options again (e.g. with a different fig width) is instant.
+    # adaptive only solves the inputs where the root changes and fills in the rest.
+    # tkinter can only be used from this thread, so the calculation thread puts each finished tile in a queue instead of drawing it
+    updates = queue.Queue()
+    start_time = time.perf_counter()
+    job = job_manager.submit(calculate, updates, spec, l_bound, u_bound, step, tol, max_iter, abs_max_root, methods, adaptive_var.get(),
+                             profiler, priority=PLOT_PRIORITY, group="plot")
+
+    # closing the plot window (or the cancel button) cancels its calculations
+    tk.Button(text="Cancel", master=plot_window, command=job.cancel).grid(row=4, column=0)
+    plot_window.protocol("WM_DELETE_WINDOW", lambda: (job.cancel(), plot_window.destroy()))
+
+    def update_plot():
+        # stop updating if the plot window was closed
+        if not plot_window.winfo_exists():
+            return
+
+        # checked before the queue, so if it has stopped everything it put in the queue is already there
+        stopped = job.finished.is_set()
+
+        # add every tile finished since the last frame
+        changed = False
+        while True:
+            try:
+                update = updates.get_nowait()
+            except queue.Empty:
+                break
+
+            if update[0] == "done":
+                finish(update[1])
+                return
+            if update[0] == "error":
+                fail(update[1])
+                return
+
+            _, start, column, tile = update
+            sweep.store_tile(live, start, column, tile)
+            progress_var.set(progress_var.get() + sum(values[0].shape[0] for values in tile.values()) / (len(methods) * inputs.size))
+            changed = True
+
+        # cancelled before it started, so it never said it was done
+        if stopped:
+            finish(None)
+            return
+
+        if changed:
+            with profiling.phase(profiler, "live"):
+                render.update_figure(fig, live)
+            canvas.draw_idle()
+
+            progress = progress_var.get()
+            elapsed = time.perf_counter() - start_time
+            eta_sv.set(f"{progress:.0%} done, about {elapsed * (1 - progress) / max(progress, 1e-9):.0f}s left")
+
+        plot_window.after(LIVE_FRAME_MS, update_plot)
+
+    def fail(error):
+        # the roots found before the error are left on the plot, like a cancelled plot
+        print(f"Calculations failed: {error}")
+        eta_sv.set(f"Calculations failed: {error}")
+        gc.collect()
+
+    def finish(results):
+        # manually free memory from big arrays and return if cancelled, the roots found so far are left on the plot
+        if results is None:
+            print("Calculations cancelled")
+            eta_sv.set("Calculations cancelled")
+            if profiler is not None:
+                render.add_info(fig, profiler.format())
+                canvas.draw_idle()
+            gc.collect()
+            return
+
+        with profiling.phase(profiler, "draw"):
+            render.update_figure(fig, results)
+        progress_var.set(1)
+        eta_sv.set(f"Done in {time.perf_counter() - start_time:.1f}s")
+        print(sweep.format_summary(sweep.summarize(results)))
+
+        # create images folder if it doesn't exist
+        if not os.path.isdir("images"):
+            os.mkdir("images")
+
+        # save entire plot. this must be done before drawing it or the image saved is white.
+        # the roots of each method are also saved at full resolution, one pixel per pair of inputs
+        formatted_plot_name = plot_name.replace("*", "")
+        with profiling.phase(profiler, "save"):
+            fig.savefig(f"images/{date} function {formatted_plot_name}.png")
+            render.save_images(f"images/{date} function {formatted_plot_name}.png", results)
+
+        # the timing of each phase goes under the plot info and next to the images, the saved plot doesn't have it
+        if profiler is not None:
+            render.add_info(fig, profiler.format())
+            profiler.dump(f"images/{date} profile {formatted_plot_name}.json")
+            print(profiler.format())
+        with profiling.phase(profiler, "draw"):
+            canvas.draw()
+
+        connect_zoom(plot_window, fig, canvas, spec, inputs, results, max_iter, tol, abs_max_root)
+
+    plot_window.after(LIVE_FRAME_MS, update_plot)
+
+
+def plot_fractal(spec, plot_name, l_bound, u_bound, step, tol, max_iter, fig_width):
+    """
+    Plots newton's method over the complex plane of a polynomial, from l_bound to u_bound on both the real and imaginary axis,
+    in a new window. it is calculated by a job and drawn as it goes like plot, with the same progress bar and cancelling
+    :param spec: function spec of a polynomial
+    :param plot_name: the function as a string
+    :param l_bound: min real and imaginary part
+    :param u_bound: max real and imaginary part
+    :param step: step between each input
+    :param tol: tolerance
+    :param max_iter: max iterations
+    :param fig_width: width of the figure
+    :return: None
+    """
+    import tkinter as tk
+    from tkinter import ttk
+    import numpy as np
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    import sweep
+    import render
+    import fractal
+
+    inputs = sweep.get_inputs(l_bound, u_bound, step)
+    plot_window = tk.Toplevel(window)
+    plot_window.title("Complex plane")
+    date = datetime.today().strftime("%Y-%m-%d (y-m-d) %Hh%Mm%Ss")
+
+    # the basins found so far, black (no root) until their rows are finished
+    live = {"roots": fractal.polynomial_of(spec).roots(), "basins": np.full((inputs.size, inputs.size), -1, dtype=fractal.BASIN_DTYPE),
+            "iterations": np.zeros((inputs.size, inputs.size), dtype=int)}
+    fig = render.create_fractal_figure(inputs, live, plot_name.replace("x", "z"), f"max iter {max_iter}, tol {tol}, size {fig_width}x{fig_width/2}, l bound {l_bound}, u bound {u_bound}, step {step}", fig_width, max_iter)
+
+    canvas = FigureCanvasTkAgg(fig, plot_window)
+    canvas.draw()
+    canvas.get_tk_widget().grid(row=0, column=0)
+    toolbar = NavigationToolbar2Tk(canvas, plot_window, pack_toolbar=False)
+    toolbar.update()
+    canvas.get_tk_widget().grid(row=1, column=0)
+
+    progress_var = tk.DoubleVar(value=0)
+    ttk.Progressbar(plot_window, variable=progress_var, maximum=1).grid(row=2, column=0, sticky="ew")
+    eta_sv = tk.StringVar(value="Calculating...")
+    tk.Label(textvariable=eta_sv, master=plot_window).grid(row=3, column=0)
+
+    # the same as plot, the job puts each tile in the queue as ("tile", start, basins, iterations) then ("done", result)
+    updates = queue.Queue()
+    start_time = time.perf_counter()
+    job = job_manager.submit(calculate_fractal, updates, spec, l_bound, u_bound, step, tol, max_iter, priority=PLOT_PRIORITY, group="plot")
+
+    tk.Button(text="Cancel", master=plot_window, command=job.cancel).grid(row=4, column=0)
+    plot_window.protocol("WM_DELETE_WINDOW", lambda: (job.cancel(), plot_window.destroy()))
+
+    def update_plot():
+        if not plot_window.winfo_exists():
+            return
+
+        stopped = job.finished.is_set()
+
+        changed = False
+        while True:
+            try:
+                update = updates.get_nowait()
+            except queue.Empty:
+                break
+
+            if update[0] == "done":
+                finish(update[1])
+                return
+            if update[0] == "error":
+                fail(update[1])
+                return
+
+            _, start, basins, iterations = update
+            live["basins"][start:start + basins.shape[0]] = basins
+            live["iterations"][start:start + basins.shape[0]] = iterations
+            progress_var.set(progress_var.get() + basins.shape[0] / inputs.size)
+            changed = True
+
+        if stopped:
+            finish(None)
+            return
+
+        if changed:
+            render.update_fractal_figure(fig, live, max_iter)
+            canvas.draw_idle()
+
+            progress = progress_var.get()
+            elapsed = time.perf_counter() - start_time
+            eta_sv.set(f"{progress:.0%} done, about {elapsed * (1 - progress) / max(progress, 1e-9):.0f}s left")
+
+        plot_window.after(LIVE_FRAME_MS, update_plot)
+
+    def fail(error):
+        print(f"Calculations failed: {error}")
+        eta_sv.set(f"Calculations failed: {error}")
+        gc.collect()
+
+    def finish(result):
+        if result is None:
+            print("Calculations cancelled")
+            eta_sv.set("Calculations cancelled")
+            gc.collect()
+            return
+
+        render.update_fractal_figure(fig, result, max_iter)
+        progress_var.set(1)
+        eta_sv.set(f"Done in {time.perf_counter() - start_time:.1f}s")
+
+        if not os.path.isdir("images"):
+            os.mkdir("images")
+
+        path = f"images/{date} complex plane {plot_name.replace('*', '')}.png"
+        fig.savefig(path)
+        render.save_fractal_image(path, result, max_iter)
+        canvas.draw()
+
+    plot_window.after(LIVE_FRAME_MS, update_plot)
+
+
+def connect_zoom(plot_window, fig, canvas, spec, inputs, results, max_iter, tol, abs_max_root):
+    """
+    Makes the plot recalculate the visible region at the resolution of the screen when it is zoomed in with the toolbar,
+    instead of just making the pixels bigger. the regions are solved in a new thread and shown when they are done,
+    and zooming out far enough shows the original plot again
+    :param plot_window: the Toplevel with the plot
+    :param fig: the Figure from render.create_figure
+    :param canvas: the FigureCanvasTkAgg
+    :param spec: function spec
+    :param inputs: the inputs of the sweep
+    :param results: the cleaned results of the sweep
+    :param max_iter: max iterations
+    :param tol: tolerance
+    :param abs_max_root: max absolute value of a root for trig functions
+    :return: None
+    """
+    import render
+    import zoom
+
+    tiles = zoom.ZoomTiles(spec, max_iter, tol, abs_max_root, tuple(results))
+    axes = fig.axes[0]
+    sweep_step = inputs[1] - inputs[0] if inputs.size > 1 else 1
+
+    # the latest zoom, a newer one cancels it. the job puts (job, view) in the queue when it is done
+    views = queue.Queue()
+    state = {"after": None, "job": None}
+    group = ("zoom", str(plot_window))
+
+    def limits_changed(_):
+        # zooming changes the x and y limits of every plot, so wait until it stops changing and recalculate once
+        if state["after"] is not None:
+            plot_window.after_cancel(state["after"])
+        state["after"] = plot_window.after(ZOOM_DELAY_MS, recalculate)
+
+    def recalculate():
+        state["after"] = None
+        if state["job"] is not None:
+            state["job"].cancel()
+        x_limits, y_limits = axes.get_xlim(), axes.get_ylim()
+        pixels = (axes.bbox.width, axes.bbox.height)
+
+        # zoomed out far enough that the sweep has an input for every pixel already
+        if zoom.view_step(x_limits, y_limits, pixels) >= sweep_step:
+            render.update_figure(fig, results, render.extent(inputs))
+            canvas.draw_idle()
+            return
+
+        state["job"] = job_manager.submit(lambda job: views.put((job, tiles.view(x_limits, y_limits, pixels, job.cancelled))),
+                                          priority=ZOOM_PRIORITY, group=group)
+
+    def show_views():
+        # stop when the plot window is closed
+        if not plot_window.winfo_exists():
+            if state["job"] is not None:
+                state["job"].cancel()
+            return
+
+        # only the view of the latest zoom is shown, older ones were cancelled or are out of date
+        while True:
+            try:
+                job, view = views.get_nowait()
+            except queue.Empty:
+                break
+
+            if job is state["job"] and view is not None:
+                render.update_figure(fig, view[1], view[0])
+                canvas.draw_idle()
+
+        plot_window.after(LIVE_FRAME_MS, show_views)
+
+    for subplot in fig.axes:
+        if subplot.images:
+            subplot.callbacks.connect("xlim_changed", limits_changed)
+            subplot.callbacks.connect("ylim_changed", limits_changed)
+
+    show_views()
+
+
+def calculate(job, updates, spec, l_bound, u_bound, step, tol, max_iter, abs_max_root, methods, adaptive, profiler=None):
+    """
+    The job submitted by plot, calculates the roots and puts each tile in the updates queue as ("tile", start, column, tile)
+    as it finishes, then ("done", results) at the end (results is None if cancelled), or ("error", exception) if it went wrong
+    :param job: the jobs.Job, checked for cancelling between tiles
+    :param updates: queue.Queue read by the plot window
+    :param spec: function spec
+    :param l_bound: min input
+    :param u_bound: max input
+    :param step: step between each input
+    :param tol: tolerance
+    :param max_iter: max iterations
+    :param abs_max_root: max absolute value of a root for trig functions
+    :param methods: names of the algorithms in sweep.GRID_ALGORITHMS to use
+    :param adaptive: use the adaptive sweep
+    :param profiler: optional profiling.Profiler, passed to sweep.sweep
+    :return: None
+    """
+    import sweep
+    import storage
+
+    try:
+        _, results = sweep.sweep(spec, l_bound, u_bound, step, tol, max_iter, abs_max_root, methods, cancel=job.cancelled,
+                                 cache_dir=storage.DEFAULT_CACHE_DIR, adaptive=adaptive, profiler=profiler,
+                                 on_tile=lambda start, column, tile: updates.put(("tile", start, column, tile)))
+    except Exception as e:
+        # shown in the plot window, and raised again so the job manager prints it
+        updates.put(("error", e))
+        raise
+
+    updates.put(("done", results))
+
+
+def calculate_fractal(job, updates, spec, l_bound, u_bound, step, tol, max_iter):
+    """
+    The job submitted by plot_fractal, the same as calculate
+    :param job: the jobs.Job, checked for cancelling between tiles
+    :param updates: queue.Queue read by the plot window
+    :param spec: function spec of a polynomial
+    :param l_bound: min real and imaginary part
+    :param u_bound: max real and imaginary part
+    :param step: step between each input
+    :param tol: tolerance
+    :param max_iter: max iterations
+    :return: None
+    """
+    import fractal
+
+    try:
+        solved = fractal.solve_fractal(spec, l_bound, u_bound, step, tol, max_iter, cancel=job.cancelled,
+                                       on_tile=lambda start, basins, iterations: updates.put(("tile", start, basins, iterations)))
+    except Exception as e:
+        updates.put(("error", e))
+        raise
+
+    updates.put(("done", solved[1] if solved is not None else None))
+
 
 # TODO: ui to build and add multiple function types together
 def rb_function_type_select():
@@ -209,6 +513,9 @@ def rb_function_type_select():
     :return: None
     """
 
+    import tkinter as tk
+    from tkinter import messagebox
+
     # the text from the selected radio button
     selected = radiobutton_var.get()
 
@@ -283,6 +590,9 @@ def generate_func_constants(*args):
     :return: None
     """
 
+    import tkinter as tk
+    from tkinter import messagebox
+
     global subtype_selected  # bad practice, I know
 
     # clear array and remove any widgets in the frame
@@ -406,128 +716,180 @@ def format_function(f_type, subtype, constants):
     return func_str
 
 
-# create window and set title
-window = tk.Tk()
-window.title('Root Finder')
-
-# setting the dimensions of the main window
-window.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
-
-# create frames
-func_select_frame = tk.Frame()
-current_info_frame = tk.Frame()
-func_subtype_frame = tk.Frame()
-algorithm_options_frame = tk.Frame()
-func_constants_frame = tk.Frame()
-func_plot_frame = tk.Frame(highlightbackground="grey", highlightthickness=1)
-
-# layout of the frames in a grid
-func_select_frame.grid(row=0, column=0)
-current_info_frame.grid(row=0, column=1)
-func_subtype_frame.grid(row=1, column=0)
-algorithm_options_frame.grid(row=1, column=1)
-func_constants_frame.grid(row=2, column=0, columnspan=2)
-func_plot_frame.grid(row=3, column=0, columnspan=2)
-
-# create the label above the radio buttons
-radio_select_label = tk.Label(text="Choose function type: ", master=func_select_frame)
-radio_select_label.grid(row=0, column=0)
-
-# array to hold radio buttons
-radio_buttons = []
-
-# variable that the radio buttons will share
-radiobutton_var = tk.StringVar(value=" ")
-
-# create the radio buttons
-for i in range(0, len(FUNCTION_OPTION_TEXT)):
-    rb = tk.Radiobutton(text=FUNCTION_OPTION_TEXT[i],
-                        master=func_select_frame,
-                        command=rb_function_type_select,
-                        variable=radiobutton_var,
-                        value=FUNCTION_OPTION_TEXT[i])
-
-    rb.grid(row=i+1, column=0)
-    radio_buttons.append(rb)
-
-# create function info text and setting it to a StringVar that will be updated later
-function_info_sv = tk.StringVar(value="Function info will be displayed here")
-function_info_text = tk.Label(textvariable=function_info_sv, master=current_info_frame, justify="center")
-
-# bind the configure event so that when the text is set/updated, the wraplength is resized to be the same as the frame below it (algorithm options)
-function_info_text.bind('<Configure>', lambda e: function_info_text.config(wraplength=algorithm_options_frame.winfo_width()))
-function_info_text.grid(row=1, column=0)
-
-# create subtype label
-subtype_label = tk.Label(text="Function subtypes:", master=func_subtype_frame)
-subtype_label.grid(row=0, column=0)
-subtype_options = []
-subtype_selected = ""  # this will only be modified in generate_func_constants into either a number or string, depending on the subtype passed in
-
-# create algorithm options
-algorithm_options_label = tk.Label(text="Algorithm options:", master=algorithm_options_frame)
-algorithm_options_label.grid(row=0, column=0, columnspan=3)
-
-# create and arrange labels and buttons for algorithm options
-tk.Label(text="Max iterations >0", master=algorithm_options_frame).grid(row=1, column=0)
-tk.Label(text="Step >0", master=algorithm_options_frame).grid(row=1, column=1)
-tk.Label(text="Min input", master=algorithm_options_frame).grid(row=1, column=2)
-tk.Label(text="Max input", master=algorithm_options_frame).grid(row=2, column=0, pady=(40, 0))
-tk.Label(text="Tolerance >=0", master=algorithm_options_frame).grid(row=2, column=1, pady=(40, 0))
-tk.Label(text="Fig width >0", master=algorithm_options_frame).grid(row=2, column=2, pady=(40, 0))
-tk.Label(text="Max Abs val root", master=algorithm_options_frame).grid(row=3, column=0, pady=(40, 0))
-
-# each entry needs a DoubleVar so the user input can be used later
-max_iter_sv, min_input_sv, max_input_sv, tolerance_sv, step_sv, fig_width_sv, max_root_sv = tk.DoubleVar(value=20), tk.DoubleVar(value=-5), tk.DoubleVar(value=5), tk.DoubleVar(value=0.00001), tk.DoubleVar(value=0.1), tk.IntVar(value=6), tk.DoubleVar(value=20)
-
-max_iterations_entry = tk.Entry(master=algorithm_options_frame, textvariable=max_iter_sv).grid(row=2, column=0)
-step_entry = tk.Entry(master=algorithm_options_frame, textvariable=step_sv).grid(row=2, column=1)
-min_input_entry = tk.Entry(master=algorithm_options_frame, textvariable=min_input_sv).grid(row=2, column=2)
-max_input_entry = tk.Entry(master=algorithm_options_frame, textvariable=max_input_sv).grid(row=3, column=0)
-tolerance_entry = tk.Entry(master=algorithm_options_frame, textvariable=tolerance_sv).grid(row=3, column=1)
-fig_width_entry = tk.Entry(master=algorithm_options_frame, textvariable=fig_width_sv).grid(row=3, column=2)
-max_root_root = tk.Entry(master=algorithm_options_frame, textvariable=max_root_sv).grid(row=4, column=0)
-
-# create function constants options
-function_constants_label = tk.Label(text="Function constants:", master=func_constants_frame)
-function_constants_label.grid(row=0, column=0)
-function_constants = []
-
-# bind the Entry for the degree of the polynomial to a StringVar and use the trace method to call generate_func_constants
-# when the entry is modified ("w" is for write). This is necessary since an Entry doesn't have a "command" option like buttons do
-func_constants_sv = tk.StringVar()
-func_constants_sv.trace("w", lambda name, index, mode, sv=func_constants_sv: generate_func_constants(sv))
-
-# button that will display the plot. creates a new thread to handle the plot function so the main window is still responsive
-cancel_calculations = tk.BooleanVar(value=False)
-plot_button = tk.Button(master=func_plot_frame, command=lambda c=cancel_calculations: threading.Thread(target=plot, args=(cancel_calculations,)).start(), height=2, width=10, text="Plot")
-plot_button.grid(row=0, column=0)
-
-
-# button that will allow the calculations to be canceled if they are taking to long without terminating the thread forcefully
-disable_label = tk.Label(textvariable=cancel_calculations, master=func_plot_frame)
-disable_btn = tk.Button(text="Toggle cancelling calculations", master=func_plot_frame, command=lambda: cancel_calculations.set(not cancel_calculations.get()), height=2)
-disable_btn.grid(row=0, column=1)
-disable_label.grid(row=1, column=1)
-
-
-# toolbar
-menu = tk.Menu(window)
-menu.add_command(label="Help", command=lambda: messagebox.showinfo(title="Help", message="NOTE: closing the main window while calculations are still ongoing terminates the thread while its storing massive arrays in memory and is probably a bad idea.\nTo cancel calculations and clear the arrays press the 'Toggle cancelling calculations' button so that it is set to true (1 is true, 0 is false)\n\n\n"
-                                                                                         "Summary: \nThis program solves for the roots/solutions/x-intercepts of a function using Bisection and Secant method. The results are displayed on a 2D matplotlib colormap.\n"
-                                                                                         "\nFunction Types: \nPolynomial: max degree of 25, the general formula will be displayed on the top right when you change the degree.\nTrigonometric: 'a' stands for arc, so asin is the inverse sin function. 'h' means hyperbolic, so cosh is the hyperbolic cos function. Note that \n-   a. some of these functions don't have a domain of R (like atanh) and \n-   b. some functions like cosh grow extremely rapidly, and can overflow. (these errors are caught and printed if they occur)\nExponential: can't have an asymptote at y=0, since the program will find a non-existent root\n" 
-                                                                                         "\nAlgorithm options and entering info: \nAfter selecting the function, you can set the algorithm options, they are: \n-   Max iter: the max num of iterations the algorithm can run\n-   Step: The step between each generated input from min and max values (smaller step more inputs)\n-   Min/max input: The min/max value that will be used as the initial input\n-   Tolerance: How close to 0 the algorithms can get before concluding they found a root\n-   Fig width: the width of the window that displays the plot\n-   Max abs val root: for trigonometric functions, this is the max value that the algorithm can find, this is necessary since secant can find, for example, a solution to sin at 500,000\n"
-                                                                                         "\nPlotting: \nEach pixel represents the output of the respective algorithm, and the color represents the x-value of the output. The x and y position of the pixel represents the two x inputs for the algorithm that lead to it finding that root.\n"))
-window.config(menu=menu)
+def on_closing():
+    """
+    Called when the main window is closed. the calculations are cancelled and their threads stopped before the window is destroyed
+    :return: None
+    """
+    job_manager.shutdown()
+    window.destroy()
 
 
-# give equal weight to columns 0 and 1, so they are evenly spaced out
-window.grid_columnconfigure(0, weight=1)
-window.grid_columnconfigure(1, weight=1)
+def create_app():
+    """
+    Creates the main window with every frame, entry and button in it, and the job manager that runs the calculations.
+    the widgets and variables are module globals, since the functions above read the user inputs from them
+    :return: the tk.Tk window, call its mainloop (or use run) to show it
+    """
+    import tkinter as tk
+    from tkinter import messagebox
+    import matplotlib as mpl
+    import sweep
+    import jobs
+
+    global window, func_select_frame, func_subtype_frame, algorithm_options_frame, func_constants_frame, radiobutton_var, function_info_sv
+    global max_iter_sv, min_input_sv, max_input_sv, tolerance_sv, step_sv, fig_width_sv, max_root_sv
+    global adaptive_var, complex_var, profile_var, method_vars, func_constants_sv, job_manager
+
+    mpl.use("TkAgg")
+
+    # create window and set title
+    window = tk.Tk()
+    window.title('Root Finder')
+
+    # setting the dimensions of the main window
+    window.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
+
+    # create frames
+    func_select_frame = tk.Frame()
+    current_info_frame = tk.Frame()
+    func_subtype_frame = tk.Frame()
+    algorithm_options_frame = tk.Frame()
+    func_constants_frame = tk.Frame()
+    func_plot_frame = tk.Frame(highlightbackground="grey", highlightthickness=1)
+
+    # layout of the frames in a grid
+    func_select_frame.grid(row=0, column=0)
+    current_info_frame.grid(row=0, column=1)
+    func_subtype_frame.grid(row=1, column=0)
+    algorithm_options_frame.grid(row=1, column=1)
+    func_constants_frame.grid(row=2, column=0, columnspan=2)
+    func_plot_frame.grid(row=3, column=0, columnspan=2)
+
+    # create the label above the radio buttons
+    radio_select_label = tk.Label(text="Choose function type: ", master=func_select_frame)
+    radio_select_label.grid(row=0, column=0)
+
+    # array to hold radio buttons
+    radio_buttons = []
+
+    # variable that the radio buttons will share
+    radiobutton_var = tk.StringVar(value=" ")
+
+    # create the radio buttons
+    for i in range(0, len(FUNCTION_OPTION_TEXT)):
+        rb = tk.Radiobutton(text=FUNCTION_OPTION_TEXT[i],
+                            master=func_select_frame,
+                            command=rb_function_type_select,
+                            variable=radiobutton_var,
+                            value=FUNCTION_OPTION_TEXT[i])
+
+        rb.grid(row=i+1, column=0)
+        radio_buttons.append(rb)
+
+    # create function info text and setting it to a StringVar that will be updated later
+    function_info_sv = tk.StringVar(value="Function info will be displayed here")
+    function_info_text = tk.Label(textvariable=function_info_sv, master=current_info_frame, justify="center")
+
+    # bind the configure event so that when the text is set/updated, the wraplength is resized to be the same as the frame below it (algorithm options)
+    function_info_text.bind('<Configure>', lambda e: function_info_text.config(wraplength=algorithm_options_frame.winfo_width()))
+    function_info_text.grid(row=1, column=0)
+
+    # create subtype label
+    subtype_label = tk.Label(text="Function subtypes:", master=func_subtype_frame)
+    subtype_label.grid(row=0, column=0)
+
+    # create algorithm options
+    algorithm_options_label = tk.Label(text="Algorithm options:", master=algorithm_options_frame)
+    algorithm_options_label.grid(row=0, column=0, columnspan=3)
+
+    # create and arrange labels and buttons for algorithm options
+    tk.Label(text="Max iterations >0", master=algorithm_options_frame).grid(row=1, column=0)
+    tk.Label(text="Step >0", master=algorithm_options_frame).grid(row=1, column=1)
+    tk.Label(text="Min input", master=algorithm_options_frame).grid(row=1, column=2)
+    tk.Label(text="Max input", master=algorithm_options_frame).grid(row=2, column=0, pady=(40, 0))
+    tk.Label(text="Tolerance >=0", master=algorithm_options_frame).grid(row=2, column=1, pady=(40, 0))
+    tk.Label(text="Fig width >0", master=algorithm_options_frame).grid(row=2, column=2, pady=(40, 0))
+    tk.Label(text="Max Abs val root", master=algorithm_options_frame).grid(row=3, column=0, pady=(40, 0))
+
+    # each entry needs a DoubleVar so the user input can be used later
+    max_iter_sv, min_input_sv, max_input_sv, tolerance_sv, step_sv, fig_width_sv, max_root_sv = tk.DoubleVar(value=20), tk.DoubleVar(value=-5), tk.DoubleVar(value=5), tk.DoubleVar(value=0.00001), tk.DoubleVar(value=0.1), tk.IntVar(value=6), tk.DoubleVar(value=20)
+
+    max_iterations_entry = tk.Entry(master=algorithm_options_frame, textvariable=max_iter_sv).grid(row=2, column=0)
+    step_entry = tk.Entry(master=algorithm_options_frame, textvariable=step_sv).grid(row=2, column=1)
+    min_input_entry = tk.Entry(master=algorithm_options_frame, textvariable=min_input_sv).grid(row=2, column=2)
+    max_input_entry = tk.Entry(master=algorithm_options_frame, textvariable=max_input_sv).grid(row=3, column=0)
+    tolerance_entry = tk.Entry(master=algorithm_options_frame, textvariable=tolerance_sv).grid(row=3, column=1)
+    fig_width_entry = tk.Entry(master=algorithm_options_frame, textvariable=fig_width_sv).grid(row=3, column=2)
+    max_root_root = tk.Entry(master=algorithm_options_frame, textvariable=max_root_sv).grid(row=4, column=0)
+
+    # adaptive sweep, faster but can miss small details
+    adaptive_var = tk.BooleanVar(value=False)
+    adaptive_checkbutton = tk.Checkbutton(text="Adaptive", variable=adaptive_var, master=algorithm_options_frame).grid(row=4, column=1)
+
+    # newton's method over the complex plane instead, for polynomials
+    complex_var = tk.BooleanVar(value=False)
+    complex_checkbutton = tk.Checkbutton(text="Complex plane", variable=complex_var, master=algorithm_options_frame).grid(row=4, column=2)
+
+    # time each phase of the plot, shown under the plot info and saved next to the images
+    profile_var = tk.BooleanVar(value=False)
+    profile_checkbutton = tk.Checkbutton(text="Profile", variable=profile_var, master=algorithm_options_frame).grid(row=5, column=1, pady=(40, 0))
+
+    # the algorithms to plot, each one is a plot side by side
+    tk.Label(text="Algorithms", master=algorithm_options_frame).grid(row=5, column=0, pady=(40, 0))
+    method_vars = {}
+    for n, method in enumerate(sweep.GRID_ALGORITHMS):
+        method_vars[method] = tk.BooleanVar(value=method in DEFAULT_METHODS)
+        tk.Checkbutton(text=method.capitalize(), variable=method_vars[method], master=algorithm_options_frame).grid(row=6 + n // 3, column=n % 3)
+
+    # create function constants options
+    function_constants_label = tk.Label(text="Function constants:", master=func_constants_frame)
+    function_constants_label.grid(row=0, column=0)
+
+    # bind the Entry for the degree of the polynomial to a StringVar and use the trace method to call generate_func_constants
+    # when the entry is modified ("w" is for write). This is necessary since an Entry doesn't have a "command" option like buttons do
+    func_constants_sv = tk.StringVar()
+    func_constants_sv.trace("w", lambda name, index, mode, sv=func_constants_sv: generate_func_constants(sv))
+
+    # runs the calculations on worker threads so the main window is still responsive
+    job_manager = jobs.JobManager()
+
+    # button that will display the plot
+    plot_button = tk.Button(master=func_plot_frame, command=plot, height=2, width=10, text="Plot")
+    plot_button.grid(row=0, column=0)
+
+    # button that will cancel every calculation, they stop after the tiles they are solving (without terminating the thread forcefully)
+    cancel_btn = tk.Button(text="Cancel calculations", master=func_plot_frame, command=job_manager.cancel_all, height=2)
+    cancel_btn.grid(row=0, column=1)
+
+    # toolbar
+    menu = tk.Menu(window)
+    menu.add_command(label="Help", command=lambda: messagebox.showinfo(title="Help", message="NOTE: to cancel calculations press 'Cancel calculations', or the cancel button or close button of the plot window. Pressing Plot again also cancels the last plot if it isn't done. Closing the main window cancels everything and waits for it to stop.\n\n\n"
+                                                                                             "Summary: \nThis program solves for the roots/solutions/x-intercepts of a function using Bisection and Secant method. The results are displayed on a 2D matplotlib colormap.\n"
+                                                                                             "\nFunction Types: \nPolynomial: max degree of 25, the general formula will be displayed on the top right when you change the degree.\nTrigonometric: 'a' stands for arc, so asin is the inverse sin function. 'h' means hyperbolic, so cosh is the hyperbolic cos function. Note that \n-   a. some of these functions don't have a domain of R (like atanh) and \n-   b. some functions like cosh grow extremely rapidly, and can overflow. (these errors are caught and printed if they occur)\nExponential: can't have an asymptote at y=0, since the program will find a non-existent root\n" 
+                                                                                             "\nAlgorithm options and entering info: \nAfter selecting the function, you can set the algorithm options, they are: \n-   Max iter: the max num of iterations the algorithm can run\n-   Step: The step between each generated input from min and max values (smaller step more inputs)\n-   Min/max input: The min/max value that will be used as the initial input\n-   Tolerance: How close to 0 the algorithms can get before concluding they found a root\n-   Fig width: the width of the window that displays the plot\n-   Max abs val root: for trigonometric functions, this is the max value that the algorithm can find, this is necessary since secant can find, for example, a solution to sin at 500,000\n"
+                                                                                             "\nPlotting: \nEach pixel represents the output of the respective algorithm, and the color represents the x-value of the output. The x and y position of the pixel represents the two x inputs for the algorithm that lead to it finding that root.\n"
+                                                                                             "\nComplex plane: \nFor polynomials, ticking 'Complex plane' plots newton's method starting from every complex number with a real and imaginary part from min to max instead. Each root has its own color, and darker means more iterations. Black didn't find a root.\n"
+                                                                                             "\nProfile: \nTimes each part of the plot (solving, cleaning the roots, drawing and saving) and counts the function evaluations of each algorithm. The times are shown under the plot info and saved as '... profile ....json' in the images folder.\n"))
+    window.config(menu=menu)
+
+    # give equal weight to columns 0 and 1, so they are evenly spaced out
+    window.grid_columnconfigure(0, weight=1)
+    window.grid_columnconfigure(1, weight=1)
+
+    # call function on window close
+    window.protocol("WM_DELETE_WINDOW", on_closing)
+
+    return window
+
+
+def run():
+    """
+    Opens the main window and runs the gui until it is closed
+    :return: None
+    """
+    create_app().mainloop()
 
-# call function on window close
-# window.protocol("WM_DELETE_WINDOW", on_closing)
 
-# run the gui
 if __name__ == "__main__":
-    window.mainloop()
+    run()
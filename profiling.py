@@ -0,0 +1,161 @@
+import io
+import json
+import time
+import pstats
+import cProfile
+import threading
+import contextlib
+
+
+# constants
+DEFAULT_STATS_LINES = 25  # functions listed by Profiler.stats_text, the slowest by cumulative time
+
+
+class Profiler:
+    """
+    Opt-in timing of the phases of a plot or sweep, passed as the profiler of sweep.sweep and main.plot.
+    a phase is timed every time it runs (e.g. "solve", "clean", "draw" or "save") and its total and number of calls are kept.
+    phases can be inside of each other, e.g. the tiles are cleaned as they finish during "solve", so they don't always add up to the total.
+    methods get the time spent in their solver and their number of function evaluations, added up over every tile (so with several
+    worker processes the solver time can be more than the wall time of the solve phase). it can be used from several threads at once.
+    with cprofile=True, capture also records every function call with cProfile for a more detailed look at one run
+    """
+
+    def __init__(self, cprofile=False):
+        self.phases = {}  # phase name -> [seconds, calls]
+        self.methods = {}  # method name -> [solver seconds, evaluations]
+        self.counts = {}  # other counters, e.g. "cached methods"
+        self.lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.profile = cProfile.Profile() if cprofile else None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Times a phase, used as `with profiler.phase("solve"):`
+        :param name: name of the phase
+        :return: context manager
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds, calls=1):
+        """
+        Adds time to a phase that was timed some other way
+        :param name: name of the phase
+        :param seconds: time taken
+        :param calls: number of times it ran
+        :return: None
+        """
+        with self.lock:
+            phase = self.phases.setdefault(name, [0.0, 0])
+            phase[0] += seconds
+            phase[1] += calls
+
+    def add_method(self, method, seconds, evaluations):
+        """
+        Adds the time spent in a solver and its function evaluations
+        :param method: name of the algorithm
+        :param seconds: time spent solving
+        :param evaluations: number of function evaluations
+        :return: None
+        """
+        with self.lock:
+            totals = self.methods.setdefault(method, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += int(evaluations)
+
+    def count(self, name, n=1):
+        """
+        Adds to a counter
+        :param name: name of the counter
+        :param n: amount to add
+        :return: None
+        """
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + int(n)
+
+    @contextlib.contextmanager
+    def capture(self):
+        """
+        Records every function call with cProfile while it is used, if the profiler was created with cprofile=True.
+        only calls in this process are recorded, so a sweep has to use 1 worker for the solvers to show up
+        :return: context manager
+        """
+        if self.profile is None:
+            yield
+            return
+
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+
+    def report(self):
+        """
+        Everything recorded so far
+        :return: dict with "total" (seconds since the profiler was created), "phases" (name -> {"seconds", "calls"}),
+        "methods" (name -> {"seconds", "evaluations"}) and "counts"
+        """
+        with self.lock:
+            return {"total": time.perf_counter() - self.start,
+                    "phases": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.phases.items()},
+                    "methods": {name: {"seconds": seconds, "evaluations": evaluations} for name, (seconds, evaluations) in self.methods.items()},
+                    "counts": dict(self.counts)}
+
+    def format(self):
+        """
+        The report as one line of text, short enough to go under the plot info
+        :return: str
+        """
+        report = self.report()
+        phases = [f"{name} {phase['seconds']:.2f}s" + (f" ({phase['calls']}x)" if phase["calls"] > 1 else "")
+                  for name, phase in report["phases"].items()]
+        methods = [f"{name} {method['seconds']:.2f}s {method['evaluations']:.3g} evals" for name, method in report["methods"].items()]
+
+        return f"total {report['total']:.2f}s: " + ", ".join(phases + methods)
+
+    def dump(self, path):
+        """
+        Saves the report as json
+        :param path: path of the .json file
+        :return: None
+        """
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def dump_stats(self, path):
+        """
+        Saves the cProfile capture, it can be loaded with pstats.Stats(path) or a viewer like snakeviz
+        :param path: path of the .prof file
+        :return: None
+        """
+        self.profile.dump_stats(path)
+
+    def stats_text(self, lines=DEFAULT_STATS_LINES):
+        """
+        The functions of the cProfile capture that took the most cumulative time
+        :param lines: number of functions listed
+        :return: str
+        """
+        text = io.StringIO()
+        pstats.Stats(self.profile, stream=text).sort_stats("cumulative").print_stats(lines)
+
+        return text.getvalue()
+
+
+def phase(profiler, name):
+    """
+    Times a phase if there is a profiler, so code that can be profiled doesn't need to check for one
+    :param profiler: the Profiler, or None
+    :param name: name of the phase
+    :return: context manager
+    """
+    if profiler is None:
+        return contextlib.nullcontext()
+
+    return profiler.phase(name)
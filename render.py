@@ -0,0 +1,248 @@
+import math
+import textwrap
+import numpy as np
+import matplotlib as mpl
+import matplotlib.image
+from matplotlib.colors import hsv_to_rgb
+from matplotlib.figure import Figure
+
+
+# constants
+FRACTAL_SATURATION = 0.75
+FRACTAL_MIN_VALUE = 0.25  # brightness of the inputs that took max_iter iterations, the ones that converge straight away are 1
+
+
+def colormap():
+    """
+    The colormap the roots are plotted with. viridis doesn't have white in it (and its basically the default anyway),
+    and any values that are np.nan (bad values) are white
+    :return: the Colormap
+    """
+    cmap = mpl.colormaps["viridis"]
+    cmap.set_bad((1, 1, 1, 1))
+
+    return cmap
+
+
+def color_limits(results):
+    """
+    The min and max root of every method, so every plot has the same scale
+    :param results: dict of method name -> dict with a "roots" 2d array
+    :return: tuple of (min, max), (None, None) if no roots have been found yet
+    """
+    found = [method["roots"][~np.isnan(method["roots"])] for method in results.values()]
+    found = [roots for roots in found if roots.size]
+    if not found:
+        return None, None
+
+    return min(roots.min() for roots in found), max(roots.max() for roots in found)
+
+
+def display_pixels(fig, count):
+    """
+    About how many pixels wide each plot is when the figure is shown, there's no point drawing more rows and columns than this
+    :param fig: the Figure
+    :param count: number of plots side by side
+    :return: int
+    """
+    return max(1, int(fig.get_figwidth() * fig.dpi / count))
+
+
+def downsample(roots, pixels):
+    """
+    Takes every n'th row and column so the grid is no bigger than pixels x pixels. the roots aren't averaged since
+    the average of two different roots is a color that no input found
+    :param roots: 2d array
+    :param pixels: max rows and columns
+    :return: 2d array (a view of roots)
+    """
+    stride = max(1, math.ceil(max(roots.shape) / pixels))
+
+    return roots[::stride, ::stride]
+
+
+def extent(inputs):
+    """
+    The extent of the image of a sweep, each input is the center of its pixel (the same as pcolormesh)
+    :param inputs: 1d array of evenly spaced initial x values
+    :return: tuple of (left, right, bottom, top)
+    """
+    half_step = (inputs[1] - inputs[0]) / 2 if inputs.size > 1 else 0.5
+
+    return inputs[0] - half_step, inputs[-1] + half_step, inputs[0] - half_step, inputs[-1] + half_step
+
+
+def create_figure(inputs, results, plot_name, info, fig_width):
+    """
+    Creates the matplotlib figure with a colormap of the roots found by each algorithm. Doesn't use pyplot or tkinter,
+    so it works without a display and can be saved directly or put on a tkinter canvas.
+    each plot is a single image of the roots (instead of a quad for every pair of inputs), downsampled to the size it is shown at
+    :param inputs: 1d array of evenly spaced initial x values, the x and y axis of each plot
+    :param results: dict of method name -> dict with a "roots" 2d array, from sweep.sweep
+    :param plot_name: the function as a string, used in the titles
+    :param info: text with the plot info written at the bottom of the figure
+    :param fig_width: width of the figure, the height is half of this
+    :return: the Figure
+    """
+
+    # the figure that will contain the plot
+    fig = Figure(figsize=(fig_width, fig_width/2), layout="tight")
+    cmap = colormap()
+    pixels = display_pixels(fig, len(results))
+
+    # get min/max values of algorithm outputs, so every plot has the same scale
+    algorithm_min, algorithm_max = color_limits(results)
+
+    # plot roots on matplotlib color maps, set their titles and ensure the text wraps, then create a colorbar for each plot.
+    # every plot has the same inputs, so they share their axes and zooming into one zooms into all of them
+    first = None
+    for n, (method, result) in enumerate(results.items()):
+        subplot = fig.add_subplot(1, len(results), n + 1, sharex=first, sharey=first)
+        first = first or subplot
+        img = subplot.imshow(downsample(result["roots"], pixels), cmap=cmap, vmin=algorithm_min, vmax=algorithm_max, origin="lower",
+                             extent=extent(inputs), aspect="auto", interpolation="nearest")
+        img.set_gid(method)
+        subplot.set_title("\n".join(textwrap.wrap(f"{method.capitalize()}: {plot_name}", 20)), fontsize=10)
+        fig.colorbar(img, ax=subplot, label="Roots")
+
+    # add text with the plot info. move plots up to allow enough space
+    fig.text(0, 0, info, fontsize=10, wrap=True, gid="info")
+    fig.subplots_adjust(bottom=0.15)
+
+    return fig
+
+
+def update_figure(fig, results, region=None):
+    """
+    Replaces the roots shown in a figure from create_figure, without creating the plots again. The figure still needs to be drawn
+    :param fig: the Figure
+    :param results: dict of method name -> dict with a "roots" 2d array, the same methods the figure was created with
+    :param region: if given, the roots are a different region of inputs (like zoom.ZoomTiles.view) and are moved to this extent.
+    the color scale isn't changed, so each color is still the same root as the rest of the plot, and the axis limits stay where they are
+    :return: None
+    """
+    vmin, vmax = color_limits(results)
+    pixels = display_pixels(fig, len(results))
+
+    for img in fig.findobj(lambda artist: artist.get_gid() in results):
+        img.set_array(downsample(results[img.get_gid()]["roots"], pixels))
+
+        if region is not None:
+            limits = img.axes.get_xlim(), img.axes.get_ylim()
+            img.set_extent(region)
+            img.axes.set_xlim(limits[0], emit=False)
+            img.axes.set_ylim(limits[1], emit=False)
+        elif vmin is not None:
+            img.set_clim(vmin, vmax)
+
+
+def add_info(fig, text):
+    """
+    Adds a line to the plot info at the bottom of a figure from create_figure or create_fractal_figure, e.g. the timing of each phase.
+    The figure still needs to be drawn
+    :param fig: the Figure
+    :param text: the line to add
+    :return: None
+    """
+    for info in fig.findobj(lambda artist: artist.get_gid() == "info"):
+        info.set_text(f"{info.get_text()}\n{text}")
+
+
+def save_images(path, results):
+    """
+    Saves the roots of each method as a png with one pixel per pair of inputs, straight from the array without a figure
+    (so no axes, titles or colorbar). every image has the same color scale
+    :param path: path of the figure's png, each image is saved next to it as "{path without .png} {method}.png"
+    :param results: dict of method name -> dict with a "roots" 2d array
+    :return: list of the paths saved
+    """
+    vmin, vmax = color_limits(results)
+    cmap = colormap()
+    root = path[:-4] if path.lower().endswith(".png") else path
+
+    paths = []
+    for method, result in results.items():
+        paths.append(f"{root} {method}.png")
+        matplotlib.image.imsave(paths[-1], result["roots"], cmap=cmap, vmin=vmin, vmax=vmax, origin="lower")
+
+    return paths
+
+
+def fractal_colors(basins, iterations, root_count, max_iter):
+    """
+    The colors of a complex plane from fractal.solve_fractal. each root has its own hue, evenly spaced around the color wheel,
+    and the more iterations an input took the darker it is. inputs that didn't converge are black
+    :param basins: 2d array of the index of the root each input converged to, -1 for none
+    :param iterations: 2d array of iterations
+    :param root_count: number of roots of the polynomial
+    :param max_iter: max iterations
+    :return: 3d array of rgb values, shape (*basins.shape, 3)
+    """
+    hue = np.where(basins >= 0, basins, 0) / max(1, root_count)
+    shade = np.log1p(iterations) / math.log1p(max(1, max_iter))
+    value = np.where(basins >= 0, 1 - (1 - FRACTAL_MIN_VALUE) * np.clip(shade, 0, 1), 0)
+
+    return hsv_to_rgb(np.stack([hue, np.full(hue.shape, FRACTAL_SATURATION), value], axis=-1))
+
+
+def create_fractal_figure(inputs, fractal, plot_name, info, fig_width, max_iter):
+    """
+    Creates the matplotlib figure of the complex plane, with each root marked. works the same as create_figure
+    :param inputs: 1d array of evenly spaced real and imaginary parts
+    :param fractal: dict with "roots", "basins" and "iterations", from fractal.solve_fractal
+    :param plot_name: the function as a string, used in the title
+    :param info: text with the plot info written at the bottom of the figure
+    :param fig_width: width of the figure, the height is half of this
+    :param max_iter: max iterations, for the shading
+    :return: the Figure
+    """
+    fig = Figure(figsize=(fig_width, fig_width/2), layout="tight")
+    pixels = display_pixels(fig, 1)
+
+    subplot = fig.add_subplot(1, 1, 1)
+    colors = fractal_colors(downsample(fractal["basins"], pixels), downsample(fractal["iterations"], pixels), fractal["roots"].size, max_iter)
+    img = subplot.imshow(colors, origin="lower", extent=extent(inputs), aspect="equal", interpolation="nearest")
+    img.set_gid("fractal")
+
+    # each root in the color of its basin, with a white edge so it can be seen on top of it
+    for n, root in enumerate(fractal["roots"]):
+        subplot.plot(root.real, root.imag, "o", color=hsv_to_rgb((n / fractal["roots"].size, FRACTAL_SATURATION, 1)), markeredgecolor="white")
+
+    subplot.set_xlim(extent(inputs)[:2])
+    subplot.set_ylim(extent(inputs)[2:])
+    subplot.set_xlabel("Re(z)")
+    subplot.set_ylabel("Im(z)")
+    subplot.set_title("\n".join(textwrap.wrap(f"Newton: {plot_name}", 40)), fontsize=10)
+
+    fig.text(0, 0, info, fontsize=10, wrap=True, gid="info")
+    fig.subplots_adjust(bottom=0.15)
+
+    return fig
+
+
+def update_fractal_figure(fig, fractal, max_iter):
+    """
+    Replaces the colors shown in a figure from create_fractal_figure. The figure still needs to be drawn
+    :param fig: the Figure
+    :param fractal: dict with "roots", "basins" and "iterations"
+    :param max_iter: max iterations
+    :return: None
+    """
+    pixels = display_pixels(fig, 1)
+
+    for img in fig.findobj(lambda artist: artist.get_gid() == "fractal"):
+        img.set_array(fractal_colors(downsample(fractal["basins"], pixels), downsample(fractal["iterations"], pixels), fractal["roots"].size, max_iter))
+
+
+def save_fractal_image(path, fractal, max_iter):
+    """
+    Saves the complex plane as a png with one pixel per input, like save_images
+    :param path: path of the figure's png, the image is saved next to it as "{path without .png} fractal.png"
+    :param fractal: dict with "roots", "basins" and "iterations"
+    :param max_iter: max iterations
+    :return: the path saved
+    """
+    root = path[:-4] if path.lower().endswith(".png") else path
+    matplotlib.image.imsave(f"{root} fractal.png", fractal_colors(fractal["basins"], fractal["iterations"], fractal["roots"].size, max_iter), origin="lower")
+
+    return f"{root} fractal.png"
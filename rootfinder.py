@@ -0,0 +1,297 @@
+import sys
+import json
+import argparse
+import contextlib
+import numpy as np
+import algorithms
+import sweep
+import storage
+import profiling
+import family
+
+
+# the choices of --dtype, auto lets sweep.select_dtype decide
+DTYPES = {"auto": None, "float32": np.float32, "float64": np.float64}
+
+
+def parse_subtype(subtype):
+    """
+    The subtype from the command line, a polynomial degree is an int and a trig function is a string
+    :param subtype: the string from the command line
+    :return: int or string
+    """
+    try:
+        return int(subtype)
+    except ValueError:
+        return subtype
+
+
+def get_spec(args):
+    """
+    Gets the function spec from either --spec or --function, --subtype and --constants
+    :param args: the parsed command line arguments
+    :return: function spec, the key word args for functions.compile_function
+    """
+    if args.spec is not None:
+        return json.loads(args.spec)
+
+    return {args.function: [parse_subtype(args.subtype), *args.constants]}
+
+
+def save_plot(png, spec, inputs, results, params, fig_width, full_res=False):
+    """
+    Saves the plot of the results, matplotlib is only imported when a plot is needed
+    :param png: path of the .png file
+    :param spec: function spec
+    :param inputs: 1d array of initial x values
+    :param results: the cleaned results
+    :param params: dict of the sweep parameters, the same as a storage.Container
+    :param fig_width: width of the plot
+    :param full_res: also save the roots of each method at full resolution next to the plot
+    :return: None
+    """
+    import render
+    import functions
+
+    plot_name = functions.compile_function(**spec).format()
+    info = f"max iter {params['max_iter']}, tol {params['tol']}, size {fig_width}x{fig_width/2}, l bound {params['l_bound']}, u bound {params['u_bound']}, step {params['step']}, max root {params['abs_max_root']}"
+    render.create_figure(inputs, results, plot_name, info, fig_width).savefig(png)
+    print(f"Saved plot to {png}")
+
+    if full_res:
+        for path in render.save_images(png, results):
+            print(f"Saved full resolution image to {path}")
+
+
+def run_sweep(args):
+    """
+    The sweep command, calculates the roots and saves them (and optionally the plot) without the gui
+    :param args: the parsed command line arguments
+    :return: exit code
+    """
+    spec = get_spec(args)
+    profiler = None
+    if args.profile is not None or args.cprofile is not None:
+        profiler = profiling.Profiler(cprofile=args.cprofile is not None)
+
+    with profiler.capture() if profiler is not None else contextlib.nullcontext():
+        inputs, results = sweep.sweep(spec, args.min, args.max, args.step, args.tol, args.max_iter, args.max_root, tuple(args.methods),
+                                      args.workers, args.tile_rows, dtype=DTYPES[args.dtype], path=args.save,
+                                      cache_dir=None if args.no_cache else args.cache_dir, adaptive=args.adaptive, profiler=profiler)
+
+        if args.save is not None:
+            print(f"Saved results to {args.save}")
+
+        if args.out is not None:
+            with profiling.phase(profiler, "save"):
+                arrays = {f"{method}_{field}": a for method, result in results.items() for field, a in result.items()}
+                np.savez(args.out, inputs=inputs, **arrays)
+            print(f"Saved results to {args.out}")
+
+        if args.png is not None:
+            params = {"max_iter": args.max_iter, "tol": args.tol, "l_bound": args.min, "u_bound": args.max, "step": args.step, "abs_max_root": args.max_root}
+            with profiling.phase(profiler, "plot"):
+                save_plot(args.png, spec, inputs, results, params, args.fig_width, args.full_res)
+
+    print(sweep.format_summary(sweep.summarize(results)))
+
+    if profiler is not None:
+        print(profiler.format())
+    if args.profile is not None:
+        profiler.dump(args.profile)
+        print(f"Saved profile to {args.profile}")
+    if args.cprofile is not None:
+        profiler.dump_stats(args.cprofile)
+        print(profiler.stats_text())
+        print(f"Saved cProfile stats to {args.cprofile}")
+
+    return 0
+
+
+def run_render(args):
+    """
+    The render command, plots a sweep saved with --save without calculating it again
+    :param args: the parsed command line arguments
+    :return: exit code
+    """
+    import functions
+
+    container = storage.load(args.path)
+    params = dict(container.params)
+    if args.max_root is not None:
+        params["abs_max_root"] = args.max_root
+
+    if not container.complete:
+        print(f"Warning: {args.path} is not complete, missing results are NaN")
+
+    spec = params["spec"]
+    results = sweep.clean_roots(functions.compile_function(**spec), container.results, params["tol"], params["abs_max_root"])
+    save_plot(args.png, spec, container.inputs, results, params, args.fig_width, args.full_res)
+
+    return 0
+
+
+def run_roots(args):
+    """
+    The roots command, prints every root of the function between min and max without solving a grid
+    :param args: the parsed command line arguments
+    :return: exit code
+    """
+    roots = algorithms.find_all_roots(get_spec(args), (args.min, args.max), args.tol, int(args.max_iter), args.samples)
+    print(f"{roots.size} roots between {args.min:g} and {args.max:g}")
+    for root in roots:
+        print(f"{root:.12g}")
+
+    return 0
+
+
+def run_fractal(args):
+    """
+    The fractal command, newton's method over the complex plane of a polynomial, colored by the root each input converges to
+    :param args: the parsed command line arguments
+    :return: exit code
+    """
+    import fractal
+    import render
+
+    spec = json.loads(args.spec) if args.spec is not None else {"polynomial": [args.degree, *args.constants]}
+    inputs, result = fractal.solve_fractal(spec, args.min, args.max, args.step, args.tol, args.max_iter)
+
+    if args.out is not None:
+        np.savez(args.out, inputs=inputs, **result)
+        print(f"Saved results to {args.out}")
+
+    if args.png is not None:
+        plot_name = fractal.polynomial_of(spec).format("z")
+        info = f"max iter {args.max_iter}, tol {args.tol}, size {args.fig_width}x{args.fig_width/2}, l bound {args.min}, u bound {args.max}, step {args.step}"
+        render.create_fractal_figure(inputs, result, plot_name, info, args.fig_width, args.max_iter).savefig(args.png)
+        print(f"Saved plot to {args.png}")
+
+        if args.full_res:
+            print(f"Saved full resolution image to {render.save_fractal_image(args.png, result, args.max_iter)}")
+
+    for n, root in enumerate(result["roots"]):
+        print(f"root {root:.6g}: {np.count_nonzero(result['basins'] == n)} of {inputs.size ** 2} inputs")
+
+    return 0
+
+
+def run_family(args):
+    """
+    The family command, the roots of one type of function for every set of constants in a file
+    :param args: the parsed command line arguments
+    :return: exit code
+    """
+    # a .npy file or a csv with a set of constants on each line
+    if args.constants.endswith(".npy"):
+        constants = np.load(args.constants)
+    else:
+        constants = np.loadtxt(args.constants, delimiter=",", ndmin=2)
+
+    # every set of constants is solved from each pair of neighbouring x values between min and max
+    seeds = np.linspace(args.min, args.max, args.pairs + 1)
+    results = family.solve_family(args.function, parse_subtype(args.subtype), constants, seeds[:-1], seeds[1:], int(args.max_iter), args.tol,
+                                  tuple(args.methods), args.workers, args.chunk_rows, out_dir=args.out_dir, csv_path=args.csv)
+
+    if args.out_dir is not None:
+        print(f"Saved results to {args.out_dir}")
+    if args.csv is not None:
+        print(f"Saved results to {args.csv}")
+
+    print(sweep.format_summary(sweep.summarize(results)))
+
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="rootfinder", description="Root Finder without the gui")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sweep_parser = commands.add_parser("sweep", help="calculate the roots from every pair of inputs, the same as the Plot button")
+    function = sweep_parser.add_mutually_exclusive_group(required=True)
+    function.add_argument("--spec", help='function spec as json, e.g. \'{"trigonometric": ["tan", 1, 1, 0, 0]}\'')
+    function.add_argument("--function", choices=["polynomial", "trigonometric", "exponential", "logarithm"], help="function type")
+    sweep_parser.add_argument("--subtype", default="0", help="polynomial degree or trig function, e.g. 3 or sin")
+    sweep_parser.add_argument("--constants", type=float, nargs="*", default=[], help="function constants")
+    sweep_parser.add_argument("--min", type=float, default=-5, help="min input")
+    sweep_parser.add_argument("--max", type=float, default=5, help="max input")
+    sweep_parser.add_argument("--step", type=float, default=0.1, help="step between each input")
+    sweep_parser.add_argument("--tol", type=float, default=1e-5, help="tolerance")
+    sweep_parser.add_argument("--max-iter", type=float, default=20, help="max iterations")
+    sweep_parser.add_argument("--max-root", type=float, default=sweep.DEFAULT_MAX_ROOT, help="max abs val root for trig functions")
+    sweep_parser.add_argument("--methods", nargs="+", default=["secant", "bisection"], choices=list(sweep.GRID_ALGORITHMS), help="algorithms to use")
+    sweep_parser.add_argument("--workers", type=int, default=None, help="number of worker processes, defaults to the number of cpus")
+    sweep_parser.add_argument("--tile-rows", type=int, default=sweep.DEFAULT_TILE_ROWS, help="rows of the grid solved by a worker at a time")
+    sweep_parser.add_argument("--dtype", choices=list(DTYPES), default="auto",
+                              help="precision of the sweep, auto uses float32 when the tolerance is loose enough for the bounds")
+    sweep_parser.add_argument("--adaptive", action="store_true", help="only solve the inputs where the roots change, faster but can miss small details")
+    sweep_parser.add_argument("--out", help="save the inputs and results to this .npz file")
+    sweep_parser.add_argument("--save", help="save the results and parameters to this folder as they are calculated, they can be plotted again with the render command")
+    sweep_parser.add_argument("--png", help="save the plot to this .png file")
+    sweep_parser.add_argument("--cache-dir", default=storage.DEFAULT_CACHE_DIR, help="folder of cached results, sweeps with the same parameters are loaded from it")
+    sweep_parser.add_argument("--no-cache", action="store_true", help="always calculate the results, without using the cache")
+    sweep_parser.add_argument("--fig-width", type=int, default=6, help="width of the plot")
+    sweep_parser.add_argument("--full-res", action="store_true", help="with --png, also save each method's roots as a png with one pixel per pair of inputs")
+    sweep_parser.add_argument("--profile", help="time each phase (solve, clean, saving...) and count the function evaluations of each method, saved to this .json file")
+    sweep_parser.add_argument("--cprofile", help="record every function call with cProfile and save the stats to this .prof file, use --workers 1 to include the solvers")
+    sweep_parser.set_defaults(run=run_sweep)
+
+    roots_parser = commands.add_parser("roots", help="every root of the function between min and max, without a grid")
+    function = roots_parser.add_mutually_exclusive_group(required=True)
+    function.add_argument("--spec", help='function spec as json, e.g. \'{"trigonometric": ["tan", 1, 1, 0, 0]}\'')
+    function.add_argument("--function", choices=["polynomial", "trigonometric", "exponential", "logarithm"], help="function type")
+    roots_parser.add_argument("--subtype", default="0", help="polynomial degree or trig function, e.g. 3 or sin")
+    roots_parser.add_argument("--constants", type=float, nargs="*", default=[], help="function constants")
+    roots_parser.add_argument("--min", type=float, default=-5, help="min x value")
+    roots_parser.add_argument("--max", type=float, default=5, help="max x value")
+    roots_parser.add_argument("--tol", type=float, default=1e-12, help="tolerance")
+    roots_parser.add_argument("--max-iter", type=float, default=100, help="max iterations")
+    roots_parser.add_argument("--samples", type=int, default=algorithms.DEFAULT_SCAN_SAMPLES, help="x values checked for a sign change, for functions that aren't polynomials")
+    roots_parser.set_defaults(run=run_roots)
+
+    fractal_parser = commands.add_parser("fractal", help="newton's method over the complex plane of a polynomial, min to max on both axes")
+    function = fractal_parser.add_mutually_exclusive_group(required=True)
+    function.add_argument("--spec", help='polynomial spec as json, e.g. \'{"polynomial": [3, 1, 0, 0, -1]}\'')
+    function.add_argument("--degree", type=int, help="polynomial degree, with --constants")
+    fractal_parser.add_argument("--constants", type=float, nargs="*", default=[], help="polynomial constants, highest power first")
+    fractal_parser.add_argument("--min", type=float, default=-2, help="min real and imaginary part")
+    fractal_parser.add_argument("--max", type=float, default=2, help="max real and imaginary part")
+    fractal_parser.add_argument("--step", type=float, default=0.01, help="step between each input")
+    fractal_parser.add_argument("--tol", type=float, default=1e-5, help="tolerance")
+    fractal_parser.add_argument("--max-iter", type=float, default=50, help="max iterations")
+    fractal_parser.add_argument("--out", help="save the inputs, roots, basins and iterations to this .npz file")
+    fractal_parser.add_argument("--png", help="save the plot to this .png file")
+    fractal_parser.add_argument("--fig-width", type=int, default=6, help="width of the plot")
+    fractal_parser.add_argument("--full-res", action="store_true", help="with --png, also save the complex plane as a png with one pixel per input")
+    fractal_parser.set_defaults(run=run_fractal)
+
+    family_parser = commands.add_parser("family", help="the roots of one type of function for thousands of sets of constants at once")
+    family_parser.add_argument("--function", required=True, choices=["polynomial", "trigonometric", "exponential", "logarithm"], help="function type")
+    family_parser.add_argument("--subtype", default="0", help="polynomial degree or trig function, e.g. 3 or sin")
+    family_parser.add_argument("--constants", required=True, help=".npy or .csv file with a set of constants in each row")
+    family_parser.add_argument("--min", type=float, default=-5, help="min initial x value")
+    family_parser.add_argument("--max", type=float, default=5, help="max initial x value")
+    family_parser.add_argument("--pairs", type=int, default=20, help="pairs of initial x values for each set of constants, min to max is split into this many intervals")
+    family_parser.add_argument("--tol", type=float, default=1e-10, help="tolerance")
+    family_parser.add_argument("--max-iter", type=float, default=50, help="max iterations")
+    family_parser.add_argument("--methods", nargs="+", default=["brent"], choices=list(sweep.GRID_ALGORITHMS), help="algorithms to use")
+    family_parser.add_argument("--workers", type=int, default=None, help="number of worker processes, defaults to the number of cpus")
+    family_parser.add_argument("--chunk-rows", type=int, default=family.DEFAULT_CHUNK_ROWS, help="sets of constants solved at a time")
+    family_parser.add_argument("--out-dir", help="save each result array to this folder as a .npy file, written as the chunks finish")
+    family_parser.add_argument("--csv", help="save every pair to this .csv file, written as the chunks finish")
+    family_parser.set_defaults(run=run_family)
+
+    render_parser = commands.add_parser("render", help="plot a sweep saved with --save")
+    render_parser.add_argument("path", help="folder the sweep was saved in")
+    render_parser.add_argument("--png", required=True, help="save the plot to this .png file")
+    render_parser.add_argument("--max-root", type=float, default=None, help="max abs val root for trig functions, defaults to the one the sweep used")
+    render_parser.add_argument("--fig-width", type=int, default=6, help="width of the plot")
+    render_parser.add_argument("--full-res", action="store_true", help="also save each method's roots as a png with one pixel per pair of inputs")
+    render_parser.set_defaults(run=run_render)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
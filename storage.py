@@ -0,0 +1,342 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from algorithms import Status
+
+
+# constants
+FIELDS = ("roots", "iterations", "evaluations", "status")  # the same order as algorithms.GridResult
+METADATA_FILE = "metadata.json"
+INPUTS_FILE = "inputs.npy"
+DONE_FILE = "done.npy"
+CLEANED_DIR = "cleaned"  # subfolder of a container with its cleaned roots and status for each abs_max_root, see sweep.sweep
+DEFAULT_CACHE_DIR = "cache"  # created next to the images folder
+DEFAULT_CACHE_BYTES = 2 * 1024**3  # the least recently used results are deleted when the cache is bigger than this
+CACHE_FORMAT = 3  # part of the cache key, changed when the saved fields change so old results aren't loaded
+
+# the parameters that change the solver results. anything else (like abs_max_root or the rounding) is applied when the results are read
+CACHE_KEY_PARAMS = ("spec", "l_bound", "u_bound", "step", "tol", "max_iter", "dtype", "adaptive")
+
+
+def allocate(methods, shape, dtype=np.float64, out_dir=None, fields=FIELDS):
+    """
+    Preallocates the result arrays the tiles are written into, optionally as memory mapped .npy files so the grid doesn't need to fit in memory
+    :param methods: names of the algorithms
+    :param shape: shape of the grid
+    :param dtype: dtype of the roots, np.float64 or np.float32
+    :param out_dir: if given, each array is created as a memory mapped file "{method}_{field}.npy" in this folder
+    :param fields: the fields to allocate, defaults to all of FIELDS
+    :return: dict of method name -> dict of arrays for each of the fields
+    """
+    fields = {field: value for field, value in {"roots": (dtype, np.nan), "iterations": (np.int32, 0), "evaluations": (np.int32, 0),
+                                                "status": (np.int8, Status.NOT_SOLVED)}.items() if field in fields}
+
+    if out_dir is not None and not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    results = {}
+    for method in methods:
+        results[method] = {}
+        for field, (field_dtype, fill) in fields.items():
+            if out_dir is None:
+                a = np.empty(shape, dtype=field_dtype)
+            else:
+                a = np.lib.format.open_memmap(os.path.join(out_dir, f"{method}_{field}.npy"), mode="w+", dtype=field_dtype, shape=shape)
+            a[...] = fill
+            results[method][field] = a
+
+    return results
+
+
+class Container:
+    """
+    A sweep saved to a folder: the inputs and every result array as .npy files, and the parameters it was calculated with as json.
+    the arrays are memory mapped, so tiles are written straight to disk as they finish and loading one doesn't read
+    anything until it is used. done records the tiles of each method that have been written, so an unfinished sweep can be recognised:
+    done[i][start] is the row after the last row of the tile of methods[i] that starts at row start, or 0 if it hasn't been written
+    """
+
+    def __init__(self, path, params, methods, inputs, results, done):
+        self.path = path
+        self.params = params
+        self.methods = tuple(methods)
+        self.inputs = inputs
+        self.results = results
+        self.done = done
+
+    @property
+    def complete(self):
+        """
+        :return: True if every pair of every method has been written
+        """
+        return all(self._covered(i) == self.inputs.size for i in range(len(self.methods)))
+
+    def _covered(self, i):
+        """
+        The rows of a method that have been written, from the first row up to the first tile that hasn't been written.
+        a tile of an order invariant method only has the rows below it in its mirrored columns, so a row is only complete
+        when every tile above it has been written too
+        :param i: index of the method
+        :return: the number of rows
+        """
+        stops = self.done[i]
+        covered = 0
+        while covered < stops.size and stops[covered] > covered:
+            covered = int(stops[covered])
+
+        return covered
+
+    def append(self, start, column, tile):
+        """
+        Records a tile that has been written into the results (e.g. by sweep.solve_grid), can be used as its on_tile
+        :param start: the row the tile starts at
+        :param column: the column the tile starts at
+        :param tile: dict of method name -> tuple of arrays in the order of FIELDS, methods that aren't in this container are ignored
+        :return: None
+        """
+        for method, values in tile.items():
+            if method in self.methods:
+                i = self.methods.index(method)
+                self.done[i, start] = max(self.done[i, start], start + values[0].shape[0])
+
+    def flush(self):
+        """
+        Makes sure everything written so far is on disk
+        :return: None
+        """
+        for arrays in self.results.values():
+            for a in arrays.values():
+                a.flush()
+        self.done.flush()
+
+
+def create(path, params, inputs, methods, dtype=np.float64):
+    """
+    Creates a new container for a sweep, with every result NaN/0 (and Status.NOT_SOLVED) until tiles are written to it
+    :param path: folder to save it in, created if it doesn't exist
+    :param params: dict of the parameters of the sweep (spec, bounds, step, tol...), must be json serializable
+    :param inputs: 1d array of initial x values
+    :param methods: names of the algorithms
+    :param dtype: dtype of the roots
+    :return: the Container
+    """
+    inputs = np.asarray(inputs, dtype=float)
+    results = allocate(methods, (inputs.size, inputs.size), dtype, path)
+
+    # cleaned roots of a sweep saved to the same folder before are from different results
+    shutil.rmtree(os.path.join(path, CLEANED_DIR), ignore_errors=True)
+
+    np.save(os.path.join(path, INPUTS_FILE), inputs)
+    done = np.lib.format.open_memmap(os.path.join(path, DONE_FILE), mode="w+", dtype=np.int64, shape=(len(methods), inputs.size))
+    done[...] = 0
+
+    with open(os.path.join(path, METADATA_FILE), "w") as file:
+        json.dump({"params": params, "methods": list(methods)}, file, indent=2)
+
+    return Container(path, params, methods, inputs, results, done)
+
+
+def load(path, mode="r"):
+    """
+    Loads a container with its arrays memory mapped, so only the parts that are used are read from disk
+    :param path: the folder it was saved in
+    :param mode: "r" for read only, "r+" to write more tiles to it
+    :return: the Container
+    """
+    with open(os.path.join(path, METADATA_FILE)) as file:
+        metadata = json.load(file)
+
+    methods = metadata["methods"]
+    results = {method: {field: np.load(os.path.join(path, f"{method}_{field}.npy"), mmap_mode=mode) for field in FIELDS} for method in methods}
+    inputs = np.load(os.path.join(path, INPUTS_FILE))
+    done = np.load(os.path.join(path, DONE_FILE), mmap_mode=mode)
+
+    return Container(path, metadata["params"], methods, inputs, results, done)
+
+
+def _normalise(value):
+    """
+    Makes equal parameters give the same json, e.g. a constant of 1 and 1.0
+    :param value: parameter value
+    :return: the value with every number as a float
+    """
+    if isinstance(value, dict):
+        return {str(k): _normalise(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [_normalise(v) for v in value]
+    elif isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+
+    return value
+
+
+def cache_key(params, method):
+    """
+    The name of the cached results of one method, a hash of every parameter that changes them
+    :param params: dict of the sweep parameters
+    :param method: name of the algorithm
+    :return: hex string
+    """
+    key = {name: params[name] for name in CACHE_KEY_PARAMS}
+    key["method"] = method
+    key["format"] = CACHE_FORMAT
+
+    return hashlib.sha256(json.dumps(_normalise(key), sort_keys=True).encode()).hexdigest()
+
+
+def cache_lookup(cache_dir, params, method):
+    """
+    Finds the results of a method in the cache. unfinished results (e.g. from a cancelled sweep) are deleted
+    :param cache_dir: the cache folder
+    :param params: dict of the sweep parameters
+    :param method: name of the algorithm
+    :return: the Container, or None if it isn't cached
+    """
+    path = os.path.join(cache_dir, cache_key(params, method))
+    if not os.path.isfile(os.path.join(path, METADATA_FILE)):
+        return None
+
+    container = load(path)
+    if not container.complete:
+        shutil.rmtree(path, ignore_errors=True)
+        return None
+
+    # the modified time of the metadata is when it was last used, for the LRU eviction
+    os.utime(os.path.join(path, METADATA_FILE))
+    return container
+
+
+def cache_create(cache_dir, params, inputs, method, dtype=np.float64):
+    """
+    Creates a container in the cache for the results of one method
+    :param cache_dir: the cache folder
+    :param params: dict of the sweep parameters
+    :param inputs: 1d array of initial x values
+    :param method: name of the algorithm
+    :param dtype: dtype of the roots
+    :return: the Container
+    """
+    return create(os.path.join(cache_dir, cache_key(params, method)), params, inputs, (method,), dtype)
+
+
+def _folder_size(path):
+    """
+    :param path: a folder
+    :return: total size in bytes of every file in it and its subfolders
+    """
+    return sum(os.path.getsize(os.path.join(folder, file)) for folder, _, files in os.walk(path) for file in files)
+
+
+def cache_evict(cache_dir, max_bytes=DEFAULT_CACHE_BYTES, keep=()):
+    """
+    Deletes the least recently used results until the cache is no bigger than max_bytes
+    :param cache_dir: the cache folder
+    :param max_bytes: max size of the cache
+    :param keep: paths of containers that aren't deleted, e.g. the ones the results of a sweep are still memory mapped from
+    :return: None
+    """
+    if not os.path.isdir(cache_dir):
+        return
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        metadata = os.path.join(path, METADATA_FILE)
+        if os.path.isfile(metadata):
+            entries.append((os.path.getmtime(metadata), _folder_size(path), path))
+
+    keep = {os.path.abspath(path) for path in keep}
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def tests():
+    """
+    Checks saving and loading containers and the cache, in a temporary folder
+    :return: None
+    """
+    import time
+    import tempfile
+    import sweep
+
+    spec = {"polynomial": [3, 1, 0, -2, 1]}
+    inputs = np.linspace(-3, 3, 40)
+    methods = ("secant", "bisection")
+    params = {"spec": spec, "l_bound": -3, "u_bound": 3, "step": 0.15, "tol": 1e-5, "max_iter": 20, "abs_max_root": 20, "dtype": "float64",
+              "adaptive": False}
+
+    print("(+) Testing storage\n")
+
+    # saved to a temporary folder, windows can't delete a file that is still memory mapped so it is deleted with ignore_errors
+    folder = tempfile.mkdtemp()
+
+    # the tiles are written straight into the container, which loads as the same arrays
+    path = os.path.join(folder, "sweep")
+    container = create(path, params, inputs, methods)
+    results = sweep.solve_grid(spec, inputs, 20, 1e-5, methods, workers=1, tile_rows=8, out=container.results, on_tile=container.append)
+    container.flush()
+    loaded = load(path)
+    if loaded.complete and loaded.params == params and all(np.array_equal(loaded.results[method][field], results[method][field], equal_nan=True)
+                                                           for method in methods for field in FIELDS):
+        print("(+) Passed saving and loading")
+    else:
+        print("(-) Failed saving and loading")
+
+    # the mirrored tiles of bisection finish in any order, a missing tile means the rows below it aren't complete either
+    tiles = list(sweep.iter_tiles(spec, inputs, 20, 1e-5, ("bisection",), workers=1, tile_rows=8))
+    container = create(os.path.join(folder, "partial"), params, inputs, ("bisection",))
+    for start, column, tile in tiles[:0:-1]:
+        container.append(start, column, tile)
+    complete = container.complete
+    container.append(*tiles[0])
+    if not complete and container.complete:
+        print("(+) Passed unfinished container")
+    else:
+        print("(-) Failed unfinished container")
+
+    # equal parameters have the same key, anything that changes the results doesn't
+    if (cache_key(params, "secant") == cache_key({**params, "l_bound": -3.0, "abs_max_root": 5}, "secant")
+            and cache_key(params, "secant") != cache_key({**params, "tol": 1e-6}, "secant")
+            and cache_key(params, "secant") != cache_key(params, "bisection")):
+        print("(+) Passed cache key")
+    else:
+        print("(-) Failed cache key")
+
+    # unfinished results are never loaded from the cache
+    cache_dir = os.path.join(folder, "cache")
+    cache_create(cache_dir, params, inputs, "secant")
+    if cache_lookup(cache_dir, params, "secant") is None and not os.listdir(cache_dir):
+        print("(+) Passed unfinished cache")
+    else:
+        print("(-) Failed unfinished cache")
+
+    # the least recently used results are deleted first, unless they are kept
+    paths = []
+    for tol in (1e-3, 1e-4, 1e-5):
+        container = cache_create(cache_dir, {**params, "tol": tol}, inputs, "secant")
+        container.append(0, 0, {"secant": tuple(results["secant"][field] for field in FIELDS)})
+        container.flush()
+        paths.append(container.path)
+        time.sleep(0.01)
+    cache_lookup(cache_dir, {**params, "tol": 1e-3}, "secant")
+    size = _folder_size(paths[0])
+    cache_evict(cache_dir, 2.5 * size, keep=[paths[1]])
+    if [os.path.isdir(path) for path in paths] == [True, True, False]:
+        print("(+) Passed cache eviction")
+    else:
+        print("(-) Failed cache eviction")
+
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    tests()
@@ -0,0 +1,766 @@
+import os
+import math
+import time
+import shutil
+import tempfile
+import functools
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import functions
+import algorithms
+import storage
+import profiling
+from storage import FIELDS
+
+
+# constants
+DEFAULT_TILE_ROWS = 16  # rows of the grid solved by a worker at a time, small enough that cancelling is quick
+CANCEL_POLL_SECONDS = 0.1
+GRID_ALGORITHMS = {"secant": algorithms.secant_grid, "bisection": functools.partial(algorithms.bisection_grid, bracketed=True),
+                   "brent": algorithms.brent_grid, "illinois": algorithms.illinois_grid, "ridders": algorithms.ridders_grid,
+                   "newton": algorithms.newton_grid, "halley": algorithms.halley_grid}
+
+# algorithms where the result only depends on the pair of initial x values and not their order, only the upper triangle
+# of the grid is solved for these and then mirrored into the lower triangle. newton and halley start from the midpoint of the pair
+ORDER_INVARIANT_ALGORITHMS = {"bisection", "newton", "halley"}
+
+# algorithms that start from the midpoint of each pair, so they don't use the y values of the initial x values
+MIDPOINT_ALGORITHMS = {"newton", "halley"}
+
+# algorithms that can find roots far outside of the inputs, for trig functions their roots are limited to abs_max_root
+UNBOUNDED_ALGORITHMS = {"secant", "newton", "halley"}
+DEFAULT_MAX_ROOT = 20
+
+# the adaptive sweep starts by solving every DEFAULT_COARSE_STEP'th input
+DEFAULT_COARSE_STEP = 16
+
+# pairs cleaned at a time by clean_roots when it writes into out, so memory mapped results aren't read into memory all at once
+CLEAN_BLOCK_PAIRS = 1024 * 1024
+
+# a sweep is solved in float32 when the gap between float32 values at the biggest input is at least this many times smaller than the tolerance
+FLOAT32_MARGIN = 100
+
+
+def solve_tile(spec, methods, rows, columns, NMAX, tol, row_values=None, column_values=None):
+    """
+    Solves one tile of the grid: every input in rows paired with every input in columns.
+    Runs inside a worker process, so it takes the function spec and compiles it there instead of being passed a function
+    :param spec: function spec, the key word args for functions.compile_function
+    :param methods: names of the algorithms in GRID_ALGORITHMS to use
+    :param rows: the first initial x values of the tile
+    :param columns: the second initial x values
+    :param NMAX: max number of iterations
+    :param tol: tolerance
+    :param row_values: precomputed y values of rows, if given column_values must be too and the initial x values aren't evaluated again
+    :param column_values: precomputed y values of columns
+    :return: tuple of (dict of method name -> algorithms.GridResult of arrays of shape (len(rows), len(columns)), cache hits, cache misses,
+    dict of method name -> seconds spent solving)
+    """
+    f = functions.CachedFunction(functions.compile_function(**spec))
+    x0, x1 = np.meshgrid(rows, columns, indexing="ij")
+
+    fx0 = fx1 = None
+    if row_values is not None:
+        fx0 = np.asarray(row_values)[:, np.newaxis]
+        fx1 = np.asarray(column_values)[np.newaxis, :]
+
+    tile, seconds = {}, {}
+    for method in methods:
+        start = time.perf_counter()
+        tile[method] = GRID_ALGORITHMS[method](f, x0, x1, NMAX, None, None, tol, fx0=fx0, fx1=fx1)
+        seconds[method] = time.perf_counter() - start
+
+        # both initial y values of every pair came from the precomputed seeds
+        if row_values is not None and method not in MIDPOINT_ALGORITHMS:
+            f.hits += 2 * x0.size
+
+    return tile, f.hits, f.misses, seconds
+
+
+def store_tile(results, start, column, tile):
+    """
+    Copies a solved tile into the full result arrays. tiles of order invariant methods are also mirrored into the lower triangle
+    :param results: the arrays from storage.allocate
+    :param start: the row the tile starts at
+    :param column: the column the tile starts at
+    :param tile: dict of method name -> tuple of arrays in the order of FIELDS, from solve_tile
+    :return: None
+    """
+    for method, values in tile.items():
+        for field, value in zip(FIELDS, values):
+            stop = start + value.shape[0]
+            results[method][field][start:stop, column:] = value
+
+            # the tile starts at the diagonal, so its transpose is the same rows of the lower triangle
+            if method in ORDER_INVARIANT_ALGORITHMS:
+                results[method][field][start:, start:stop] = value.T
+
+
+def _tiles(methods, inputs, tile_rows):
+    """
+    Splits the grid into tiles of rows. order invariant methods get their own tiles that start at the diagonal,
+    so only the upper triangle is solved for them
+    :param methods: names of the algorithms
+    :param inputs: 1d array of initial x values
+    :param tile_rows: number of rows in each tile
+    :return: list of (methods, start row, start column) for each tile
+    """
+    ordered = tuple(method for method in methods if method not in ORDER_INVARIANT_ALGORITHMS)
+    invariant = tuple(method for method in methods if method in ORDER_INVARIANT_ALGORITHMS)
+
+    tiles = []
+    for start in range(0, inputs.size, tile_rows):
+        if ordered:
+            tiles.append((ordered, start, 0))
+        if invariant:
+            tiles.append((invariant, start, start))
+
+    return tiles
+
+
+def iter_pool(function, jobs, workers=None, cancel=None):
+    """
+    Generator that calls function for every job on a process pool, used by iter_tiles and family.iter_chunks. only a couple of jobs per
+    worker are submitted at a time, so the arguments of every job don't need to be in memory at once. results are yielded in the order
+    they finish, stops early if cancelled
+    :param function: function run in the worker processes, it has to be importable (defined at the top level of a module)
+    :param jobs: iterable of (key, tuple of arguments of function), e.g. a generator so the arguments are only made when they are submitted
+    :param workers: number of worker processes, defaults to the number of cpus. 1 runs every job in this process
+    :param cancel: function that returns True when the calculations should be cancelled, checked between jobs
+    :return: yields (key, result of function)
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # no need for a pool if there is only one worker
+    if workers <= 1:
+        for key, arguments in jobs:
+            if cancel is not None and cancel():
+                return
+
+            yield key, function(*arguments)
+
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        waiting = iter(jobs)
+        pending = {}
+
+        while True:
+            # keep a couple of jobs queued for each worker, rather than submitting all of them at once
+            for key, arguments in waiting:
+                pending[executor.submit(function, *arguments)] = key
+                if len(pending) >= 2 * workers:
+                    break
+
+            if not pending:
+                return
+
+            # wait with a timeout so that cancel is still checked while long jobs are running
+            done, _ = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+
+            if cancel is not None and cancel():
+                # any jobs that haven't started are dropped, and jobs already running are small enough to finish quickly
+                return
+
+            for future in done:
+                yield pending.pop(future), future.result()
+
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_tiles(spec, inputs, NMAX, tol, methods=("secant", "bisection"), workers=None, tile_rows=DEFAULT_TILE_ROWS, cancel=None,
+               precompute_seeds=True, stats=None, dtype=np.float64):
+    """
+    Generator that solves the (inp0, inp1) grid tile by tile, split into tiles of rows that are solved in parallel by a process pool.
+    only a few tiles per worker are in progress at a time, so memory use doesn't depend on the size of the grid.
+    tiles are yielded in the order they finish, stops early if cancelled
+    :param spec: function spec, the key word args for functions.compile_function
+    :param inputs: 1d array of initial x values
+    :param NMAX: max number of iterations
+    :param tol: tolerance
+    :param methods: names of the algorithms in GRID_ALGORITHMS to use
+    :param workers: number of worker processes, defaults to the number of cpus. 1 solves every tile in this process
+    :param tile_rows: number of rows of the grid in each tile
+    :param cancel: function that returns True when the calculations should be cancelled, checked between tiles
+    :param precompute_seeds: if True, f is evaluated once at every input and the tiles use these values instead of evaluating
+    the initial x values of every pair again
+    :param stats: optional dict, "hits" and "misses" are set to the number of y values that came from the cache and that were evaluated,
+    and "seconds" and "evaluations" to dicts of method name -> time spent in its solver and its function evaluations so far
+    :param dtype: dtype the tiles are solved in, np.float64 or np.float32
+    :return: yields (start row, start column, tile) where tile is a dict of method name -> algorithms.GridResult, see store_tile
+    """
+    inputs = np.asarray(inputs, dtype=dtype)
+    tile_rows = max(1, int(tile_rows))
+    tiles = _tiles(methods, inputs, tile_rows)
+
+    # the y values of every input are evaluated once for the whole sweep
+    cache = functions.CachedFunction(functions.compile_function(**spec))
+    seed_values = cache.precompute(inputs) if precompute_seeds else None
+
+    def arguments(tile_methods, start, column):
+        # the arguments to solve_tile for a tile
+        values = (seed_values[start:start + tile_rows], seed_values[column:]) if precompute_seeds else (None, None)
+        return (spec, tile_methods, inputs[start:start + tile_rows], inputs[column:], NMAX, tol, *values)
+
+    seconds = {method: 0.0 for method in methods}
+    evaluations = {method: 0 for method in methods}
+
+    def count(hits, misses, tile=None, tile_seconds=None):
+        cache.hits += hits
+        cache.misses += misses
+        for method in tile or {}:
+            seconds[method] += tile_seconds[method]
+            evaluations[method] += int(np.sum(tile[method].evaluations))
+
+        if stats is not None:
+            stats["hits"] = cache.hits
+            stats["misses"] = cache.misses
+            stats["seconds"] = dict(seconds)
+            stats["evaluations"] = dict(evaluations)
+
+    count(0, 0)
+
+    jobs = (((start, column), arguments(tile_methods, start, column)) for tile_methods, start, column in tiles)
+    for (start, column), (tile, hits, misses, tile_seconds) in iter_pool(solve_tile, jobs, workers, cancel):
+        count(hits, misses, tile, tile_seconds)
+        yield start, column, tile
+
+
+def solve_grid(spec, inputs, NMAX, tol, methods=("secant", "bisection"), workers=None, tile_rows=DEFAULT_TILE_ROWS, cancel=None,
+               precompute_seeds=True, stats=None, dtype=np.float64, out_dir=None, out=None, on_tile=None):
+    """
+    Solves every pair of inputs (the (inp0, inp1) grid) with each method, see iter_tiles.
+    element [i][j] of each result array is the result from inputs[i] and inputs[j] as the initial x values
+    :param spec: function spec, the key word args for functions.compile_function
+    :param inputs: 1d array of initial x values
+    :param NMAX: max number of iterations
+    :param tol: tolerance
+    :param methods: names of the algorithms in GRID_ALGORITHMS to use
+    :param workers: number of worker processes, defaults to the number of cpus. 1 solves every tile in this process
+    :param tile_rows: number of rows of the grid in each tile
+    :param cancel: function that returns True when the calculations should be cancelled, checked between tiles
+    :param precompute_seeds: if True, the y values of the inputs are only evaluated once
+    :param stats: optional dict, set to the same counts as iter_tiles
+    :param dtype: dtype the tiles are solved in and of the roots, np.float64 or np.float32
+    :param out_dir: if given, the results are memory mapped .npy files in this folder instead of arrays in memory
+    :param out: preallocated result arrays to write into (e.g. the results of a storage.Container), instead of allocating them
+    :param on_tile: function called as on_tile(start row, start column, tile) after each tile is written
+    :return: dict of method name -> dict of arrays for each of FIELDS, or None if cancelled
+    """
+    inputs = np.asarray(inputs, dtype=float)
+    results = out if out is not None else storage.allocate(methods, (inputs.size, inputs.size), dtype, out_dir)
+    remaining = len(_tiles(methods, inputs, max(1, int(tile_rows))))
+
+    for start, column, tile in iter_tiles(spec, inputs, NMAX, tol, methods, workers, tile_rows, cancel, precompute_seeds, stats, dtype):
+        store_tile(results, start, column, tile)
+        remaining -= 1
+
+        if on_tile is not None:
+            on_tile(start, column, tile)
+
+    # the generator stops early if it was cancelled
+    if remaining:
+        return None
+
+    return results
+
+
+def _split(low, high):
+    """
+    Splits the blocks of an adaptive sweep in half along one axis, blocks that are only 1 apart can't be split
+    :param low: array of the first index of each block
+    :param high: array of the last index of each block
+    :return: tuple of (index of the parent block, low, high) for each child
+    """
+    middle = (low + high) // 2
+    splits = high - low > 1
+    parent = np.arange(low.size)
+
+    return (np.concatenate([parent, parent[splits]]),
+            np.concatenate([low, middle[splits]]),
+            np.concatenate([np.where(splits, middle, high), high[splits]]))
+
+
+def _fill(result, solved, i0, i1, j0, j1):
+    """
+    Fills the unsolved pairs in each block of an adaptive sweep with the result of its first corner.
+    blocks with the same shape are filled together, there are only a few different shapes on each level
+    :param result: dict of arrays for each of FIELDS
+    :param solved: bool array of the pairs that have been solved
+    :param i0: array of the first row of each block
+    :param i1: array of the last row of each block
+    :param j0: array of the first column of each block
+    :param j1: array of the last column of each block
+    :return: None
+    """
+    n = solved.shape[1]
+    corners = i0 * n + j0
+    shapes = (i1 - i0 + 1) * (n + 1) + (j1 - j0 + 1)
+
+    for shape in np.unique(shapes):
+        height, width = divmod(int(shape), n + 1)
+        same = shapes == shape
+
+        # flat index of every pair in the blocks, and of the corner each one is filled from
+        offsets = (np.arange(height)[:, None] * n + np.arange(width)[None, :]).ravel()
+        index = corners[same][:, None] + offsets[None, :]
+        fill = ~solved.ravel()[index]
+        index, source = index[fill], np.broadcast_to(corners[same][:, None], fill.shape)[fill]
+
+        for field in FIELDS:
+            a = result[field].reshape(-1)
+            a[index] = a[source]
+
+    return
+
+
+def solve_adaptive(spec, inputs, NMAX, tol, methods=("secant", "bisection"), coarse_step=DEFAULT_COARSE_STEP, cancel=None, stats=None,
+                   dtype=np.float64, out=None, on_tile=None):
+    """
+    Solves the (inp0, inp1) grid like solve_grid, but only solves every pair of inputs where the roots change.
+    first a coarse grid of every coarse_step'th input is solved, then each block between 4 solved pairs is filled with their root
+    if all 4 found the same root (or all found no root), otherwise it is split into 4 smaller blocks and the pairs at their corners are solved,
+    down to single inputs. small details inside of a block with the same root at each corner can be missed
+    :param spec: function spec, the key word args for functions.compile_function
+    :param inputs: 1d array of initial x values
+    :param NMAX: max number of iterations
+    :param tol: tolerance
+    :param methods: names of the algorithms in GRID_ALGORITHMS to use
+    :param coarse_step: number of inputs between the pairs in the first coarse grid
+    :param cancel: function that returns True when the calculations should be cancelled, checked between each level of blocks
+    :param stats: optional dict, "solved", "seconds" and "evaluations" are set to dicts of method name -> the number of pairs solved
+    (out of inputs.size ** 2), the time spent in its solver and its function evaluations
+    :param dtype: dtype the pairs are solved in and of the roots
+    :param out: optional preallocated results to write into, like solve_grid
+    :param on_tile: optional function called with (0, 0, tile) when each method is finished, the tile is the whole grid
+    :return: dict of method name -> dict of arrays for each of FIELDS, or None if cancelled
+    """
+    inputs = np.asarray(inputs, dtype=dtype)
+    n = inputs.size
+    f = functions.compile_function(**spec)
+    seed_values = f(inputs)
+    digits = abs(int(math.log10(tol)))
+    chunk = DEFAULT_TILE_ROWS * 1024
+    results = out if out is not None else storage.allocate(methods, (n, n), dtype)
+
+    if stats is not None:
+        stats["solved"], stats["seconds"], stats["evaluations"] = {}, {}, {}
+
+    # indexes of the coarse grid, always including the last input
+    coarse = np.unique(np.append(np.arange(0, n, max(1, int(coarse_step))), n - 1))
+
+    for method in methods:
+        result = results[method]
+        solved = np.zeros((n, n), dtype=bool)
+        seconds, evaluations = 0.0, 0
+
+        # the root each solved pair is counted as for comparing blocks: rounded to the tolerance, or NaN if it didn't converge
+        key = np.full((n, n), np.nan)
+
+        def solve(i, j):
+            # solves every pair (inputs[i], inputs[j]) that hasn't been solved yet
+            nonlocal seconds, evaluations
+            pending = np.unique(i * n + j)
+            i, j = np.divmod(pending[~solved.ravel()[pending]], n)
+
+            # solved in chunks about the size of a tile, the solvers are slower on arrays that don't fit in the cpu cache
+            for start in range(0, i.size, chunk):
+                a, b = i[start:start + chunk], j[start:start + chunk]
+                start_time = time.perf_counter()
+                values = GRID_ALGORITHMS[method](f, inputs[a], inputs[b], NMAX, None, None, tol, fx0=seed_values[a], fx1=seed_values[b])
+                seconds += time.perf_counter() - start_time
+                evaluations += int(np.sum(values.evaluations))
+                for field, value in zip(FIELDS, values):
+                    result[field][a, b] = value
+
+                key[a, b] = np.where(values.status == algorithms.Status.CONVERGED, np.round(values.roots, digits), np.nan)
+
+            solved[i, j] = True
+
+        # the blocks between the coarse pairs, each is the first and last index of the rows and columns
+        i, j = np.meshgrid(coarse, coarse, indexing="ij")
+        solve(i.ravel(), j.ravel())
+        i0, j0 = np.meshgrid(coarse[:-1], coarse[:-1], indexing="ij")
+        i1, j1 = np.meshgrid(coarse[1:], coarse[1:], indexing="ij")
+        i0, i1, j0, j1 = i0.ravel(), i1.ravel(), j0.ravel(), j1.ravel()
+
+        while i0.size:
+            if cancel is not None and cancel():
+                return None
+
+            # blocks where all 4 corners found the same root (or no root) are filled with it
+            corners = [key[i0, j0], key[i0, j1], key[i1, j0], key[i1, j1]]
+            uniform = np.logical_and.reduce([(c == corners[0]) | (np.isnan(c) & np.isnan(corners[0])) for c in corners[1:]])
+            _fill(result, solved, i0[uniform], i1[uniform], j0[uniform], j1[uniform])
+
+            # the rest are split into 4 (or 2 if they are only 1 input wide), blocks that can't be split only have corners
+            splittable = ~uniform & ((i1 - i0 > 1) | (j1 - j0 > 1))
+            i0, i1, j0, j1 = i0[splittable], i1[splittable], j0[splittable], j1[splittable]
+
+            parent, i0, i1 = _split(i0, i1)
+            j0, j1 = j0[parent], j1[parent]
+            parent, j0, j1 = _split(j0, j1)
+            i0, i1 = i0[parent], i1[parent]
+
+            solve(np.concatenate([i0, i0, i1, i1]), np.concatenate([j0, j1, j0, j1]))
+
+        if stats is not None:
+            stats["solved"][method] = int(np.count_nonzero(solved))
+            stats["seconds"][method] = seconds
+            stats["evaluations"][method] = evaluations
+        if on_tile is not None:
+            on_tile(0, 0, {method: tuple(result[field] for field in FIELDS)})
+
+    return results
+
+
+def _clean(f, method, roots, status, tol, abs_max_root):
+    """
+    The cleaning of clean_roots, changes roots and status in place
+    :param f: the compiled function
+    :param method: name of the algorithm
+    :param roots: array of roots
+    :param status: array of algorithms.Status
+    :param tol: tolerance
+    :param abs_max_root: for trig functions, the max absolute value of a root found by an unbounded algorithm
+    :return: None
+    """
+    # since trig functions have an infinite amount of roots, limit the solutions to +- 20 or the algorithm finds roots at really high x values, and the resulting plot has no variation in color (since the difference between pi and 2pi is negligable compared to pi and 75000, the scale is completly off)
+    if isinstance(f, functions.Trig) and method in UNBOUNDED_ALGORITHMS:
+        status[(status == algorithms.Status.CONVERGED) & (np.abs(roots) > abs_max_root)] = algorithms.Status.OUT_OF_RANGE
+
+    # if no root was found and, for example, it blows up wildly or never settles, the "root" found after max_iter
+    # is not a root and will mess up the entire plot. the solvers record why they stopped, so only converged roots are kept
+    roots[status != algorithms.Status.CONVERGED] = np.nan
+
+    # round answer to tolerance
+    np.round(roots, abs(int(math.log10(tol))), out=roots)
+
+
+def _clean_to_disk(f, method, result, folder, tol, abs_max_root):
+    """
+    The cleaned roots and status of a method saved to a container, memory mapped from a folder in its storage.CLEANED_DIR for each
+    abs_max_root. they are cleaned in a temporary folder that is renamed when it is finished, and never written again, so results
+    returned by an earlier sweep with the same parameters stay the same
+    :param f: the compiled function
+    :param method: name of the algorithm
+    :param result: dict of arrays for each of FIELDS, from the container
+    :param folder: the folder of the container
+    :param tol: tolerance
+    :param abs_max_root: for trig functions, the max absolute value of a root found by an unbounded algorithm
+    :return: result with the cleaned roots and status, read only
+    """
+    path = os.path.join(folder, storage.CLEANED_DIR, f"{method}_{float(abs_max_root)}")
+
+    if not os.path.isdir(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = tempfile.mkdtemp(dir=os.path.dirname(path))
+        out = storage.allocate((method,), result["roots"].shape, result["roots"].dtype, temp, fields=("roots", "status"))
+        clean_roots(f, {method: result}, tol, abs_max_root, out=out)
+        for a in out[method].values():
+            a.flush()
+
+        # windows can't rename a folder with files that are still memory mapped
+        del out
+        try:
+            os.rename(temp, path)
+        except OSError:
+            # another sweep with the same parameters finished cleaning first
+            shutil.rmtree(temp, ignore_errors=True)
+
+    return {**result, **{field: np.load(os.path.join(path, f"{method}_{field}.npy"), mmap_mode="r") for field in ("roots", "status")}}
+
+
+def clean_roots(f, results, tol, abs_max_root=DEFAULT_MAX_ROOT, out=None):
+    """
+    Sets the roots of the pairs that didn't converge to NaN and rounds the rest to the tolerance, the solver results aren't changed
+    unless out is results
+    :param f: the compiled function
+    :param results: dict of method name -> dict with "roots" and "status" arrays, from solve_grid
+    :param tol: tolerance
+    :param abs_max_root: for trig functions, the max absolute value of a root found by an unbounded algorithm
+    :param out: optional dict of method name -> dict with "roots" and "status" arrays to write the cleaned values into instead of copies,
+    e.g. memory mapped arrays from storage.allocate, or results itself to clean it in place. they are written a block of rows at a time
+    :return: results with the cleaned roots and status
+    """
+    cleaned = {}
+    for method, result in results.items():
+        if out is None:
+            roots = np.array(result["roots"])
+            status = np.array(result["status"])
+            _clean(f, method, roots, status, tol, abs_max_root)
+        else:
+            roots, status = out[method]["roots"], out[method]["status"]
+            rows = max(1, CLEAN_BLOCK_PAIRS // max(1, roots[:1].size))
+            for start in range(0, len(roots), rows):
+                block = slice(start, start + rows)
+                block_roots, block_status = np.array(result["roots"][block]), np.array(result["status"][block])
+                _clean(f, method, block_roots, block_status, tol, abs_max_root)
+                roots[block], status[block] = block_roots, block_status
+
+        cleaned[method] = {**result, "roots": roots, "status": status}
+
+    return cleaned
+
+
+def summarize(results):
+    """
+    Summary stats of each method from the solver results, e.g. for printing after a sweep
+    :param results: dict of method name -> dict of arrays for each of FIELDS, from solve_grid or clean_roots
+    :return: dict of method name -> dict with "pairs", "status" (dict of algorithms.Status name -> number of pairs),
+    "mean_iterations" and "evaluations" (y values calculated for every pair, a pair that was mirrored or filled in by an
+    adaptive sweep counts the evaluations of the pair it was copied from)
+    """
+    summary = {}
+    for method, result in results.items():
+        status = np.asarray(result["status"])
+        counts = np.bincount(status.ravel() - min(algorithms.Status), minlength=len(algorithms.Status))
+        solved = status != algorithms.Status.NOT_SOLVED
+
+        summary[method] = {"pairs": int(status.size),
+                           "status": {s.name: int(counts[s - min(algorithms.Status)]) for s in algorithms.Status if counts[s - min(algorithms.Status)]},
+                           "mean_iterations": float(np.mean(result["iterations"], where=solved)) if solved.any() else 0.0,
+                           "evaluations": int(np.sum(result["evaluations"], dtype=np.int64))}
+
+    return summary
+
+
+def format_summary(summary):
+    """
+    The summary from summarize as text, one line per method
+    :param summary: dict from summarize
+    :return: str
+    """
+    lines = []
+    for method, stats in summary.items():
+        status = ", ".join(f"{name.lower().replace('_', ' ')} {count}" for name, count in stats["status"].items())
+        lines.append(f"{method}: {status} of {stats['pairs']} pairs, {stats['mean_iterations']:.1f} iterations on average, "
+                     f"{stats['evaluations']} evaluations")
+
+    return "\n".join(lines)
+
+
+def select_dtype(tol, l_bound, u_bound):
+    """
+    The dtype a sweep is solved in when it isn't given. the roots are rounded to the tolerance anyway, so float32 (half the memory
+    and about twice as fast) is used when its precision at the biggest input is still FLOAT32_MARGIN times finer than the tolerance,
+    e.g. tol 1e-4 with inputs up to about +-8. tighter tolerances or bigger inputs use float64
+    :param tol: tolerance
+    :param l_bound: min input
+    :param u_bound: max input
+    :return: np.float32 or np.float64
+    """
+    if np.finfo(np.float32).eps * max(1, abs(l_bound), abs(u_bound)) * FLOAT32_MARGIN <= tol:
+        return np.float32
+
+    return np.float64
+
+
+def get_inputs(l_bound, u_bound, step):
+    """
+    The initial x values of a sweep
+    :param l_bound: min input
+    :param u_bound: max input (not included)
+    :param step: step between each input
+    :return: 1d array
+    """
+    return np.arange(l_bound, u_bound, step)
+
+
+def sweep(spec, l_bound, u_bound, step, tol, max_iter, abs_max_root=DEFAULT_MAX_ROOT, methods=("secant", "bisection"), workers=None,
+          tile_rows=DEFAULT_TILE_ROWS, cancel=None, dtype=None, path=None, cache_dir=None, cache_bytes=storage.DEFAULT_CACHE_BYTES,
+          adaptive=False, on_tile=None, profiler=None):
+    """
+    Calculates the same roots as the Plot button without the gui: every pair of inputs from l_bound to u_bound is used as the
+    initial x values for each algorithm, and the roots that aren't roots are NaN
+    :param spec: function spec, the key word args for functions.compile_function, e.g. {"trigonometric": ["tan", 1, 1, 0, 0]}
+    :param l_bound: min input
+    :param u_bound: max input (not included)
+    :param step: step between each input
+    :param tol: tolerance
+    :param max_iter: max number of iterations
+    :param abs_max_root: for trig functions, the max absolute value of a root found by secant
+    :param methods: names of the algorithms in GRID_ALGORITHMS to use
+    :param workers: number of worker processes, defaults to the number of cpus
+    :param tile_rows: number of rows of the grid in each tile
+    :param cancel: function that returns True when the calculations should be cancelled
+    :param dtype: dtype the sweep is solved in and of the roots, np.float64 or np.float32, or None to choose it with select_dtype
+    :param path: if given, the solver results and parameters are saved to a storage.Container in this folder as the tiles finish
+    :param cache_dir: if given (and path isn't), methods that have already been calculated with the same parameters are loaded
+    from this cache folder instead of calculated again, and new results are added to it
+    :param cache_bytes: max size of the cache folder, the least recently used results are deleted when it's bigger
+    :param adaptive: use solve_adaptive instead of solve_grid, faster for functions with large areas of inputs that find the same root
+    but it can miss small details. it always runs in this process, workers and tile_rows aren't used
+    :param on_tile: optional function called with (start, column, tile) as each tile is finished, like solve_grid. the roots in the tile
+    are cleaned with clean_roots first. methods loaded from the cache (or solved adaptively) are given as one tile of the whole grid
+    :param profiler: optional profiling.Profiler, the "cache", "solve", "clean" and "evict" phases are timed and each method's solver
+    time and function evaluations are added to it
+    :return: tuple of (inputs, dict of method name -> dict of arrays for each of FIELDS), results is None if cancelled. the arrays of
+    methods saved to a container (path or cache_dir) are memory mapped from it, with the cleaned roots and status in its storage.CLEANED_DIR
+    """
+    if step <= 0 or tol <= 0 or max_iter <= 0 or u_bound <= l_bound or abs_max_root < 0:
+        raise ValueError("step, tol and max_iter must be > 0, u_bound must be > l_bound and abs_max_root must be >= 0")
+
+    # add x values to be used as inputs
+    inputs = get_inputs(l_bound, u_bound, step)
+    f = functions.compile_function(**spec)
+    if dtype is None:
+        dtype = select_dtype(tol, l_bound, u_bound)
+
+    params = {"spec": spec, "l_bound": l_bound, "u_bound": u_bound, "step": step, "tol": tol, "max_iter": max_iter,
+              "abs_max_root": abs_max_root, "dtype": np.dtype(dtype).name, "adaptive": bool(adaptive)}
+
+    # results of methods that are already cached, containers to save the rest in, and the folder of each method's container
+    found = {}
+    containers = []
+    folders = {}
+    with profiling.phase(profiler, "cache"):
+        if path is not None:
+            containers.append(storage.create(path, params, inputs, methods, dtype))
+        elif cache_dir is not None:
+            for method in methods:
+                cached = storage.cache_lookup(cache_dir, params, method)
+                if cached is not None:
+                    found[method] = cached.results[method]
+                    folders[method] = cached.path
+                else:
+                    containers.append(storage.cache_create(cache_dir, params, inputs, method, dtype))
+        folders.update({method: c.path for c in containers for method in c.methods})
+
+    missing = tuple(method for method in methods if method not in found)
+    out = {method: c.results[method] for c in containers for method in c.methods} if containers else None
+
+    def append_tile(start, column, tile):
+        for c in containers:
+            c.append(start, column, tile)
+
+        if on_tile is not None:
+            with profiling.phase(profiler, "clean"):
+                cleaned = clean_roots(f, {method: dict(zip(FIELDS, values)) for method, values in tile.items()}, tol, abs_max_root)
+            on_tile(start, column, {method: tuple(cleaned[method][field] for field in FIELDS) for method in tile})
+
+    for method, result in found.items():
+        append_tile(0, 0, {method: tuple(result[field] for field in FIELDS)})
+
+    results = {}
+    stats = {}
+    with profiling.phase(profiler, "solve"):
+        if missing and adaptive:
+            results = solve_adaptive(spec, inputs, max_iter, tol, missing, cancel=cancel, stats=stats, dtype=dtype, out=out, on_tile=append_tile)
+        elif missing:
+            results = solve_grid(spec, inputs, max_iter, tol, missing, workers, tile_rows, cancel, stats=stats, dtype=dtype, out=out,
+                                 on_tile=append_tile)
+            for c in containers:
+                c.flush()
+
+    if profiler is not None:
+        for method in stats.get("seconds", {}):
+            profiler.add_method(method, stats["seconds"][method], stats["evaluations"][method])
+        profiler.count("cached methods", len(found))
+
+        # every y value of the tiles goes through a functions.CachedFunction (the adaptive sweep doesn't use one)
+        if "misses" in stats:
+            profiler.count("y values evaluated", stats["misses"])
+            profiler.count("y value cache hits", stats["hits"])
+
+    if results is None:
+        # unfinished results can't be used from the cache
+        if path is None:
+            for c in containers:
+                shutil.rmtree(c.path, ignore_errors=True)
+        return inputs, None
+
+    results = {method: found[method] if method in found else results[method] for method in methods}
+    with profiling.phase(profiler, "clean"):
+        # the results of a container stay the same so they can be cleaned again with a different abs_max_root, its cleaned roots
+        # are memory mapped files instead of copies in memory. results that are only in memory are cleaned in place
+        cleaned = {}
+        for method in methods:
+            if method in folders:
+                cleaned[method] = _clean_to_disk(f, method, results[method], folders[method], tol, abs_max_root)
+            else:
+                cleaned.update(clean_roots(f, {method: results[method]}, tol, abs_max_root, out=results))
+
+    # the cleaned roots are memory mapped from the containers of the results, so those aren't evicted
+    if cache_dir is not None and path is None:
+        with profiling.phase(profiler, "evict"):
+            storage.cache_evict(cache_dir, cache_bytes, keep=folders.values())
+
+    return inputs, cleaned
+
+
+def tests():
+    """
+    Checks that the ways of solving a grid give the same results as solving every pair at once
+    :return: None
+    """
+    spec = {"trigonometric": ["tan", 1, 1, 0, 0]}
+    f = functions.compile_function(**spec)
+    inputs = get_inputs(-5, 5, 0.25)
+    x0, x1 = np.meshgrid(inputs, inputs, indexing="ij")
+    methods = ("secant", "bisection", "brent", "newton")
+
+    def equal(a, b):
+        return all(np.array_equal(a[method][field], b[method][field], equal_nan=True) for method in a for field in FIELDS)
+
+    # every pair solved at once with the grid solvers
+    expected = {method: dict(zip(FIELDS, GRID_ALGORITHMS[method](f, x0, x1, 20, None, None, 1e-5))) for method in methods}
+
+    print("(+) Testing sweeps\n")
+
+    # tiles of rows, with only the upper triangle solved and mirrored for the order invariant methods
+    results = solve_grid(spec, inputs, 20, 1e-5, methods, workers=1, tile_rows=7)
+    if equal(results, expected):
+        print("(+) Passed tiles and mirrored tiles")
+    else:
+        print("(-) Failed tiles and mirrored tiles")
+
+    if equal(solve_grid(spec, inputs, 20, 1e-5, methods, workers=2, tile_rows=7), results):
+        print("(+) Passed process pool")
+    else:
+        print("(-) Failed process pool")
+
+    if solve_grid(spec, inputs, 20, 1e-5, methods, workers=1, cancel=lambda: True) is None:
+        print("(+) Passed cancelled sweep")
+    else:
+        print("(-) Failed cancelled sweep")
+
+    # every pair is solved when the coarse grid is every input, otherwise only some of them are
+    stats = {}
+    adaptive = solve_adaptive(spec, inputs, 20, 1e-5, methods, coarse_step=4, stats=stats)
+    same = np.mean([np.isclose(adaptive[method]["roots"], results[method]["roots"], equal_nan=True) for method in methods])
+    if equal(solve_adaptive(spec, inputs, 20, 1e-5, methods, coarse_step=1), results) and same > 0.9 and all(
+            stats["solved"][method] < inputs.size ** 2 for method in methods):
+        print(f"(+) Passed adaptive sweep, {same:.0%} of the roots are the same")
+    else:
+        print(f"(-) Failed adaptive sweep, {same:.0%} of the roots are the same")
+
+    # cleaned into arrays (e.g. memory mapped ones) a block of rows at a time, the same as cleaned copies
+    cleaned = clean_roots(f, results, 1e-5)
+    out = storage.allocate(methods, x0.shape, fields=("roots", "status"))
+    if equal(clean_roots(f, results, 1e-5, out=out), cleaned) and equal(clean_roots(f, results, 1e-5, out=results), cleaned):
+        print("(+) Passed cleaning into arrays")
+    else:
+        print("(-) Failed cleaning into arrays")
+
+    # sweeps from the cache with a different abs_max_root don't change the results of earlier sweeps, and the same one is reused.
+    # saved to a temporary folder, windows can't delete a file that is still memory mapped so it is deleted with ignore_errors
+    folder = tempfile.mkdtemp()
+    first = sweep(spec, -5, 5, 0.25, 1e-5, 20, 20, ("secant",), workers=1, cache_dir=folder)[1]
+    roots = np.array(first["secant"]["roots"])
+    narrow = sweep(spec, -5, 5, 0.25, 1e-5, 20, 1, ("secant",), workers=1, cache_dir=folder)[1]
+    again = sweep(spec, -5, 5, 0.25, 1e-5, 20, 20, ("secant",), workers=1, cache_dir=folder)[1]
+    if (np.array_equal(first["secant"]["roots"], roots, equal_nan=True) and np.nanmax(np.abs(roots)) > 1 >= np.nanmax(np.abs(narrow["secant"]["roots"]))
+            and np.array_equal(again["secant"]["roots"], roots, equal_nan=True)):
+        print("(+) Passed cached sweeps with a different max root")
+    else:
+        print("(-) Failed cached sweeps with a different max root")
+    del first, narrow, again
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    tests()
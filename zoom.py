@@ -0,0 +1,163 @@
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import functions
+import sweep
+from storage import FIELDS
+
+
+# constants
+ZOOM_TILE = 64  # rows and columns of inputs in each tile
+DEFAULT_ZOOM_CACHE_TILES = 512  # tiles kept for panning back, each one is ZOOM_TILE**2 roots per method
+MAX_ZOOM_STRETCH = 2  # the step of a view is at most this many times finer than the step of its more zoomed out axis
+
+
+def zoom_step(low, high, pixels):
+    """
+    The step between inputs for showing low..high on pixels pixels, rounded to a power of 2 so that zooming
+    back to the same level (or panning) uses the same inputs and the tiles can be reused
+    :param low: first visible input
+    :param high: last visible input
+    :param pixels: number of pixels on the screen between them
+    :return: float
+    """
+    return 2.0 ** round(math.log2((high - low) / max(1, pixels)))
+
+
+def view_step(x_limits, y_limits, pixels):
+    """
+    The step between inputs for a view, the finer of the steps of the two axes so neither has fewer inputs than pixels.
+    both axes use the same step, so a view that is much wider than it is tall (or the other way around) would have thousands of
+    inputs per pixel along its long axis. the step is kept within MAX_ZOOM_STRETCH of the coarser one to limit that
+    :param x_limits: (low, high) of the x axis
+    :param y_limits: (low, high) of the y axis
+    :param pixels: (width, height) of the plot on the screen in pixels
+    :return: float
+    """
+    steps = (zoom_step(*x_limits, pixels[0]), zoom_step(*y_limits, pixels[1]))
+
+    return max(min(steps), max(steps) / MAX_ZOOM_STRETCH)
+
+
+def tile_inputs(step, index):
+    """
+    The inputs of a tile, tile index i has the inputs (i * ZOOM_TILE + k) * step for k in 0..ZOOM_TILE
+    :param step: step between inputs
+    :param index: index of the tile
+    :return: 1d array
+    """
+    return (index * ZOOM_TILE + np.arange(ZOOM_TILE)) * step
+
+
+def tile_range(low, high, step):
+    """
+    The indexes of the tiles that cover low..high
+    :param low: first visible input
+    :param high: last visible input
+    :param step: step between inputs
+    :return: range
+    """
+    return range(math.floor(low / step / ZOOM_TILE), math.floor(high / step / ZOOM_TILE) + 1)
+
+
+class ZoomTiles:
+    """
+    Solves the part of the (inp0, inp1) grid that is visible when the plot is zoomed in, at about the resolution of the screen.
+    the grid is split into square tiles of ZOOM_TILE inputs on a lattice for each step, and the least recently
+    used tiles are kept, so panning or zooming back to somewhere that was already shown doesn't solve anything
+    """
+
+    def __init__(self, spec, NMAX, tol, abs_max_root, methods=("secant", "bisection"), maxsize=DEFAULT_ZOOM_CACHE_TILES):
+        self.spec = spec
+        self.f = functions.compile_function(**spec)
+        self.NMAX = NMAX
+        self.tol = tol
+        self.abs_max_root = abs_max_root
+        self.methods = tuple(methods)
+        self.maxsize = maxsize
+        self.tiles = OrderedDict()
+        self.lock = threading.Lock()  # the tiles can be used by a zoom that is being superseded and the new one at the same time
+
+    def tile(self, step, row, column):
+        """
+        The cleaned roots of one tile, from the cache or solved with sweep.solve_tile
+        :param step: step between inputs
+        :param row: index of the tile's rows, the first initial x values (the y axis)
+        :param column: index of the tile's columns, the second initial x values (the x axis)
+        :return: dict of method name -> 2d array of roots, shape (ZOOM_TILE, ZOOM_TILE)
+        """
+        key = (step, row, column)
+        with self.lock:
+            if key in self.tiles:
+                self.tiles.move_to_end(key)
+                return self.tiles[key]
+
+        tile = sweep.solve_tile(self.spec, self.methods, tile_inputs(step, row), tile_inputs(step, column), self.NMAX, self.tol)[0]
+        cleaned = sweep.clean_roots(self.f, {method: dict(zip(FIELDS, values)) for method, values in tile.items()}, self.tol, self.abs_max_root)
+        roots = {method: cleaned[method]["roots"] for method in self.methods}
+
+        with self.lock:
+            self.tiles[key] = roots
+            while len(self.tiles) > self.maxsize:
+                self.tiles.popitem(last=False)
+
+        return roots
+
+    def view(self, x_limits, y_limits, pixels, cancel=None):
+        """
+        Solves (or loads) every tile that is visible
+        :param x_limits: (low, high) of the x axis, the second initial x value
+        :param y_limits: (low, high) of the y axis, the first initial x value
+        :param pixels: (width, height) of the plot on the screen in pixels
+        :param cancel: function that returns True when the calculations should be cancelled, checked between tiles
+        :return: tuple of (extent of the tiles for imshow, dict of method name -> dict with the "roots" of every tile), or None if cancelled
+        """
+        step = view_step(x_limits, y_limits, pixels)
+        rows = tile_range(*y_limits, step)
+        columns = tile_range(*x_limits, step)
+
+        results = {method: {"roots": np.empty((len(rows) * ZOOM_TILE, len(columns) * ZOOM_TILE))} for method in self.methods}
+        for i, row in enumerate(rows):
+            for j, column in enumerate(columns):
+                if cancel is not None and cancel():
+                    return None
+
+                for method, roots in self.tile(step, row, column).items():
+                    results[method]["roots"][i * ZOOM_TILE:(i + 1) * ZOOM_TILE, j * ZOOM_TILE:(j + 1) * ZOOM_TILE] = roots
+
+        # each input is the center of its pixel
+        extent = ((columns.start * ZOOM_TILE - 0.5) * step, (columns.stop * ZOOM_TILE - 0.5) * step,
+                  (rows.start * ZOOM_TILE - 0.5) * step, (rows.stop * ZOOM_TILE - 0.5) * step)
+
+        return extent, results
+
+
+def tests():
+    """
+    Checks that a view is solved at about the resolution of the screen
+    :return: None
+    """
+    tiles = ZoomTiles({"trigonometric": ["tan", 1, 1, 0, 0]}, 20, 1e-5, 20)
+
+    print("(+) Testing zoom\n")
+
+    # a square view has at least one input for every pixel on both axes
+    extent, results = tiles.view((0, 2), (0, 2), (100, 100))
+    shape = results["secant"]["roots"].shape
+    if min(shape) >= 100 and extent[0] <= 0 and extent[1] >= 2:
+        print("(+) Passed square view")
+    else:
+        print(f"(-) Failed square view, {shape} roots")
+
+    # a 1000:1 view is limited to MAX_ZOOM_STRETCH times the inputs of its long axis, instead of solving thousands of tiles along it
+    extent, results = tiles.view((0, 1000), (0, 1), (100, 100))
+    shape = results["secant"]["roots"].shape
+    if shape[1] <= (100 * MAX_ZOOM_STRETCH // ZOOM_TILE + 3) * ZOOM_TILE and extent[1] >= 1000:
+        print("(+) Passed 1000:1 view")
+    else:
+        print(f"(-) Failed 1000:1 view, {shape} roots")
+
+
+if __name__ == "__main__":
+    tests()